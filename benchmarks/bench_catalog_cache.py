@@ -0,0 +1,151 @@
+# ==================================================================================================
+#                                         BENCHMARK: SKU CATALOG CACHE
+# ==================================================================================================
+"""Requests, bytes and time of ``CatalogCache`` against a local HTTP stub of a published sheet.
+
+The stub (``http.server`` on localhost) serves a synthetic catalog page with an
+``ETag`` and ``Last-Modified`` and answers ``304`` when the validators match.
+Each scenario is one run (a fresh ``CatalogCache`` over the same snapshot
+directory) and checks what went over the wire:
+
+    cold          no snapshot                      -> 200, snapshot written
+    unchanged     sheet not edited                 -> conditional GET, 304, snapshot reused
+    sheet fixed   SKU added, new ETag              -> 200, the new SKU is in the catalog
+    server error  stub answers 500                 -> stale snapshot, run goes on
+    offline       CATALOG_OFFLINE                  -> no request at all
+    daemon        one cache, ``get`` x3 within TTL -> one request
+
+    python benchmarks/bench_catalog_cache.py --skus 3000
+"""
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bluestars_report.catalog_cache import CatalogCache
+from synthetic_reports import catalog_sheet_html, make_catalog
+
+BRAND = 'BlueStars'
+
+
+class _SheetHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        stub = self.server.stub
+        etag, modified_since = self.headers.get('If-None-Match'), self.headers.get('If-Modified-Since')
+        # If-None-Match wins over If-Modified-Since (RFC 9110): a new ETag within the same second is still new
+        unchanged = etag == stub.etag if etag is not None else modified_since == stub.last_modified
+        if stub.fail:
+            status, body = 500, b'Internal Server Error'
+        elif unchanged:
+            status, body = 304, b''
+        else:
+            status, body = 200, stub.page
+        stub.requests.append({'status': status, 'bytes': len(body), 'conditional': bool(etag or modified_since)})
+
+        self.send_response(status)
+        if status != 500:
+            self.send_header('ETag', stub.etag)
+            self.send_header('Last-Modified', stub.last_modified)
+        if status != 304:
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class SheetStub:
+    """A published Google Sheet on localhost; ``publish`` replaces its content and validators."""
+
+    def __init__(self, catalog):
+        self.requests = []
+        self.fail = False
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _SheetHandler)
+        self.server.daemon_threads = True
+        self.server.stub = self
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/sheet/pubhtml"
+        self.publish(catalog)
+
+    def publish(self, catalog):
+        self.page = catalog_sheet_html(catalog).encode('utf-8')
+        self.etag = '"' + hashlib.sha256(self.page).hexdigest()[:16] + '"'
+        self.last_modified = formatdate(time.time(), usegmt=True)
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+        return False
+
+
+def run(stub, cache, gets=1):
+    """``gets`` calls of ``cache.get``; returns the frame, the requests it made and the wall time."""
+    seen = len(stub.requests)
+    start = time.perf_counter()
+    for _ in range(gets):
+        frame = cache.get(BRAND)
+    return frame, stub.requests[seen:], time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--skus', type=int, default=3000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    catalog = make_catalog(args.skus, args.seed)
+    fixed = pd.concat([catalog, pd.DataFrame({0: [args.skus + 1], 'SKU': ['ZZ999999'], 'Product': ['Fixed']})],
+                      ignore_index=True)
+    cache_dir = tempfile.mkdtemp(prefix='bench-catalog-')
+
+    with SheetStub(catalog) as stub:
+        def new_run(**kwargs):
+            return CatalogCache({BRAND: stub.url}, cache_dir, **kwargs)
+
+        def fixed_sheet():
+            stub.publish(fixed)
+            return new_run()
+
+        def server_error():
+            stub.fail = True
+            return new_run()
+
+        scenarios = [
+            ('cold', new_run, 1, [(200, False)]),
+            ('unchanged', new_run, 1, [(304, True)]),
+            ('sheet fixed', fixed_sheet, 1, [(200, True)]),
+            ('server error', server_error, 1, [(500, True)]),
+            ('offline', lambda: new_run(offline=True), 1, []),
+            ('daemon', lambda: setattr(stub, 'fail', False) or new_run(ttl=3600), 3, [(304, True)]),
+        ]
+        print(f"{'scenario':<13} {'requests':>8} {'statuses':<12} {'bytes':>10} {'time':>8}  SKUs")
+        for label, make_cache, gets, expected in scenarios:
+            frame, requests_made, seconds = run(stub, make_cache(), gets)
+            statuses = [(request['status'], request['conditional']) for request in requests_made]
+            if statuses != expected:
+                raise SystemExit(f"❌ {label}: expected (status, conditional) {expected}, got {statuses}")
+            skus = frame.iloc[1:]['SKU'].astype(str)
+            if label not in ('cold', 'unchanged') and 'ZZ999999' not in set(skus):
+                raise SystemExit(f"❌ {label}: the SKU added to the sheet is missing from the catalog")
+            print(f"{label:<13} {len(requests_made):>8} {','.join(str(s) for s, _ in statuses) or '-':<12} "
+                  f"{sum(request['bytes'] for request in requests_made):>10,} {seconds * 1000:7.1f}ms  {len(skus):,}")
+    print("✅ 200 -> 304 -> changed ETag -> stale snapshot on error -> offline -> one request per TTL")
+
+
+if __name__ == '__main__':
+    main()
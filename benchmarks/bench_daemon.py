@@ -0,0 +1,119 @@
+# ==================================================================================================
+#                                         BENCHMARK: REPORT DAEMON
+# ==================================================================================================
+"""Drive ``ReportDaemon`` through a week with a local mailbox, no Gmail and no Amazon.
+
+The synthetic reports are written to disk and delivered one by one into a
+``DirectoryMailbox`` as ``file://`` links (plus an unrelated email); the bundle
+goes to ``smtp_stub.SMTPStub``. After every delivery ``run_once`` must process
+exactly the report that arrived, and nothing is sent until the week is
+complete; then exactly one email carries the bundle. Polling again, and
+polling from a restarted daemon, must download and send nothing.
+
+    python benchmarks/bench_daemon.py --rows 3000
+"""
+import argparse
+import email
+import io
+import os
+import sys
+import tempfile
+import time
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bluestars_report.report_daemon import ReportDaemon
+from smtp_stub import SMTPStub
+from synthetic_reports import load_pipeline, make_report_set, use_catalog_snapshot, write_catalog_snapshot
+
+
+def bundle_files(stub):
+    """Names of the files inside the zip attached to each email received by ``stub``."""
+    bundles = []
+    for message in stub.messages:
+        with open(message['path'], 'rb') as f:
+            msg = email.message_from_binary_file(f)
+        for part in msg.walk():
+            if part.get_filename():
+                bundles.append(zipfile.ZipFile(io.BytesIO(part.get_payload(decode=True))).namelist())
+    return bundles
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=3000, help='rows per report')
+    parser.add_argument('--skus', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='bench-daemon-')
+    # Every campaign has a SKU: the week ends with the bundle, not the missing-SKU alert
+    reports, catalog = make_report_set(args.rows, args.skus, args.seed, missing_sku_rate=0)
+    os.makedirs(os.path.join(work_dir, 'files'))
+    for name, payload in reports.items():
+        with open(os.path.join(work_dir, 'files', f"{name}.csv"), 'wb') as f:
+            f.write(payload)
+
+    with SMTPStub(os.path.join(work_dir, 'outbox')) as stub:
+        os.environ.update(RUNS_DIR=os.path.join(work_dir, 'runs'), HISTORY_DIR=os.path.join(work_dir, 'history'),
+                          CAMPAIGN_MEMO_PATH=':memory:', GMAIL_SYNC_PATH=':memory:', TRANSFORM_WORKERS='1',
+                          EXPORT_WORKERS='1', DAEMON_MAILBOX=f"dir:{os.path.join(work_dir, 'mailbox')}",
+                          SMTP_HOST=stub.host, SMTP_PORT=str(stub.port), SMTP_SSL='0')
+        os.chdir(work_dir)
+        pipeline = use_catalog_snapshot(load_pipeline(),
+                                        write_catalog_snapshot(catalog, os.path.join(work_dir, 'catalog')))
+
+        downloads = []
+        download_arrival = pipeline.download_arrival
+
+        def counting_download(report_key, link):
+            downloads.append(report_key)
+            return download_arrival(report_key, link)
+
+        pipeline.download_arrival = counting_download
+
+        subjects = pipeline.report_registry.subjects()
+        subject_of = {key: subject for subject, key in subjects.items()}
+        mailbox = pipeline.make_mailbox_watcher()
+
+        def new_daemon():
+            return ReportDaemon(pipeline.make_mailbox_watcher(), subjects, pipeline.daemon_week,
+                                inbox_dir=lambda run_key: os.path.join(pipeline.RUNS_DIR, run_key, 'inbox'),
+                                process=pipeline.process_arrival, assemble=pipeline.assemble_week, poll_interval=0)
+
+        def poll(daemon, label):
+            start = time.perf_counter()
+            processed = daemon.run_once()
+            print(f"{label:<24} processed {','.join(processed) or '-':<12} downloads {len(downloads):>2}  "
+                  f"emails {stub.stats['messages']}  {time.perf_counter() - start:6.2f}s")
+            return processed
+
+        daemon = new_daemon()
+        if poll(daemon, 'empty mailbox') or downloads:
+            raise SystemExit("❌ Empty mailbox: something was processed")
+        mailbox.deliver("Newsletter", "file:///nowhere.csv")
+        for n, key in enumerate(reports, 1):
+            mailbox.deliver(f"Fwd: {subject_of[key]}", f"file://{os.path.join(work_dir, 'files', f'{key}.csv')}")
+            if poll(daemon, f"arrival {n}/{len(reports)}") != [key]:
+                raise SystemExit(f"❌ {key}: not processed when its email arrived")
+            if n < len(reports) and stub.stats['messages']:
+                raise SystemExit(f"❌ Sent before the week was complete ({n}/{len(reports)} reports)")
+
+        bundles = bundle_files(stub)
+        if stub.stats['messages'] != 1 or len(bundles) != 1:
+            raise SystemExit(f"❌ Expected one email with the bundle, got {stub.stats['messages']} "
+                             f"email(s) with {len(bundles)} attachment(s)")
+        if len([name for name in bundles[0] if name.endswith('.xlsx')]) < len(reports):
+            raise SystemExit(f"❌ Bundle is missing reports: {bundles[0]}")
+
+        sent, downloaded = stub.stats['messages'], len(downloads)
+        for label, polled in (('poll again', daemon), ('restarted daemon', new_daemon())):
+            if poll(polled, label) or len(downloads) != downloaded or stub.stats['messages'] != sent:
+                raise SystemExit(f"❌ {label}: downloaded or sent again after the week was assembled")
+    print(f"✅ Each report processed on arrival, one bundle ({len(bundles[0])} files) sent, re-polls do nothing")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+# ==================================================================================================
+#                                         BENCHMARK: XLSX SHEET WRITER
+# ==================================================================================================
+"""Wall time of ``render_xlsx`` vs ``DataFrame.to_excel``, and a cell-by-cell equality check.
+
+The cleaned synthetic reports are rendered both ways, plus an edge-case copy
+shaped like an XLSX-sourced report: a datetime ``Date`` column, ``NaT``, and
+``NaN``/``inf``/``-inf`` in the metrics. Both workbooks are read back with
+openpyxl; every cell's value, number format and type must match.
+
+    python benchmarks/bench_export.py --rows 20000
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bluestars_report.campaign_memo import CampaignMemo, CampaignResolver
+from bluestars_report.export import render_xlsx
+from synthetic_reports import load_pipeline, make_report_set, use_catalog_snapshot, write_catalog_snapshot
+
+
+def cleaned_reports(rows, skus, seed):
+    pipeline = load_pipeline()
+    reports, catalog = make_report_set(rows, skus, seed)
+    use_catalog_snapshot(pipeline, write_catalog_snapshot(catalog, tempfile.mkdtemp(prefix='bench-export-')))
+    pipeline.campaign_resolver = CampaignResolver(CampaignMemo(':memory:'), pipeline.get_campaign_classifier())
+    parsed = {name: pipeline.parse_report_content(payload, None, name) for name, payload in reports.items()}
+    return {name: pipeline.export_frame(df) for name, df in pipeline.transform_reports(parsed)[0].items()}
+
+
+def edge_cases(df, seed):
+    """``df`` with datetime dates, NaT and non-finite metrics."""
+    rng = np.random.default_rng(seed)
+    df = df.copy()
+    df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+    df.loc[df.index[::50], 'Date'] = pd.NaT
+    spend = df['Spend'].astype(float)
+    for value in (np.nan, np.inf, -np.inf):
+        spend[rng.random(len(df)) < 0.01] = value
+    df['Spend'] = spend
+    return df
+
+
+def to_excel(df):
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False, engine='xlsxwriter')
+    return buffer.getvalue()
+
+
+def cells(payload):
+    worksheet = openpyxl.load_workbook(io.BytesIO(payload), read_only=True).active
+    return [[(cell.value, cell.number_format, cell.data_type) for cell in row] for row in worksheet.iter_rows()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000, help='rows per report')
+    parser.add_argument('--skus', type=int, default=3000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    frames = cleaned_reports(args.rows, args.skus, args.seed)
+    first = next(iter(frames))
+    frames[f"{first} (datetime, NaN/inf)"] = edge_cases(frames[first], args.seed)
+
+    print(f"{'report':<28} {'to_excel':>9} {'render_xlsx':>12}")
+    for name, df in frames.items():
+        start = time.perf_counter()
+        expected = to_excel(df)
+        pandas_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        rendered = render_xlsx(df)
+        writer_seconds = time.perf_counter() - start
+        if cells(rendered) != cells(expected):
+            raise SystemExit(f"❌ {name}: render_xlsx differs from to_excel")
+        print(f"{name:<28} {pandas_seconds:8.2f}s {writer_seconds:11.2f}s")
+    print("✅ Every cell (value, number format, type) identical to to_excel")
+
+
+if __name__ == '__main__':
+    main()
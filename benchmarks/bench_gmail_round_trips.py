@@ -0,0 +1,234 @@
+# ==================================================================================================
+#                                         BENCHMARK: GMAIL ROUND TRIPS
+# ==================================================================================================
+"""Count Gmail API round trips: per-subject list/get loop vs ``GmailReportFetcher``.
+
+Runs against an in-memory stand-in for the discovery client, with a fixed
+latency per HTTP request, so no credentials are needed. The incremental sync
+is measured on a first run, a same-week rerun and a run after new mail
+(reports plus unrelated messages) arrived; a report received after the
+``before`` bound must not be picked. Requests that fail inside a batch with
+429/5xx must be re-sent, and a permanent error must raise, never a partial map.
+
+    python benchmarks/bench_gmail_round_trips.py --messages-per-subject 3 --latency 0.05
+"""
+import argparse
+import base64
+import datetime
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bluestars_report.gmail_reports import GmailReportFetcher, MessageFetchError
+from bluestars_report.gmail_sync import GmailSyncState, IncrementalReportSync
+
+SUBJECTS = {
+    "Weekly BlueStars US Sponsored Products Campaign report": "BS_US_SP_link",
+    "Weekly BlueStars US Sponsored Brands Campaign report": "BS_US_SB_link",
+    "Weekly BlueStars US Sponsored Display Campaign report": "BS_US_SD_link",
+    "Weekly BlueStars CA Sponsored Products Campaign report": "BS_CA_SP_link",
+    "Weekly BlueStars CA Sponsored Brands Campaign report": "BS_CA_SB_link",
+    "Weekly BlueStars CA Sponsored Display Campaign report": "BS_CA_SD_link"
+}
+# Search window end, as the script passes it (today): mail from today on is outside the window
+BEFORE = datetime.date.today()
+
+
+class _Request:
+    def __init__(self, client, fn):
+        self.client = client
+        self.fn = fn
+
+    def execute(self):
+        self.client.http_requests += 1
+        time.sleep(self.client.latency)
+        return self.fn()
+
+
+class _HttpError(Exception):
+    """Shaped like googleapiclient's HttpError: the status sits on ``resp``."""
+
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.resp = type('Response', (), {'status': status})()
+
+
+class _Batch:
+    def __init__(self, client, callback):
+        self.client = client
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        self.client.http_requests += 1
+        time.sleep(self.client.latency)
+        for request_id, request in self.requests:
+            status = self.client.batch_errors.get(request_id)
+            if status is None:
+                self.callback(request_id, request.fn(), None)
+                continue
+            if status != 404:
+                del self.client.batch_errors[request_id]  # transient: the next attempt succeeds
+            self.callback(request_id, None, _HttpError(status))
+
+
+class FakeGmailService:
+    """Just enough of ``build('gmail', 'v1')`` for the report lookups."""
+
+    def __init__(self, messages_per_subject, latency):
+        self.latency = latency
+        self.http_requests = 0
+        self.history_id = 1000
+        self.batch_errors = {}  # message id -> status the next batch answers for it
+        self._store = {}
+        self._history = []  # (historyId, message id)
+        for n in range(messages_per_subject):
+            for subject, key in SUBJECTS.items():
+                self.deliver(f"{key}-{n}", subject, f"https://advertising.amazon.com/{key}/{n}")
+
+    def deliver(self, message_id, subject, link=None, sender='Amazon Ads <noreply@amazon.com>', internal_date=None):
+        html = f'<html><body><a href="{link}">Download</a></body></html>' if link else '<html></html>'
+        self.history_id += 1
+        self._history.append((self.history_id, message_id))
+        self._store[message_id] = {
+            'id': message_id,
+            'internalDate': str(internal_date or 1_700_000_000_000 + self.history_id * 1000),
+            'payload': {
+                'headers': [{'name': 'Subject', 'value': subject}, {'name': 'From', 'value': sender}],
+                'parts': [
+                    {'mimeType': 'text/plain', 'body': {'data': ''}},
+                    {'mimeType': 'text/html', 'body': {'data': base64.urlsafe_b64encode(html.encode()).decode()}},
+                ],
+            },
+        }
+
+    def users(self):
+        return self
+
+    def messages(self):
+        return self
+
+    def history(self):
+        return _History(self)
+
+    def getProfile(self, userId, **kwargs):
+        return _Request(self, lambda: {'historyId': str(self.history_id)})
+
+    def list(self, userId, q, maxResults, **kwargs):
+        ids = [message_id for message_id, message in self._store.items()
+               if f'"{message["payload"]["headers"][0]["value"]}"' in q]
+        return _Request(self, lambda: {'messages': [{'id': message_id} for message_id in ids[:maxResults]]})
+
+    def get(self, userId, id, format, **kwargs):
+        return _Request(self, lambda: self._store[id])
+
+    def new_batch_http_request(self, callback):
+        return _Batch(self, callback)
+
+
+class _History:
+    def __init__(self, client):
+        self.client = client
+
+    def list(self, userId, startHistoryId, **kwargs):
+        added = [{'messagesAdded': [{'message': {'id': message_id}}]}
+                 for history_id, message_id in self.client._history if history_id > int(startHistoryId)]
+        return _Request(self.client, lambda: {'history': added, 'historyId': str(self.client.history_id)})
+
+
+def extract_links(html):
+    start = html.index('href="') + len('href="')
+    return [html[start:html.index('"', start)]]
+
+
+def serial_fetch(service, max_results=10):
+    """The original get_filtered_emails loop."""
+    links = {key: None for key in SUBJECTS.values()}
+    for subject, link_var in SUBJECTS.items():
+        query = f'(from:noreply@amazon.com OR from:no-reply@amazon.com) subject:"{subject}" after:0 before:0'
+        messages = service.users().messages().list(userId='me', q=query, maxResults=max_results).execute().get('messages', [])
+        for msg in messages:
+            message = service.users().messages().get(userId='me', id=msg['id'], format='full').execute()
+            for part in message['payload']['parts']:
+                if part['mimeType'] == 'text/html':
+                    html = base64.urlsafe_b64decode(part['body']['data']).decode('utf-8')
+                    links[link_var] = extract_links(html)[0]
+    return links
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages-per-subject', type=int, default=3)
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds per HTTP round trip')
+    args = parser.parse_args()
+
+    service = FakeGmailService(args.messages_per_subject, args.latency)
+    start = time.perf_counter()
+    expected = serial_fetch(service)
+    serial_seconds = time.perf_counter() - start
+    serial_trips = service.http_requests
+
+    service = FakeGmailService(args.messages_per_subject, args.latency)
+    fetcher = GmailReportFetcher(service, extract_links)
+    start = time.perf_counter()
+    actual = fetcher.fetch_links(SUBJECTS, 0, 0)
+    batched_seconds = time.perf_counter() - start
+
+    if actual != expected:
+        raise SystemExit(f"❌ Link mapping differs:\n{expected}\n{actual}")
+
+    # Rate limits / 5xx inside a batch are retried; a permanent error raises
+    flaky_service = FakeGmailService(args.messages_per_subject, args.latency)
+    flaky_service.batch_errors = {'BS_US_SB_link-0': 429, 'BS_CA_SD_link-0': 503}
+    retrying = GmailReportFetcher(flaky_service, extract_links, backoff_base=0)
+    if retrying.fetch_links(SUBJECTS, 0, 0) != expected:
+        raise SystemExit("❌ Link mapping differs after retrying failed batch requests")
+    flaky_service.batch_errors = {'BS_US_SB_link-0': 404}
+    try:
+        GmailReportFetcher(flaky_service, extract_links, backoff_base=0).fetch_links(SUBJECTS, 0, 0)
+    except MessageFetchError:
+        pass
+    else:
+        raise SystemExit("❌ A message that could not be fetched was silently dropped")
+
+    print(f"serial  : {serial_trips:4d} round trips {serial_seconds:7.3f}s")
+    print(f"batched : {fetcher.round_trips:4d} round trips {batched_seconds:7.3f}s "
+          f"(client saw {service.http_requests})")
+    print(f"retried : {retrying.round_trips:4d} round trips (429 + 503 inside the first batch)")
+
+    # Incremental sync: first run, same-week rerun, then a run after new mail
+    service = FakeGmailService(args.messages_per_subject, args.latency)
+    state = GmailSyncState(':memory:')
+
+    def incremental_run(label):
+        fetcher = GmailReportFetcher(service, extract_links)
+        start = time.perf_counter()
+        links = IncrementalReportSync(fetcher, state).sync_links(SUBJECTS, 0, BEFORE)
+        print(f"{label:<16}: {fetcher.round_trips:4d} round trips {time.perf_counter() - start:7.3f}s")
+        return links
+
+    if incremental_run("sync first run") != expected:
+        raise SystemExit("❌ Incremental sync picked different links")
+    incremental_run("sync rerun")
+    for n in range(20):
+        service.deliver(f"other-{n}", f"Newsletter {n}", sender='news@example.com')
+    service.deliver("BS_US_SP_link-new", "Weekly BlueStars US Sponsored Products Campaign report",
+                    "https://advertising.amazon.com/BS_US_SP_link/new")
+    links = incremental_run("sync new mail")
+    if links['BS_US_SP_link'] != "https://advertising.amazon.com/BS_US_SP_link/new":
+        raise SystemExit("❌ Newest report was not picked")
+    tomorrow = datetime.datetime.combine(BEFORE + datetime.timedelta(days=1), datetime.time(9))
+    service.deliver("BS_US_SP_link-late", "Weekly BlueStars US Sponsored Products Campaign report",
+                    "https://advertising.amazon.com/BS_US_SP_link/late", internal_date=int(tomorrow.timestamp() * 1000))
+    links = incremental_run("sync late mail")
+    if links['BS_US_SP_link'] != "https://advertising.amazon.com/BS_US_SP_link/new":
+        raise SystemExit("❌ A report received after the before: bound was picked")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+# ==================================================================================================
+#                                         BENCHMARK: HISTORY STORE QUERIES
+# ==================================================================================================
+"""Filtered ``HistoryStore.query``/``rollup`` vs reading the whole store and filtering in pandas.
+
+Several synthetic weeks (cleaned and combined by the pipeline, dates shifted
+week by week) are archived, then one week is written again: the store must
+hold the same rows afterwards. Each filter (date range, market, SKU, campaign
+form, and all of them with a week) is timed as a pushed-down ``query`` and a
+``rollup`` by week/market, against a full read filtered in pandas; both
+results must equal the pandas ones.
+
+    python benchmarks/bench_history_store.py --weeks 8 --rows 20000
+"""
+import argparse
+import datetime
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bluestars_report.campaign_memo import CampaignMemo, CampaignResolver
+from bluestars_report.history_store import METRICS, HistoryStore
+from synthetic_reports import load_pipeline, make_report_set, use_catalog_snapshot, write_catalog_snapshot
+
+# Synthetic reports cover the week of Sunday 2025-01-05
+FIRST_WEEK = datetime.date(2025, 1, 5)
+ROLLUP_BY = ['week', 'market']
+
+
+def combined_weeks(weeks, rows, skus):
+    """``{week: df_combined}``: a different report set per week, dates moved into that week."""
+    pipeline = load_pipeline()
+    frames = {}
+    for n in range(weeks):
+        reports, catalog = make_report_set(rows, skus, seed=n)
+        use_catalog_snapshot(pipeline, write_catalog_snapshot(catalog, tempfile.mkdtemp(prefix='bench-history-')))
+        pipeline.campaign_resolver = CampaignResolver(CampaignMemo(':memory:'), pipeline.get_campaign_classifier())
+        parsed = {name: pipeline.parse_report_content(payload, None, name) for name, payload in reports.items()}
+        df_combined = pipeline.combine_reports(pipeline.transform_reports(parsed)[0])
+        shifted = pd.to_datetime(df_combined['Date'], format='%b %d, %Y') + pd.Timedelta(weeks=n)
+        df_combined['Date'] = shifted.dt.strftime('%b %d, %Y')
+        frames[(FIRST_WEEK + datetime.timedelta(weeks=n)).isoformat()] = df_combined
+    return frames
+
+
+def pandas_filter(full, weeks=None, start_date=None, end_date=None, markets=None, skus=None, campaign_forms=None):
+    """The same filters as ``HistoryStore._filter``, applied to a full read."""
+    mask = pd.Series(True, index=full.index)
+    if weeks is not None:
+        mask &= full['week'].isin(weeks)
+    if start_date is not None:
+        mask &= full['Report Date'] >= start_date
+    if end_date is not None:
+        mask &= full['Report Date'] <= end_date
+    if markets is not None:
+        mask &= full['market'].isin(markets)
+    if skus is not None:
+        mask &= full['SKU'].isin(skus)
+    if campaign_forms is not None:
+        mask &= full['Campaign Form'].isin(campaign_forms)
+    return full[mask]
+
+
+def sorted_rows(df):
+    return df.sort_values(list(df.columns), na_position='last').reset_index(drop=True)
+
+
+def pandas_rollup(df):
+    return df.groupby(ROLLUP_BY)[METRICS].sum().reset_index().sort_values(ROLLUP_BY).reset_index(drop=True)
+
+
+def median_ms(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return result, statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--weeks', type=int, default=8)
+    parser.add_argument('--rows', type=int, default=20000, help='rows per report')
+    parser.add_argument('--skus', type=int, default=3000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    frames = combined_weeks(args.weeks, args.rows, args.skus)
+    store = HistoryStore(tempfile.mkdtemp(prefix='bench-history-store-'))
+    start = time.perf_counter()
+    for week, df_combined in frames.items():
+        store.write_week(week, df_combined)
+    print(f"archived {len(frames)} weeks, {sum(len(df) for df in frames.values()):,} rows "
+          f"in {time.perf_counter() - start:.2f}s")
+
+    # Writing a week again replaces it: same rows, nothing doubled
+    weeks = store.weeks()
+    rewritten = weeks[len(weeks) // 2]
+    before = sorted_rows(store.query(weeks=[rewritten]))
+    store.write_week(rewritten, frames[rewritten])
+    store.write_week(rewritten, frames[rewritten])
+    total = len(store.query(columns=['week']))
+    if total != sum(len(df) for df in frames.values()):
+        raise SystemExit(f"❌ Rewriting week {rewritten} changed the store size to {total:,} rows")
+    pd.testing.assert_frame_equal(sorted_rows(store.query(weeks=[rewritten])), before)
+    print(f"rewrote week {rewritten} twice: {total:,} rows, week unchanged")
+
+    full, full_ms = median_ms(store.query, args.repeat)
+    sample_skus = sorted(full['SKU'].dropna().unique())[:5]
+    last_weeks = weeks[-2:]
+    filters = [
+        ('date range', {'start_date': datetime.date.fromisoformat(last_weeks[0]),
+                        'end_date': datetime.date.fromisoformat(last_weeks[-1]) + datetime.timedelta(days=6)}),
+        ('market', {'markets': ['Canada']}),
+        ('SKU', {'skus': sample_skus}),
+        ('campaign form', {'campaign_forms': ['SP Exact', 'SB Video Broad']}),
+        ('week+market+SKU+form', {'weeks': last_weeks, 'markets': ['United States'], 'skus': sample_skus,
+                                  'campaign_forms': ['SP Exact', 'SP Broad', 'SP PT']}),
+    ]
+
+    print(f"{'filter':<22} {'rows':>9} {'query':>9} {'rollup':>9} {'full read + pandas':>19}")
+    print(f"{'(none)':<22} {len(full):>9,} {full_ms:7.1f}ms")
+    for label, kwargs in filters:
+        rows, query_ms = median_ms(lambda: store.query(**kwargs), args.repeat)
+        rollup, rollup_ms = median_ms(lambda: store.rollup(ROLLUP_BY, **kwargs), args.repeat)
+        expected, pandas_ms = median_ms(lambda: pandas_filter(store.query(), **kwargs), args.repeat)
+        if rows.empty:
+            raise SystemExit(f"❌ {label}: the filter matches nothing, pick another value")
+        try:
+            pd.testing.assert_frame_equal(sorted_rows(rows), sorted_rows(expected))
+            pd.testing.assert_frame_equal(rollup, pandas_rollup(expected), check_exact=False)
+        except AssertionError as e:
+            raise SystemExit(f"❌ {label}: pushed-down result differs from the pandas filter\n{e}")
+        print(f"{label:<22} {len(rows):>9,} {query_ms:7.1f}ms {rollup_ms:7.1f}ms {pandas_ms:17.1f}ms")
+    print("✅ Filtered query and rollup equal the pandas filter; rewriting a week is idempotent")
+
+
+if __name__ == '__main__':
+    main()
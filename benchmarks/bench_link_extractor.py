@@ -0,0 +1,105 @@
+# ==================================================================================================
+#                                         BENCHMARK: REPORT LINK EXTRACTION
+# ==================================================================================================
+"""Compare BeautifulSoup (full parse, every link) with ``ReportLinkExtractor`` on report emails.
+
+The generated email mimics an Amazon Ads notification: logo and navigation
+links first, nested layout tables with inline styles, the report download link
+in the middle and a footer full of help / unsubscribe / privacy links.
+
+    python benchmarks/bench_link_extractor.py --emails 200 --size-kb 45
+"""
+import argparse
+import base64
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bluestars_report.gmail_reports import decode_body
+from bluestars_report.link_extractor import ReportLinkExtractor
+
+STYLE = "font-family:Arial,Helvetica,sans-serif;font-size:14px;line-height:20px;color:#232f3e;padding:8px 12px"
+
+
+def _row(rng):
+    cells = ''.join(f'<td style="{STYLE}" width="{rng.randint(60, 200)}">'
+                    f'<span style="color:#565959">Metric {rng.randint(1, 999)}</span></td>' for _ in range(4))
+    return f'<tr>{cells}</tr>'
+
+
+def make_email(rng, size_kb):
+    report_id = rng.randint(10**9, 10**10)
+    header = (
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><style>td{padding:0}</style></head><body>'
+        '<table role="presentation" width="100%"><tr><td>'
+        '<a href="https://advertising.amazon.com/?ref_=email_logo"><img src="https://m.media-amazon.com/logo.png"></a>'
+        '<a href="https://advertising.amazon.com/cm/campaigns?ref_=email_nav">Campaign manager</a>'
+        '<a href="https://advertising.amazon.com/help?ref_=email_nav">Help</a>'
+        '</td></tr></table>'
+    )
+    report = (
+        f'<p style="{STYLE}">Your scheduled report is ready.</p>'
+        f'<a style="{STYLE}" href="https://advertising.amazon.com/reports/download/{report_id}'
+        f'?format=csv&amp;ref_=email_report">Download report</a>'
+    )
+    footer = (
+        '<table role="presentation"><tr><td>'
+        '<a href="https://advertising.amazon.com/unsubscribe?reportId=1&amp;ref_=email_footer">Unsubscribe</a>'
+        '<a href="https://www.amazon.com/privacy">Privacy Notice</a>'
+        '<a href="https://advertising.amazon.com/contact-us">Contact us</a>'
+        '</td></tr></table></body></html>'
+    )
+    half = size_kb * 512
+    top, bottom = ['<table>'], ['<table>']
+    while sum(map(len, top)) < half:
+        top.append(_row(rng))
+    while sum(map(len, bottom)) < half:
+        bottom.append(_row(rng))
+    html = header + ''.join(top) + '</table>' + report + ''.join(bottom) + '</table>' + footer
+    # Gmail trả body dạng base64url, không padding
+    return base64.urlsafe_b64encode(html.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def soup_links(html_content):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html_content, 'html.parser')
+    return [link['href'] for link in soup.find_all('a', href=True)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--emails', type=int, default=200)
+    parser.add_argument('--size-kb', type=int, default=45)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    bodies = [make_email(rng, args.size_kb) for _ in range(args.emails)]
+    extractor = ReportLinkExtractor()
+
+    start = time.perf_counter()
+    found = [extractor.extract(decode_body(body)) for body in bodies]
+    extractor_seconds = time.perf_counter() - start
+
+    bad = [links for links in found if not links or '/reports/download/' not in links[0]]
+    if bad:
+        raise SystemExit(f"❌ ReportLinkExtractor missed the report link in {len(bad)} emails: {bad[0]}")
+
+    print(f"emails={args.emails} size≈{len(decode_body(bodies[0])) / 1024:.0f} KB")
+    print(f"extractor    : {extractor_seconds:8.3f}s")
+    try:
+        start = time.perf_counter()
+        soup = [soup_links(decode_body(body)) for body in bodies]
+        soup_seconds = time.perf_counter() - start
+    except ImportError:
+        print("beautifulsoup4 not installed, skipping the baseline")
+        return
+    print(f"beautifulsoup: {soup_seconds:8.3f}s (first link = {soup[0][0]})")
+    print(f"speedup      : {soup_seconds / extractor_seconds:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+# ==================================================================================================
+#                                         BENCHMARK: STREAMING MAILER
+# ==================================================================================================
+"""Peak memory, wall time and SMTP connections of the original send path vs ``Mailer``.
+
+Both paths send the same two emails of a run (missing-SKU alert without
+attachment, then the report bundle) to ``smtp_stub.SMTPStub`` on localhost.
+The original path builds the whole message in memory (``read()``, base64 in
+place, ``as_string()``) and opens + logs in one connection per email;
+``Mailer`` streams the attachment from disk over one connection and splits
+it into numbered parts over ``--max-mb``. The attachments received by the stub
+(parts joined back in order) must equal the bundle byte for byte.
+
+    python benchmarks/bench_mailer.py --mb 40 --max-mb 18
+"""
+import argparse
+import email
+import os
+import smtplib
+import sys
+import tempfile
+import time
+import tracemalloc
+from email import encoders
+from email.mime.base import MIMEBase
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bluestars_report.mailer import Mailer
+from smtp_stub import SMTPStub
+
+SENDER = 'reports@example.com'
+RECIPIENTS = ['a@example.com', 'b@example.com', 'c@example.com']
+EMAILS = [
+    ('MISSING SKU FOR MULTIPLE BRANDS', 'Các brands sau có campaigns chưa được cập nhật SKU:\n\n- Brand X', False),
+    ('Marketing Weekly Data Report', 'Marketing Weekly Data Report', True),
+]
+
+
+def legacy_send(connect, subject, body, attachment_path=None):
+    """``send_email_with_attachment`` before the streaming mailer."""
+    msg = MIMEMultipart()
+    msg['From'] = SENDER
+    msg['To'] = ", ".join(RECIPIENTS)
+    msg['Subject'] = subject
+    msg.attach(MIMEText(body, 'plain'))
+    if attachment_path:
+        with open(attachment_path, 'rb') as attachment:
+            part = MIMEBase('application', 'octet-stream')
+            part.set_payload(attachment.read())
+        encoders.encode_base64(part)
+        part.add_header('Content-Disposition', f'attachment; filename={os.path.basename(attachment_path)}')
+        msg.attach(part)
+    with connect() as server:
+        server.login(SENDER, 'password')
+        server.sendmail(SENDER, RECIPIENTS, msg.as_string())
+
+
+def run(mode, bundle, max_bytes, work_dir):
+    with SMTPStub(os.path.join(work_dir, mode)) as stub:
+        def connect():
+            return smtplib.SMTP(stub.host, stub.port)
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        if mode == 'original':
+            for subject, body, attach in EMAILS:
+                legacy_send(connect, subject, body, bundle if attach else None)
+        else:
+            with Mailer(connect, SENDER, 'password', max_attachment_bytes=max_bytes) as mailer:
+                for subject, body, attach in EMAILS:
+                    mailer.send(RECIPIENTS, subject, body, bundle if attach else None)
+        seconds = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return seconds, peak, stub
+
+
+def received_attachment(stub):
+    """The attachment bytes received by ``stub``, numbered parts joined in order."""
+    parts = []
+    for message in stub.messages:
+        with open(message['path'], 'rb') as f:
+            msg = email.message_from_binary_file(f)
+        for part in msg.walk():
+            if part.get_filename():
+                parts.append((part.get_filename(), part.get_payload(decode=True)))
+    return b''.join(payload for _, payload in sorted(parts)), [name for name, _ in sorted(parts)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mb', type=float, default=40, help='size of the report bundle')
+    parser.add_argument('--max-mb', type=float, default=18, help='EMAIL_MAX_ATTACHMENT_MB for the mailer')
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='bench-mailer-')
+    bundle = os.path.join(work_dir, 'Weekly Marketing Data.zip')
+    with open(bundle, 'wb') as f:
+        # Zipped xlsx barely compresses: random bytes are the honest stand-in
+        f.write(os.urandom(int(args.mb * 2**20)))
+    with open(bundle, 'rb') as f:
+        expected = f.read()
+
+    print(f"bundle={args.mb:.0f} MB  limit={args.max_mb:.0f} MB  emails={len(EMAILS)}")
+    for mode in ('original', 'mailer'):
+        max_bytes = int(args.max_mb * 2**20) if mode == 'mailer' else None
+        seconds, peak, stub = run(mode, bundle, max_bytes, work_dir)
+        attachment, names = received_attachment(stub)
+        if attachment != expected:
+            raise SystemExit(f"❌ {mode}: received attachment differs from the bundle")
+        print(f"{mode:<8}: {seconds:6.2f}s  peak {peak / 2**20:7.1f} MB  connections {stub.stats['connections']}  "
+              f"logins {stub.stats['logins']}  emails {stub.stats['messages']}  attachments {names}")
+    print("✅ Attachments identical to the bundle")
+
+
+if __name__ == '__main__':
+    main()
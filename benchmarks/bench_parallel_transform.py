@@ -0,0 +1,82 @@
+# ==================================================================================================
+#                                         BENCHMARK: PARALLEL TRANSFORM SCALING
+# ==================================================================================================
+"""Wall time of ``process_reports`` for 1..N workers on a batch of synthetic reports.
+
+The six weekly reports are parsed and resolved once (``resolve_campaigns``, as
+``transform_reports`` does) and repeated ``--copies`` times to stand in for more
+accounts. Each worker count runs the same jobs twice: with the fork-inherited
+jobs and Arrow results (default on Linux) and with the pickled jobs / pickled
+frames of a spawn pool. Every result must equal the sequential one.
+
+    python benchmarks/bench_parallel_transform.py --rows 50000 --copies 4 --workers 1 2 4 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bluestars_report import transform
+from bluestars_report.campaign_memo import CampaignMemo, CampaignResolver
+from synthetic_reports import load_pipeline, make_report_set, use_catalog_snapshot, write_catalog_snapshot
+
+
+def build_jobs(pipeline, reports, copies):
+    pipeline.campaign_resolver = CampaignResolver(CampaignMemo(':memory:'), pipeline.get_campaign_classifier())
+    parsed = {name: pipeline.parse_report_content(payload, None, name) for name, payload in reports.items()}
+    resolved = {name: pipeline.resolve_campaigns(df['Campaign Name'], name) for name, df in parsed.items()}
+    return [(f"{name}#{copy}", df, pipeline.report_registry[name], resolved[name])
+            for copy in range(copies) for name, df in parsed.items()]
+
+
+def run(jobs, workers, fork):
+    fork_context = transform._fork_context
+    if not fork:
+        transform._fork_context = lambda: None
+    # process_report cleans in place when it runs inline, so every run gets its own frames
+    jobs = [(key, df.copy(), report, resolutions) for key, df, report, resolutions in jobs]
+    try:
+        start = time.perf_counter()
+        results = dict(transform.process_reports(jobs, workers))
+        return time.perf_counter() - start, results
+    finally:
+        transform._fork_context = fork_context
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=50000, help='rows per report')
+    parser.add_argument('--copies', type=int, default=4, help='copies of the six reports')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--skus', type=int, default=3000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench-parallel-')
+    reports, catalog = make_report_set(args.rows, args.skus, args.seed)
+    pipeline = use_catalog_snapshot(load_pipeline(), write_catalog_snapshot(catalog, os.path.join(workdir, 'catalog')))
+    jobs = build_jobs(pipeline, reports, args.copies)
+
+    sequential, expected = run(jobs, 1, fork=True)
+    print(f"reports={len(jobs)} rows/report={args.rows:,} cpus={os.cpu_count()}")
+    print(f"workers= 1            : {sequential:8.2f}s")
+    for workers in args.workers:
+        if workers <= 1:
+            continue
+        for fork in (True, False):
+            seconds, results = run(jobs, workers, fork)
+            for key, df in expected.items():
+                pd.testing.assert_frame_equal(results[key], df)
+            mode = 'fork + arrow' if fork else 'pickle'
+            print(f"workers={workers:>2} {mode:<12}: {seconds:8.2f}s  speedup {sequential / seconds:5.2f}x")
+    print("✅ Parallel results identical to the sequential run")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+# ==================================================================================================
+#                                         BENCHMARK: TRANSFORMATION PIPELINE
+# ==================================================================================================
+"""Time and memory-profile each transformation stage on synthetic reports.
+
+Stages: parse (bytes -> DataFrame), process (``transform_reports``: ``process_dataframe``
+x6 over the process pool; tracemalloc only sees the parent), combine
+(concat/strip/fillna into ``df_combined``) and export (zip of six workbooks).
+Each size is run once for timing and once under tracemalloc for peak memory.
+
+    python benchmarks/bench_pipeline.py --rows 10000 100000 --save-baseline
+    python benchmarks/bench_pipeline.py --rows 10000 100000 --compare
+
+``--compare`` exits non-zero when a stage got slower than the stored baseline by
+more than ``--tolerance``.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bluestars_report.campaign_memo import CampaignMemo, CampaignResolver
+from synthetic_reports import load_pipeline, make_report_set, use_catalog_snapshot, write_catalog_snapshot
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results', 'baseline.json')
+
+
+def run_stages(pipeline, reports, workdir, measure_memory=False):
+    """Run every stage once; returns {stage: {'seconds': ..., 'peak_mb': ...}}."""
+    results = {}
+    # Cold campaign memo on every pass, so both passes resolve every name
+    pipeline.campaign_resolver = CampaignResolver(CampaignMemo(':memory:'), pipeline.get_campaign_classifier())
+
+    def measure(stage, fn):
+        if measure_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        value = fn()
+        seconds = time.perf_counter() - start
+        results[stage] = {'seconds': round(seconds, 4)}
+        if measure_memory:
+            results[stage]['peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+            tracemalloc.stop()
+        return value
+
+    parsed = measure('parse', lambda: {name: pipeline.parse_report_content(payload, None, name)
+                                       for name, payload in reports.items()})
+    cleaned = measure('process', lambda: pipeline.transform_reports(parsed)[0])
+    measure('combine', lambda: pipeline.combine_reports(cleaned))
+    measure('export', lambda: pipeline.export_zip(cleaned, os.path.join(workdir, 'bench.zip')))
+    return results
+
+
+def benchmark(rows_list, n_skus, seed):
+    workdir = tempfile.mkdtemp(prefix='bench-pipeline-')
+    pipeline = load_pipeline()
+    results = {}
+    for rows in rows_list:
+        reports, catalog = make_report_set(rows, n_skus, seed)
+        use_catalog_snapshot(pipeline, write_catalog_snapshot(catalog, os.path.join(workdir, f"catalog-{rows}")))
+
+        timing = run_stages(pipeline, reports, workdir)
+        memory = run_stages(pipeline, reports, workdir, measure_memory=True)
+        results[str(rows)] = {stage: {**timing[stage], 'peak_mb': memory[stage]['peak_mb']} for stage in timing}
+        for stage, values in results[str(rows)].items():
+            print(f"rows={rows:>9,} {stage:<8} {values['seconds']:9.3f}s  peak {values['peak_mb']:9.1f} MB")
+    return results
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for rows, stages in results.items():
+        for stage, values in stages.items():
+            reference = baseline.get('results', {}).get(rows, {}).get(stage)
+            if not reference:
+                continue
+            if values['seconds'] > reference['seconds'] * (1 + tolerance):
+                regressions.append(f"rows={rows} {stage}: {values['seconds']:.3f}s vs baseline {reference['seconds']:.3f}s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000], help='rows per report')
+    parser.add_argument('--skus', type=int, default=3000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--compare', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown, 0.25 = +25%%')
+    args = parser.parse_args()
+
+    results = benchmark(args.rows, args.skus, args.seed)
+    report = {
+        'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'machine': {'python': platform.python_version(), 'pandas': pd.__version__,
+                    'platform': platform.platform(), 'cpus': os.cpu_count()},
+        'skus': args.skus,
+        'results': results,
+    }
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+
+    if args.compare:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            raise SystemExit("❌ Regressions:\n" + "\n".join(regressions))
+        print("✅ No regression against the baseline")
+
+
+if __name__ == '__main__':
+    main()
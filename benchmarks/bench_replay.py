@@ -0,0 +1,138 @@
+# ==================================================================================================
+#                                         BENCHMARK: OFFLINE REPLAY
+# ==================================================================================================
+"""Time full pipeline runs replayed from a fixture bundle (``--replay``), stage by stage.
+
+Without ``--bundle`` a synthetic bundle is recorded first: the script runs with
+``--record`` against in-process stand-ins (a Gmail client holding one email
+per report, report host and published catalog sheet serving synthetic data,
+an SMTP server that accepts everything), so no account is needed. Each replay
+runs the real script in its own process with its own metrics file; the median
+seconds of every stage are printed.
+
+    python benchmarks/bench_replay.py --rows 20000 --runs 5
+    python benchmarks/bench_replay.py --bundle fixtures/2025-w02 --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_reports import SCRIPT_PATH, catalog_sheet_html, load_pipeline, make_report_set
+
+
+class _FakeSession(requests.Session):
+    """Serves ``{url: bytes}`` instead of the network."""
+
+    def __init__(self, pages):
+        super().__init__()
+        self.pages = pages
+
+    def get(self, url, **kwargs):
+        response = requests.Response()
+        response.url = url
+        response.status_code = 200 if url in self.pages else 404
+        response.headers['Content-Type'] = 'text/csv' if url.endswith('.csv') else 'text/html; charset=utf-8'
+        response.encoding = 'utf-8'
+        response._content = self.pages.get(url, b'')
+        response._content_consumed = True
+        return response
+
+
+class _FakeSMTP:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def login(self, user, password):
+        pass
+
+    def sendmail(self, from_addr, to_addrs, msg):
+        return {}
+
+    def quit(self):
+        pass
+
+
+def record_synthetic(bundle, rows, skus, seed):
+    """Child process: record ``bundle`` from synthetic reports served by in-process stand-ins."""
+    from bench_gmail_round_trips import FakeGmailService
+
+    pipeline = load_pipeline()
+    reports, catalog = make_report_set(rows, skus, seed, missing_sku_rate=0)
+    pages = {url: catalog_sheet_html(catalog).encode('utf-8') for url in pipeline.SKU_CATALOG_URLS.values()}
+    gmail = FakeGmailService(0, 0)
+    for subject, key in pipeline.report_registry.subjects().items():
+        link = f"https://advertising.amazon.com/reports/download/{key}.csv"
+        pages[link] = reports[key]
+        gmail.deliver(key, subject, link)
+        # Inside the window the run searches: after now - 5 days, before today
+        gmail._store[key]['internalDate'] = str(int((time.time() - 24 * 3600) * 1000))
+
+    pipeline.use_fixtures('record', bundle)
+    pipeline.authenticate_gmail = lambda: pipeline.fixtures.gmail_service(gmail)
+    pipeline.open_report_session = lambda links: pipeline.fixtures.http_session(_FakeSession(pages))
+    pipeline.catalog_cache.session = pipeline.fixtures.http_session(_FakeSession(pages))
+    pipeline.smtplib.SMTP_SSL = _FakeSMTP
+    try:
+        pipeline.run_pipeline()
+    finally:
+        pipeline.close_fixtures()
+
+
+def replay(bundle, work_dir):
+    """Run the script once with ``--replay``; returns ``{span: seconds}`` of the top-level spans."""
+    metrics = os.path.join(work_dir, f"metrics-{time.time_ns()}.jsonl")
+    subprocess.run([sys.executable, SCRIPT_PATH, '--replay', bundle, '--metrics', metrics],
+                   check=True, cwd=work_dir, stdout=subprocess.DEVNULL)
+    with open(metrics, 'r', encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    return {record['span']: record['seconds'] for record in records if record['parent'] in (None, 'run')}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bundle', help='fixture bundle written by --record (default: record a synthetic one)')
+    parser.add_argument('--rows', type=int, default=20000, help='rows per report of the synthetic bundle')
+    parser.add_argument('--skus', type=int, default=3000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--record-synthetic', metavar='BUNDLE', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.record_synthetic:
+        record_synthetic(args.record_synthetic, args.rows, args.skus, args.seed)
+        return
+
+    work_dir = tempfile.mkdtemp(prefix='bench-replay-')
+    bundle = args.bundle
+    if bundle is None:
+        bundle = os.path.join(work_dir, 'bundle')
+        subprocess.run([sys.executable, os.path.abspath(__file__), '--record-synthetic', bundle, '--rows', str(args.rows),
+                        '--skus', str(args.skus), '--seed', str(args.seed)],
+                       check=True, cwd=work_dir, stdout=subprocess.DEVNULL)
+        print(f"Recorded a synthetic bundle ({args.rows:,} rows/report) in {bundle}")
+
+    runs = [replay(bundle, work_dir) for _ in range(args.runs)]
+    print(f"{args.runs} replays of {bundle}")
+    for span in runs[0]:
+        seconds = [run[span] for run in runs if span in run]
+        print(f"{span:<12} median {statistics.median(seconds):8.3f}s  min {min(seconds):8.3f}s  max {max(seconds):8.3f}s")
+
+
+if __name__ == '__main__':
+    main()
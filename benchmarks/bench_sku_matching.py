@@ -0,0 +1,86 @@
+# ==================================================================================================
+#                                         BENCHMARK: SKU MATCHING
+# ==================================================================================================
+"""Compare ``SkuMatcher`` with the original per-row loop from ``process_dataframe``.
+
+    python benchmarks/bench_sku_matching.py --skus 3000 --rows 20000
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bluestars_report.sku_matching import SkuMatcher
+
+
+def make_catalog(n_skus, rng):
+    alphabet = string.ascii_uppercase + string.digits
+    return [''.join(rng.choices(alphabet, k=rng.randint(5, 10))) for _ in range(n_skus)]
+
+
+def make_campaign_names(catalog, n_rows, n_distinct, rng):
+    suffixes = ['SP Auto', 'SP Exact', 'Broad', 'PT', 'Video Ads Phrase', 'TOS', 'Research']
+    names = []
+    for _ in range(n_distinct):
+        if rng.random() < 0.9:
+            names.append(f"{rng.choice(catalog)} {rng.choice(suffixes)} {rng.randint(1, 99)}")
+        else:
+            names.append(f"Campaign with presets - {rng.randint(10**5, 10**6)}")
+    return pd.Series(rng.choices(names, k=n_rows))
+
+
+def loop_match(campaign_names, catalog):
+    product_skus = pd.Series(catalog)
+
+    def get_matching_sku(campaign_name):
+        for sku in product_skus:
+            if sku in campaign_name:
+                return sku
+        return None
+
+    return campaign_names.apply(get_matching_sku)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--skus', type=int, default=3000)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--distinct', type=int, default=2000, help='distinct campaign names')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    catalog = make_catalog(args.skus, rng)
+    names = make_campaign_names(catalog, args.rows, args.distinct, rng)
+
+    start = time.perf_counter()
+    expected = loop_match(names, catalog)
+    loop_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matcher = SkuMatcher(catalog)
+    build_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = matcher.match_series(names)
+    match_seconds = time.perf_counter() - start
+
+    mismatches = (expected.fillna('<None>') != actual.fillna('<None>')).sum()
+    if mismatches:
+        raise SystemExit(f"❌ SkuMatcher disagrees with the loop on {mismatches} rows")
+
+    print(f"SKUs={args.skus} rows={args.rows} distinct names={args.distinct}")
+    print(f"loop       : {loop_seconds:8.3f}s")
+    print(f"automaton  : {build_seconds + match_seconds:8.3f}s "
+          f"(build {build_seconds:.3f}s + match {match_seconds:.3f}s)")
+    print(f"speedup    : {loop_seconds / (build_seconds + match_seconds):8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+# ==================================================================================================
+#                                         BENCHMARK: SUBCOMMAND STARTUP
+# ==================================================================================================
+"""Import time (``python -X importtime``) of each subcommand vs importing every dependency up front.
+
+A synthetic week is prepared in a scratch directory: ``fetch_links`` and
+``download`` checkpoints from synthetic reports, an offline SKU catalog
+snapshot, and SMTP pointed at ``smtp_stub.SMTPStub``. Then ``transform``,
+``export`` and ``send`` run for real, each in a fresh interpreter with
+``-X importtime``, and must succeed. ``fetch-links`` has no Gmail credentials
+here: it stops at the first Gmail call, after its imports, which is what is
+measured. ``download`` needs an Amazon session and is not run. ``eager``
+imports the libraries the script used to import at load, whatever the run did.
+
+    python benchmarks/bench_startup.py --repeat 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from smtp_stub import SMTPStub
+from synthetic_reports import ROOT
+
+# The import block of the script before the subcommand entry point
+EAGER_IMPORTS = [
+    'dotenv', 'numpy', 'pandas', 'pyotp', 'requests', 'fake_useragent', 'selenium.webdriver',
+    'selenium.webdriver.chrome.service', 'selenium.webdriver.chrome.options', 'selenium.webdriver.support.ui',
+    'selenium.webdriver.support.expected_conditions', 'selenium.webdriver.common.by', 'selenium.webdriver.common.keys',
+    'webdriver_manager.chrome', 'smtplib', 'email.mime.multipart', 'google_auth_oauthlib.flow',
+    'google.auth.transport.requests', 'google.oauth2.credentials', 'googleapiclient.discovery',
+    'bluestars_report.transform', 'bluestars_report.catalog_cache', 'bluestars_report.campaign_memo',
+    'bluestars_report.downloader', 'bluestars_report.session_cache', 'bluestars_report.export',
+    'bluestars_report.history_store', 'bluestars_report.report_daemon', 'bluestars_report.replay',
+    'bluestars_report.rollup', 'bluestars_report.streaming', 'bluestars_report.normalize',
+]
+HEAVY = ['pandas', 'numpy', 'pyarrow', 'selenium', 'googleapiclient', 'requests', 'cryptography']
+
+
+def prepare_week(work_dir, rows, skus):
+    """Child process: ``fetch_links`` + ``download`` checkpoints and a catalog snapshot in ``work_dir``."""
+    from synthetic_reports import load_pipeline, make_report_set, use_catalog_snapshot, write_catalog_snapshot
+
+    pipeline = load_pipeline()
+    reports, catalog = make_report_set(rows, skus, missing_sku_rate=0)
+    use_catalog_snapshot(pipeline, write_catalog_snapshot(catalog, os.path.join(work_dir, 'catalog')))
+    checkpoints = pipeline.RunCheckpoints(pipeline.RUNS_DIR, pipeline.RUN_KEY, pipeline.PIPELINE_STAGES)
+    checkpoints.save('fetch_links', data={'links': {name: f"https://advertising.amazon.com/{name}" for name in reports}})
+    checkpoints.save('download', frames={name: pipeline.parse_report_content(payload, None, name)
+                                         for name, payload in reports.items()})
+
+
+def import_milliseconds(stderr):
+    """Total import time and the heavy packages of one ``-X importtime`` log."""
+    total, loaded = 0, set()
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        if not name.startswith('  '):
+            total += int(cumulative)
+        loaded.add(name.strip().split('.')[0])
+    return total / 1000, sorted(package for package in HEAVY if package in loaded)
+
+
+def run(args, env, work_dir, check):
+    result = subprocess.run([sys.executable, '-X', 'importtime', *args], cwd=work_dir, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    if check and result.returncode:
+        raise SystemExit(f"❌ {' '.join(args)} failed:\n{result.stderr[-2000:]}")
+    return import_milliseconds(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=2000, help='rows per synthetic report')
+    parser.add_argument('--skus', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--prepare', metavar='DIR', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.prepare:
+        prepare_week(args.prepare, args.rows, args.skus)
+        return
+
+    work_dir = tempfile.mkdtemp(prefix='bench-startup-')
+    with SMTPStub(os.path.join(work_dir, 'outbox')) as stub:
+        env = {**os.environ, 'PYTHONPATH': ROOT, 'RUNS_DIR': os.path.join(work_dir, 'runs'),
+               'HISTORY_DIR': os.path.join(work_dir, 'history'), 'CAMPAIGN_MEMO_PATH': ':memory:',
+               'CATALOG_CACHE_DIR': os.path.join(work_dir, 'catalog'), 'CATALOG_OFFLINE': '1',
+               'GMAIL_SYNC_PATH': ':memory:', 'TRANSFORM_WORKERS': '1', 'EXPORT_WORKERS': '1',
+               'SMTP_HOST': stub.host, 'SMTP_PORT': str(stub.port), 'SMTP_SSL': '0'}
+        subprocess.run([sys.executable, os.path.abspath(__file__), '--prepare', work_dir, '--rows', str(args.rows),
+                        '--skus', str(args.skus)], check=True, env=env, stdout=subprocess.DEVNULL)
+
+        cases = [
+            ('eager', ['-c', f"import {', '.join(EAGER_IMPORTS)}"], True),
+            ('--help', ['-m', 'bluestars_report', '--help'], True),
+            ('fetch-links', ['-m', 'bluestars_report', 'fetch-links'], False),
+            # Pipeline order: each step reads the checkpoint the previous one just wrote
+            ('transform', ['-m', 'bluestars_report', 'transform'], True),
+            ('export', ['-m', 'bluestars_report', 'export'], True),
+            ('send', ['-m', 'bluestars_report', 'send'], True),
+        ]
+        print(f"{'command':<12} {'imports (median)':>17}  heavy packages loaded")
+        for label, command, check in cases:
+            timings = [run(command, env, work_dir, check) for _ in range(args.repeat)]
+            milliseconds = statistics.median(timing[0] for timing in timings)
+            print(f"{label:<12} {milliseconds:15.0f}ms  {', '.join(timings[0][1]) or '-'}")
+        if not stub.messages:
+            raise SystemExit("❌ send did not reach the SMTP stub")
+    print(f"✅ transform, export and send ran; {stub.stats['messages']} emails received by the SMTP stub")
+
+
+if __name__ == '__main__':
+    main()
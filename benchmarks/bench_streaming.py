@@ -0,0 +1,152 @@
+# ==================================================================================================
+#                                         BENCHMARK: STREAMING VS IN-MEMORY
+# ==================================================================================================
+"""Peak RSS and wall time of the in-memory path vs ``--stream``, with an output equality check.
+
+Each mode runs in its own process on the same synthetic reports written to
+disk: in-memory = read every payload, parse, ``transform_reports``,
+``combine_reports``, history write, ``build_rollup`` and ``export_zip``; streaming = the
+``export`` stage of ``STREAM_STAGES`` over the spooled files. The zip members,
+the missing-SKU details and the history rows of both runs must be identical
+(the zip includes the weekly summary sheet and rollup cube).
+
+    python benchmarks/bench_streaming.py --rows 200000 --memory-mb 64
+"""
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bluestars_report.instrumentation import current_rss_bytes, peak_rss_bytes
+from synthetic_reports import make_report_set, write_catalog_snapshot
+
+
+def run_mode(mode, data_dir, out_dir):
+    """Child process: run one mode and write ``result.json`` (+ ``reports.zip`` and ``history/``) to ``out_dir``."""
+    os.environ.update(RUNS_DIR=os.path.join(out_dir, 'runs'), HISTORY_DIR=os.path.join(out_dir, 'history'),
+                      CAMPAIGN_MEMO_PATH=':memory:', TRANSFORM_WORKERS='1', EXPORT_WORKERS='1')
+    os.chdir(out_dir)
+    from bluestars_report.history_store import HistoryStore
+    from bluestars_report.rollup import build_rollup
+    from synthetic_reports import load_pipeline, use_catalog_snapshot
+
+    pipeline = use_catalog_snapshot(load_pipeline(), os.path.join(data_dir, 'catalog'))
+    names = list(pipeline.report_registry.reports)
+    paths = {name: os.path.join(data_dir, f"{name}.csv") for name in names}
+    baseline_rss = current_rss_bytes()
+
+    # Both modes build the zip even when SKUs are missing, so the workbooks can be compared
+    build_missing_sku_details = pipeline.build_missing_sku_details
+    pipeline.build_missing_sku_details = lambda campaigns_no_sku: []
+
+    start = time.perf_counter()
+    if mode == 'memory':
+        payloads = {}
+        for name, path in paths.items():
+            with open(path, 'rb') as f:
+                payloads[name] = f.read()
+        parsed = {name: pipeline.parse_report_content(payload, None, name) for name, payload in payloads.items()}
+        cleaned, _ = pipeline.transform_reports(parsed)
+        df_combined = pipeline.combine_reports(cleaned)
+        HistoryStore(pipeline.HISTORY_DIR).write_week(pipeline.start_of_last_week.isoformat(), df_combined)
+        pipeline.export_zip(cleaned, 'reports.zip', build_rollup(df_combined))
+    else:
+        checkpoints = pipeline.RunCheckpoints(pipeline.RUNS_DIR, pipeline.RUN_KEY, pipeline.STREAM_STAGES)
+        checkpoints.save('fetch_links', data={'links': {}})
+        checkpoints.save('spool', files=paths, data={'content_types': {name: None for name in names}})
+        pipeline.stage_stream(checkpoints)
+        os.replace(checkpoints.restore_file('export', 'zip', out_dir), 'reports.zip')
+    seconds = time.perf_counter() - start
+
+    result = {
+        'seconds': round(seconds, 3),
+        'baseline_rss_mb': round(baseline_rss / 2**20, 1),
+        'peak_rss_mb': round(peak_rss_bytes() / 2**20, 1),
+        'missing_sku_details': build_missing_sku_details(pipeline.campaigns_without_sku()),
+    }
+    with open('result.json', 'w', encoding='utf-8') as f:
+        json.dump(result, f)
+
+
+def zip_members(path):
+    members = {}
+    with zipfile.ZipFile(path) as zipf:
+        for name in zipf.namelist():
+            if not name.endswith('.xlsx'):
+                members[name] = zipf.read(name)
+                continue
+            with zipfile.ZipFile(io.BytesIO(zipf.read(name))) as workbook:
+                # core.xml carries the creation time
+                members[name] = {part: workbook.read(part) for part in workbook.namelist() if part != 'docProps/core.xml'}
+    return members
+
+
+def history_rows(path):
+    from bluestars_report.history_store import HistoryStore
+
+    frame = HistoryStore(path).query()
+    return frame.sort_values(list(frame.columns), na_position='last').reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200000, help='rows per report')
+    parser.add_argument('--skus', type=int, default=3000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--memory-mb', type=int, default=64, help='STREAM_MEMORY_MB for the streaming run')
+    parser.add_argument('--run-mode', choices=['memory', 'stream'], help=argparse.SUPPRESS)
+    parser.add_argument('--data', help=argparse.SUPPRESS)
+    parser.add_argument('--out', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_mode:
+        run_mode(args.run_mode, args.data, args.out)
+        return
+
+    workdir = tempfile.mkdtemp(prefix='bench-streaming-')
+    data_dir = os.path.join(workdir, 'data')
+    os.makedirs(data_dir)
+    reports, catalog = make_report_set(args.rows, args.skus, args.seed)
+    for name, payload in reports.items():
+        with open(os.path.join(data_dir, f"{name}.csv"), 'wb') as f:
+            f.write(payload)
+    write_catalog_snapshot(catalog, os.path.join(data_dir, 'catalog'))
+    input_mb = sum(len(payload) for payload in reports.values()) / 2**20
+    del reports
+
+    results = {}
+    for mode in ('memory', 'stream'):
+        out_dir = os.path.join(workdir, mode)
+        os.makedirs(out_dir)
+        env = {**os.environ, 'STREAM_MEMORY_MB': str(args.memory_mb)}
+        subprocess.run([sys.executable, os.path.abspath(__file__), '--run-mode', mode, '--data', data_dir,
+                        '--out', out_dir], check=True, env=env, stdout=subprocess.DEVNULL)
+        with open(os.path.join(out_dir, 'result.json'), 'r', encoding='utf-8') as f:
+            results[mode] = json.load(f)
+
+    print(f"rows/report={args.rows:,} input={input_mb:.0f} MB budget={args.memory_mb} MB")
+    for mode, result in results.items():
+        print(f"{mode:<7}: {result['seconds']:8.2f}s  peak RSS {result['peak_rss_mb']:8.1f} MB "
+              f"(after imports {result['baseline_rss_mb']:.1f} MB)")
+
+    import pandas as pd
+    memory_dir, stream_dir = os.path.join(workdir, 'memory'), os.path.join(workdir, 'stream')
+    if zip_members(os.path.join(memory_dir, 'reports.zip')) != zip_members(os.path.join(stream_dir, 'reports.zip')):
+        raise SystemExit("❌ Workbooks differ between the two modes")
+    if results['memory']['missing_sku_details'] != results['stream']['missing_sku_details']:
+        raise SystemExit("❌ Missing-SKU details differ between the two modes")
+    pd.testing.assert_frame_equal(history_rows(os.path.join(memory_dir, 'history')),
+                                  history_rows(os.path.join(stream_dir, 'history')))
+    print("✅ Workbooks, missing-SKU details and history rows identical")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+# ==================================================================================================
+#                                         LOCAL SMTP STUB
+# ==================================================================================================
+"""A plain-SMTP server on localhost that accepts everything and writes each message to an outbox.
+
+Speaks just enough ESMTP for ``smtplib`` (EHLO/HELO, AUTH PLAIN, MAIL, RCPT,
+DATA, RSET, NOOP, QUIT); ``DATA`` is streamed to ``<outbox>/NNN.eml``. It
+counts connections, logins and messages, so a benchmark can check that one
+authenticated connection carried the whole run. Point the script at it with
+``SMTP_HOST=127.0.0.1 SMTP_PORT=<port> SMTP_SSL=0``:
+
+    python benchmarks/smtp_stub.py --port 2525 --outbox /tmp/outbox
+"""
+import argparse
+import os
+import socketserver
+import threading
+
+
+class _Session(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode('ascii') + b'\r\n')
+
+    def handle(self):
+        stub = self.server.stub
+        stub.count('connections')
+        self.reply('220 smtp-stub ready')
+        sender, recipients = None, []
+        for line in self.rfile:
+            command = line.decode('ascii', 'replace').strip()
+            verb = command.split(' ', 1)[0].upper()
+            if verb == 'EHLO':
+                self.wfile.write(b'250-smtp-stub\r\n250-8BITMIME\r\n250 AUTH PLAIN\r\n')
+            elif verb == 'HELO':
+                self.reply('250 smtp-stub')
+            elif verb == 'AUTH':
+                stub.count('logins')
+                self.reply('235 2.7.0 Authentication successful')
+            elif verb == 'MAIL':
+                sender, recipients = command[len('MAIL FROM:'):].strip(' <>'), []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                recipients.append(command[len('RCPT TO:'):].strip(' <>'))
+                self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                path = stub.receive(self.rfile, sender, recipients)
+                self.reply(f"250 OK queued as {os.path.basename(path)}")
+            elif verb in ('RSET', 'NOOP'):
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+class SMTPStub:
+    def __init__(self, outbox_dir, host='127.0.0.1', port=0):
+        self.outbox_dir = outbox_dir
+        self.messages = []
+        self.stats = {'connections': 0, 'logins': 0, 'messages': 0}
+        self._lock = threading.Lock()
+        os.makedirs(outbox_dir, exist_ok=True)
+        self.server = socketserver.ThreadingTCPServer((host, port), _Session)
+        self.server.daemon_threads = True
+        self.server.stub = self
+        self.host, self.port = self.server.server_address
+
+    def count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+            return self.stats[name]
+
+    def receive(self, rfile, sender, recipients):
+        """Write the DATA lines up to the lone ``.`` to the outbox (dot-stuffing removed)."""
+        path = os.path.join(self.outbox_dir, f"{self.count('messages'):03d}.eml")
+        with open(path, 'wb') as f:
+            for line in rfile:
+                if line == b'.\r\n':
+                    break
+                f.write(line[1:] if line.startswith(b'..') else line)
+        with self._lock:
+            self.messages.append({'path': path, 'from': sender, 'to': recipients, 'bytes': os.path.getsize(path)})
+        return path
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=2525)
+    parser.add_argument('--outbox', default='outbox')
+    args = parser.parse_args()
+
+    stub = SMTPStub(args.outbox, args.host, args.port)
+    print(f"📮 SMTP stub on {stub.host}:{stub.port}, messages -> {args.outbox}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"🛑 {stub.stats}")
+    finally:
+        stub.server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+# ==================================================================================================
+#                                         SYNTHETIC AMAZON ADS REPORTS
+# ==================================================================================================
+"""Generate realistic SP/SB/SD US/CA campaign reports and a matching SKU catalog.
+
+Headers are the ones Amazon puts in the weekly campaign reports, i.e. exactly what
+the rename maps in ``process_dataframe`` expect. Values are generated with numpy,
+so millions of rows take seconds.
+
+    python benchmarks/synthetic_reports.py --rows 100000 --skus 3000 --out /tmp/reports
+"""
+import argparse
+import importlib.util
+import json
+import os
+import pickle
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT_PATH = os.path.join(ROOT, 'BlueStars - Weekly Marketing Data Report.py')
+PIPELINE_PATH = os.path.join(ROOT, 'bluestars_report', 'pipeline.py')
+
+# Report keys of the default registry (bluestars_report/report_registry.toml)
+REPORT_NAMES = ['BS_US_SP', 'BS_US_SB', 'BS_US_SD', 'BS_CA_SP', 'BS_CA_SB', 'BS_CA_SD']
+
+HEADERS = {
+    'SP': ['Date', 'Portfolio name', 'Currency', 'Campaign Name', 'Country', 'Status', 'Budget',
+           'Targeting Type', 'Bidding strategy', 'Start Date', 'End Date', 'Impressions', 'Clicks',
+           'Click-Thru Rate (CTR)', 'Spend', 'Cost Per Click (CPC)', '7 Day Total Orders (#)',
+           'Total Advertising Cost of Sales (ACOS)', 'Total Return on Advertising Spend (ROAS)',
+           '7 Day Total Sales'],
+    'SB': ['Date', 'Portfolio name', 'Currency', 'Campaign Name', 'Country', 'Impressions', 'Clicks',
+           'Click-Thru Rate (CTR)', 'Spend', 'Cost Per Click (CPC)', '14 Day Total Orders (#)',
+           'Total Advertising Cost of Sales (ACOS)', 'Total Return on Advertising Spend (ROAS)',
+           '14 Day Total Sales'],
+    'SD': ['Date', 'Portfolio name', 'Currency', 'Campaign Name', 'Country', 'Status', 'Budget',
+           'Start Date', 'End Date', 'Impressions', 'Clicks', 'Click-Thru Rate (CTR)', 'Spend',
+           'Cost Per Click (CPC)', '14 Day Total Orders (#)', 'Total Advertising Cost of Sales (ACOS)',
+           'Total Return on Advertising Spend (ROAS)', '14 Day Total Sales'],
+}
+
+NAME_SUFFIXES = {
+    'SP': ['SP Auto', 'jido', 'SP Exact', 'EX8', 'Broad', 'Phrase', 'PT', 'TOS', 'PP', 'Research',
+           'Performance', 'search terms', 'TD', 'Query', 'CPM Broad'],
+    'SB': ['Video Ads Phrase', 'Video Ads Broad', 'Video Ads Exact', 'Video Ads PT', 'Video Ads Query',
+           'Headline', 'Store Spotlight', 'CPM Video Ads Broad'],
+    'SD': ['SD AUDT Views Remarketing', 'SD PT', 'SD Contextual', 'SD CPM Audience'],
+}
+
+BIDDING_STRATEGIES = ['Dynamic bids - down only', 'Dynamic bids - up and down', 'Fixed bid']
+
+
+def make_catalog(n_skus, seed=0):
+    """SKU sheet shaped like the published Google Sheet after ``pd.read_html(..., skiprows=1)``."""
+    rng = np.random.default_rng(seed)
+    letters = np.array(list('ABCDEFGHJKLMNPQRSTUVWXYZ'))
+    skus = [''.join(rng.choice(letters, 2)) + str(n).zfill(6) for n in rng.choice(10**6, n_skus, replace=False)]
+    return pd.DataFrame({
+        0: ['STT'] + list(range(1, n_skus + 1)),
+        'SKU': ['SKU'] + skus,
+        'Product': ['Product'] + [f"Product {n}" for n in range(n_skus)],
+    })
+
+
+def _money(values, currency):
+    prefix = 'CA$' if currency == 'CAD' else '$'
+    return pd.Series(values).map(lambda value: f"{prefix}{value:,.2f}")
+
+
+def make_report(ad_type, market, rows, catalog_skus, seed=0, distinct_campaigns=None, missing_sku_rate=0.01):
+    rng = np.random.default_rng(seed)
+    distinct_campaigns = distinct_campaigns or max(10, min(rows // 20, 20000))
+
+    # Campaign pool: SKU + form suffix, plus a few names without any catalog SKU
+    pool_skus = rng.choice(catalog_skus, distinct_campaigns)
+    pool_suffixes = rng.choice(NAME_SUFFIXES[ad_type], distinct_campaigns)
+    pool = np.array([f"{sku} {suffix} {n}" for n, (sku, suffix) in enumerate(zip(pool_skus, pool_suffixes))], dtype=object)
+    no_sku = rng.random(distinct_campaigns) < missing_sku_rate
+    pool[no_sku] = [f"Campaign with presets - {n}" for n in np.flatnonzero(no_sku)]
+
+    currency = 'CAD' if market == 'CA' else 'USD'
+    impressions = rng.poisson(800, rows)
+    clicks = rng.binomial(impressions, 0.01)
+    spend = np.round(clicks * rng.uniform(0.3, 2.5, rows), 2)
+    orders = rng.binomial(clicks, 0.12)
+    sales = np.round(orders * rng.uniform(15, 60, rows), 2)
+    dates = pd.Timestamp('2025-01-05') + pd.to_timedelta(rng.integers(0, 7, rows), unit='D')
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        columns = {
+            'Date': dates.strftime('%b %d, %Y'),
+            'Portfolio name': 'No Portfolio',
+            'Currency': currency,
+            'Campaign Name': pool[rng.integers(0, distinct_campaigns, rows)],
+            'Country': 'Canada' if market == 'CA' else 'United States',
+            'Status': 'ENABLED',
+            'Budget': _money(rng.choice([10, 20, 50, 100], rows).astype(float), currency),
+            'Targeting Type': rng.choice(['AUTOMATIC', 'MANUAL'], rows),
+            'Bidding strategy': rng.choice(BIDDING_STRATEGIES, rows),
+            'Start Date': 'Jan 01, 2024',
+            'End Date': '',
+            'Impressions': impressions,
+            'Clicks': clicks,
+            'Click-Thru Rate (CTR)': np.round(np.where(impressions > 0, clicks / impressions, 0), 4),
+            'Spend': _money(spend, currency),
+            'Cost Per Click (CPC)': _money(np.where(clicks > 0, spend / clicks, 0), currency),
+            'Total Advertising Cost of Sales (ACOS)': np.round(np.where(sales > 0, spend / sales, 0), 4),
+            'Total Return on Advertising Spend (ROAS)': np.round(np.where(spend > 0, sales / spend, 0), 2),
+        }
+    days = '7' if ad_type == 'SP' else '14'
+    columns[f'{days} Day Total Orders (#)'] = orders
+    columns[f'{days} Day Total Sales'] = _money(sales, currency)
+
+    return pd.DataFrame({header: columns[header] for header in HEADERS[ad_type]}, index=pd.RangeIndex(rows))
+
+
+def make_report_set(rows, n_skus, seed=0, missing_sku_rate=0.01):
+    """Return ``({report name: CSV bytes}, catalog frame)`` for the six weekly reports."""
+    catalog = make_catalog(n_skus, seed)
+    catalog_skus = catalog['SKU'].iloc[1:].to_numpy()
+    reports = {}
+    for index, name in enumerate(REPORT_NAMES):
+        _, market, ad_type = name.split('_')
+        report = make_report(ad_type, market, rows, catalog_skus, seed=seed + index, missing_sku_rate=missing_sku_rate)
+        reports[name] = report.to_csv(index=False).encode('utf-8')
+    return reports, catalog
+
+
+def catalog_sheet_html(catalog):
+    """``catalog`` as a published Google Sheet page: a row of column letters, then the sheet rows."""
+    def row(tag, values):
+        return '<tr>' + ''.join(f'<{tag}>{value}</{tag}>' for value in values) + '</tr>'
+
+    letters = [chr(ord('A') + n) for n in range(len(catalog.columns))]
+    header = [str(column) for column in catalog.columns]
+    body = ''.join(row('td', values) for values in catalog.astype(str).itertuples(index=False))
+    return f"<html><body><table><thead>{row('th', letters)}</thead><tbody>{row('td', header)}{body}</tbody></table></body></html>"
+
+
+def write_catalog_snapshot(catalog, cache_dir, brand='BlueStars'):
+    """Store ``catalog`` where ``CatalogCache`` looks for its offline snapshot."""
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(os.path.join(cache_dir, f"{brand}.pkl"), 'wb') as f:
+        pickle.dump(catalog, f)
+    return cache_dir
+
+
+def load_pipeline():
+    """A fresh copy of ``bluestars_report.pipeline``, so each caller can patch its globals freely."""
+    sys.path.insert(0, ROOT)
+    spec = importlib.util.spec_from_file_location('weekly_report', PIPELINE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def use_catalog_snapshot(pipeline, cache_dir):
+    """Make ``pipeline`` read its SKU catalogs offline from the snapshots in ``cache_dir``."""
+    from bluestars_report.catalog_cache import CatalogCache
+
+    # Snapshots are matched by URL, so tag them with the URLs the script is configured with
+    for brand, url in pipeline.SKU_CATALOG_URLS.items():
+        if os.path.exists(os.path.join(cache_dir, f"{brand}.pkl")):
+            with open(os.path.join(cache_dir, f"{brand}.json"), 'w', encoding='utf-8') as f:
+                json.dump({'url': url, 'fetched_at': time.time()}, f)
+    pipeline.catalog_cache = CatalogCache(pipeline.SKU_CATALOG_URLS, cache_dir, offline=True)
+    return pipeline
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000, help='rows per report')
+    parser.add_argument('--skus', type=int, default=3000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', required=True, help='output directory')
+    args = parser.parse_args()
+
+    reports, catalog = make_report_set(args.rows, args.skus, args.seed)
+    os.makedirs(args.out, exist_ok=True)
+    for name, payload in reports.items():
+        with open(os.path.join(args.out, f"{name}.csv"), 'wb') as f:
+            f.write(payload)
+    write_catalog_snapshot(catalog, os.path.join(args.out, 'catalog'))
+    print(f"Wrote {len(reports)} reports x {args.rows} rows and a {args.skus}-SKU catalog to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
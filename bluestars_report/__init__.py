@@ -0,0 +1 @@
+"""Reusable building blocks for the BlueStars weekly marketing data report."""
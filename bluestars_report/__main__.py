@@ -0,0 +1,3 @@
+from bluestars_report.cli import main
+
+main()
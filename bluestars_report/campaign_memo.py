@@ -0,0 +1,165 @@
+# ==================================================================================================
+#                                         CAMPAIGN RESOLUTION MEMO
+# ==================================================================================================
+"""Remember how each campaign name was resolved, across weekly runs.
+
+A campaign name resolves to ``SKU``, ``Campaign Form`` and ``Cost Type``. The
+memo is a small SQLite table keyed by (brand, ad type, campaign name) that also
+stores the catalog version (hash of the SKU list in catalog order) and the rule
+table version it was resolved with. A name is looked up again only when it was
+never seen or one of those versions changed; everything else comes straight
+from the table. Each run stamps the names it saw with its run key, so the
+missing-SKU alert is a query for this run's unresolved names.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from bluestars_report.sku_matching import SkuMatcher
+
+RESOLUTION_COLUMNS = ['SKU', 'Campaign Form', 'Cost Type']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS campaigns (
+    brand TEXT NOT NULL,
+    ad_type TEXT NOT NULL,
+    campaign_name TEXT NOT NULL,
+    catalog_version TEXT NOT NULL,
+    rules_version TEXT NOT NULL,
+    sku TEXT,
+    campaign_form TEXT NOT NULL,
+    cost_type TEXT NOT NULL,
+    resolved_at REAL NOT NULL,
+    last_seen TEXT,
+    PRIMARY KEY (brand, ad_type, campaign_name)
+);
+CREATE INDEX IF NOT EXISTS campaigns_unresolved ON campaigns (last_seen) WHERE sku IS NULL;
+"""
+
+
+def catalog_version(skus):
+    digest = hashlib.sha256()
+    for sku in skus:
+        digest.update(str(sku).encode('utf-8') + b'\n')
+    return digest.hexdigest()[:16]
+
+
+def rules_version(rule_table):
+    return hashlib.sha256(json.dumps(rule_table, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+class CampaignMemo:
+    def __init__(self, path):
+        self.path = path
+        if path != ':memory:' and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self):
+        self._conn.close()
+
+    def lookup(self, brand, ad_type, catalog_version, rules_version):
+        """All names of (brand, ad type) resolved with these versions, as a frame indexed by name."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT campaign_name, sku, campaign_form, cost_type FROM campaigns "
+                "WHERE brand = ? AND ad_type = ? AND catalog_version = ? AND rules_version = ?",
+                (brand, ad_type, catalog_version, rules_version)).fetchall()
+        frame = pd.DataFrame(rows, columns=['Campaign Name'] + RESOLUTION_COLUMNS, dtype=object)
+        return frame.set_index('Campaign Name')
+
+    def store(self, brand, ad_type, resolved, catalog_version, rules_version, run_key=None):
+        """Insert or refresh the resolutions in ``resolved`` (indexed by campaign name)."""
+        now = time.time()
+        rows = [(brand, ad_type, name, catalog_version, rules_version,
+                 None if pd.isna(sku) else sku, form, cost_type, now, run_key)
+                for name, sku, form, cost_type in resolved[RESOLUTION_COLUMNS].itertuples(name=None)]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO campaigns VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (brand, ad_type, campaign_name) DO UPDATE SET "
+                "catalog_version = excluded.catalog_version, rules_version = excluded.rules_version, "
+                "sku = excluded.sku, campaign_form = excluded.campaign_form, cost_type = excluded.cost_type, "
+                "resolved_at = excluded.resolved_at, last_seen = excluded.last_seen", rows)
+
+    def mark_seen(self, brand, ad_type, names, run_key):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE campaigns SET last_seen = ? WHERE brand = ? AND ad_type = ? AND campaign_name = ?",
+                [(run_key, brand, ad_type, name) for name in names])
+
+    def unresolved(self, run_key):
+        """``{brand: {campaign names without SKU}}`` among the names seen by ``run_key``."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT brand, campaign_name FROM campaigns WHERE sku IS NULL AND last_seen = ?",
+                (run_key,)).fetchall()
+        missing = {}
+        for brand, name in rows:
+            missing.setdefault(brand, set()).add(name)
+        return missing
+
+
+class CampaignResolver:
+    """Resolve the distinct campaign names of a report through the memo."""
+
+    def __init__(self, memo, classifier):
+        self.memo = memo
+        self.classifier = classifier
+        self.rules_version = rules_version(classifier.rule_table)
+        self._matchers = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _matcher(self, skus, version):
+        if version not in self._matchers:
+            self._matchers[version] = SkuMatcher(skus)
+        return self._matchers[version]
+
+    def resolve(self, brand, ad_type, campaign_names, catalog, run_key=None):
+        """Return one row per distinct name (index) plus a last row (index None) for missing names."""
+        # Same SKU column the report script always used: sheet header row dropped, SKUs as text
+        skus = catalog.iloc[1:, 1:]['SKU'].astype(str).tolist()
+        version = catalog_version(skus)
+
+        names = pd.Index(pd.unique(campaign_names.dropna()), dtype=object)
+        known = self.memo.lookup(brand, ad_type, version, self.rules_version)
+        seen = known.index.intersection(names)
+        new_names = names.difference(known.index, sort=False)
+        self.hits += len(seen)
+        self.misses += len(new_names)
+
+        resolved = known.loc[seen]
+        if len(new_names):
+            fresh_names = pd.Series(new_names, dtype=object)
+            fresh = self.classifier.classify(fresh_names, ad_type)
+            fresh.insert(0, 'SKU', self._matcher(skus, version).match_series(fresh_names))
+            fresh.index = new_names
+            self.memo.store(brand, ad_type, fresh, version, self.rules_version, run_key)
+            resolved = pd.concat([resolved, fresh[RESOLUTION_COLUMNS]])
+        if run_key is not None and len(seen):
+            self.memo.mark_seen(brand, ad_type, seen, run_key)
+
+        # Rows without a campaign name: no SKU, rule-table defaults
+        missing = self.classifier.classify(pd.Series([None], dtype=object), ad_type)
+        missing.insert(0, 'SKU', None)
+        missing.index = pd.Index([None], dtype=object)
+        return pd.concat([resolved, missing[RESOLUTION_COLUMNS]])
+
+
+def label_campaigns(campaign_names, resolved):
+    """Spread ``CampaignResolver.resolve`` output back onto every row of ``campaign_names``."""
+    codes, uniques = pd.factorize(campaign_names, use_na_sentinel=True)
+    positions = np.append(resolved.index[:-1].get_indexer(uniques), -1)
+    # Missing names have code -1 -> position -1, the trailing "no campaign name" row
+    labels = resolved.iloc[positions[codes]]
+    labels.index = campaign_names.index
+    return labels
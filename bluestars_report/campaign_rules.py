@@ -0,0 +1,104 @@
+# ==================================================================================================
+#                                         CAMPAIGN CLASSIFICATION RULES
+# ==================================================================================================
+"""Declarative, ordered rule tables for ``Campaign Form`` and ``Cost Type``.
+
+Each ad type has an ordered list of rules and a default; the first matching rule
+wins. A rule matches when every condition it lists holds:
+
+- ``tokens``: any of these whole words appears in the whitespace-split name
+- ``contains``: all of these substrings appear in the name
+- ``regex``: the regular expression matches somewhere in the name
+
+Rules are evaluated as vectorized masks over the distinct campaign names, and
+both output columns come out of the same pass. The default table lives in
+``campaign_rules.json`` next to this module; point ``load_rule_table`` at another
+JSON/YAML file to add campaign forms without touching code.
+"""
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'campaign_rules.json')
+
+_CONDITION_KEYS = {'tokens', 'contains', 'regex'}
+
+
+def _validate_rule_set(name, rule_set):
+    if 'default' not in rule_set:
+        raise ValueError(f"Rule set {name} has no default")
+    for rule in rule_set.get('rules', []):
+        if 'form' not in rule:
+            raise ValueError(f"Rule in {name} has no form: {rule}")
+        conditions = set(rule) - {'form'}
+        if not conditions:
+            raise ValueError(f"Rule {rule['form']} in {name} has no condition")
+        unknown = conditions - _CONDITION_KEYS
+        if unknown:
+            raise ValueError(f"Rule {rule['form']} in {name} has unknown conditions: {sorted(unknown)}")
+
+
+def load_rule_table(path=None):
+    """Load and validate a rule table from JSON (or YAML when the file ends in .yaml/.yml)."""
+    path = path or DEFAULT_RULES_PATH
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith(('.yaml', '.yml')):
+            import yaml
+            table = yaml.safe_load(f)
+        else:
+            table = json.load(f)
+
+    for ad_type, rule_set in table.get('campaign_form', {}).items():
+        _validate_rule_set(f"campaign_form.{ad_type}", rule_set)
+    _validate_rule_set('cost_type', table['cost_type'])
+    return table
+
+
+def _rule_mask(names, rule):
+    mask = np.ones(len(names), dtype=bool)
+    if 'tokens' in rule:
+        # Whole-word match, equivalent to ``token in name.split()``
+        alternation = '|'.join(re.escape(token) for token in rule['tokens'])
+        mask &= names.str.contains(rf'(?<!\S)(?:{alternation})(?!\S)', regex=True, na=False).to_numpy(dtype=bool)
+    for substring in rule.get('contains', []):
+        mask &= names.str.contains(substring, regex=False, na=False).to_numpy(dtype=bool)
+    if 'regex' in rule:
+        mask &= names.str.contains(rule['regex'], regex=True, na=False).to_numpy(dtype=bool)
+    return mask
+
+
+def _apply_rule_set(names, rule_set):
+    rules = rule_set.get('rules', [])
+    if not rules:
+        return np.full(len(names), rule_set['default'], dtype=object)
+    masks = [_rule_mask(names, rule) for rule in rules]
+    forms = [rule['form'] for rule in rules]
+    # np.select keeps the first matching rule, like the original if-chain
+    return np.select(masks, forms, default=rule_set['default']).astype(object)
+
+
+class CampaignClassifier:
+    def __init__(self, rule_table=None):
+        self.rule_table = rule_table or load_rule_table()
+
+    def classify(self, campaign_names, ad_type):
+        """Return ``Campaign Form`` and ``Cost Type`` for every campaign name."""
+        form_rules = self.rule_table['campaign_form'].get(ad_type)
+        if form_rules is None:
+            raise ValueError(f"No campaign form rules for ad type {ad_type}")
+
+        codes, uniques = pd.factorize(campaign_names, use_na_sentinel=True)
+        names = pd.Series(uniques, dtype=object)
+
+        forms = np.append(_apply_rule_set(names, form_rules), form_rules['default'])
+        cost_types = np.append(_apply_rule_set(names, self.rule_table['cost_type']),
+                               self.rule_table['cost_type']['default'])
+
+        # Missing names get code -1, which picks the trailing default
+        return pd.DataFrame({
+            'Campaign Form': forms[codes],
+            'Cost Type': cost_types[codes],
+        }, index=campaign_names.index)
@@ -0,0 +1,136 @@
+# ==================================================================================================
+#                                         SKU CATALOG CACHE
+# ==================================================================================================
+"""Fetch each brand's published SKU sheet at most once per run.
+
+Parsed sheets are kept in memory (re-resolved once older than ``ttl``, which
+only matters for the long-running daemon) and snapshotted to disk (pickle + a
+small JSON sidecar holding the HTTP validators).
+Every resolve revalidates the snapshot with ``If-None-Match`` /
+``If-Modified-Since``, so a sheet fixed after a missing-SKU alert is picked up
+by the next run while an unchanged one costs a 304 instead of a download and
+an HTML parse. A failed request falls back to the snapshot. ``offline=True``
+never touches the network and runs from the last snapshot.
+"""
+import json
+import os
+import pickle
+import threading
+import time
+from io import StringIO
+
+import pandas as pd
+import requests
+
+
+class CatalogUnavailableError(RuntimeError):
+    """Raised when a catalog can neither be fetched nor loaded from a snapshot."""
+
+
+class CatalogCache:
+    def __init__(self, urls, cache_dir, ttl=6 * 3600, offline=False, session=None, timeout=30):
+        self.urls = dict(urls)
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.offline = offline
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        self._frames = {}
+        self._loaded_at = {}
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _snapshot_path(self, brand):
+        return os.path.join(self.cache_dir, f"{brand}.pkl")
+
+    def _meta_path(self, brand):
+        return os.path.join(self.cache_dir, f"{brand}.json")
+
+    def _load_snapshot(self, brand):
+        try:
+            with open(self._meta_path(brand), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(self._snapshot_path(brand), 'rb') as f:
+                frame = pickle.load(f)
+        except (OSError, ValueError, pickle.UnpicklingError, EOFError):
+            return None, {}
+        return frame, meta
+
+    def _write_meta(self, brand, meta):
+        tmp_path = self._meta_path(brand) + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._meta_path(brand))
+
+    def _save_snapshot(self, brand, frame, meta):
+        tmp_path = self._snapshot_path(brand) + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(frame, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self._snapshot_path(brand))
+        self._write_meta(brand, meta)
+
+    def _fetch(self, brand, snapshot, meta):
+        headers = {}
+        if snapshot is not None:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        response = self.session.get(self.urls[brand], headers=headers, timeout=self.timeout)
+
+        if response.status_code == 304 and snapshot is not None:
+            print(f"📦 Catalog {brand}: unchanged (304), using snapshot")
+            meta['fetched_at'] = time.time()
+            self._write_meta(brand, meta)
+            return snapshot
+
+        response.raise_for_status()
+        frame = pd.read_html(StringIO(response.text), skiprows=1)[0]
+        meta = {
+            'url': self.urls[brand],
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'fetched_at': time.time(),
+        }
+        self._save_snapshot(brand, frame, meta)
+        print(f"📦 Catalog {brand}: downloaded {len(frame)} rows")
+        return frame
+
+    def _resolve(self, brand):
+        snapshot, meta = self._load_snapshot(brand)
+        # A snapshot taken from a different URL belongs to another sheet
+        if snapshot is not None and meta.get('url') != self.urls[brand]:
+            snapshot, meta = None, {}
+
+        if self.offline:
+            if snapshot is None:
+                raise CatalogUnavailableError(f"No offline snapshot for catalog {brand} in {self.cache_dir}")
+            print(f"📦 Catalog {brand}: offline mode, using snapshot")
+            return snapshot
+
+        try:
+            return self._fetch(brand, snapshot, meta)
+        except Exception as e:
+            if snapshot is None:
+                raise CatalogUnavailableError(f"Cannot fetch catalog {brand}: {e}") from e
+            print(f"⚠️ Catalog {brand}: fetch failed ({e}), using stale snapshot")
+            return snapshot
+
+    def get(self, brand):
+        """Return the parsed sheet for ``brand``; every caller shares the same frame."""
+        if brand not in self.urls:
+            raise KeyError(f"No SKU catalog configured for brand {brand}")
+        with self._lock:
+            if brand not in self._frames or time.time() - self._loaded_at[brand] >= self.ttl:
+                self._frames[brand] = self._resolve(brand)
+                self._loaded_at[brand] = time.time()
+            return self._frames[brand]
+
+    def warm(self, brands=None):
+        """Load (or refresh, when older than ``ttl``) the catalogs of ``brands`` (default: all)."""
+        for brand in self.urls if brands is None else brands:
+            try:
+                self.get(brand)
+            except CatalogUnavailableError as e:
+                print(f"⚠️ {e}")
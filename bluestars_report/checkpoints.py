@@ -0,0 +1,159 @@
+# ==================================================================================================
+#                                         PIPELINE CHECKPOINTS
+# ==================================================================================================
+"""Content-addressed checkpoints so a weekly run can resume where it stopped.
+
+Each run owns a directory (one per report week). A stage that finishes stores
+its frames as Parquet under ``artifacts/<sha256>.parquet``, its files under
+``artifacts/<sha256><ext>`` and its small JSON results in ``manifest.json``. On
+the next run, a stage counts as complete only when its manifest entry exists and
+every artifact is still on disk with the recorded hash. Recomputing a stage
+invalidates every stage after it.
+"""
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import time
+from io import BytesIO
+
+
+class RunCheckpoints:
+    def __init__(self, root, run_key, stages, from_stage=None):
+        self.run_dir = os.path.join(root, run_key)
+        self.artifact_dir = os.path.join(self.run_dir, 'artifacts')
+        self.manifest_path = os.path.join(self.run_dir, 'manifest.json')
+        self.stages = list(stages)
+        os.makedirs(self.artifact_dir, exist_ok=True)
+        self.manifest = self._read_manifest()
+
+        if from_stage is not None:
+            self.invalidate_from(from_stage)
+
+    def _read_manifest(self):
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_manifest(self):
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _store_bytes(self, payload, extension):
+        digest = hashlib.sha256(payload).hexdigest()
+        path = os.path.join(self.artifact_dir, digest + extension)
+        if not os.path.exists(path):
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        return {'file': os.path.basename(path), 'sha256': digest}
+
+    def _store_file(self, source_path, extension):
+        # Hashed and copied block by block: spooled reports can be larger than memory
+        digest = hashlib.sha256()
+        with open(source_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        path = os.path.join(self.artifact_dir, digest.hexdigest() + extension)
+        if not os.path.exists(path):
+            shutil.copyfile(source_path, path + '.tmp')
+            os.replace(path + '.tmp', path)
+        return {'file': os.path.basename(path), 'sha256': digest.hexdigest()}
+
+    def _store_frame(self, df):
+        buffer = BytesIO()
+        try:
+            df.to_parquet(buffer, index=False)
+            return self._store_bytes(buffer.getvalue(), '.parquet')
+        except (ImportError, ValueError, TypeError) as e:
+            # Mixed-type object columns (e.g. from XLSX) cannot always go to Parquet
+            print(f"⚠️ Parquet checkpoint failed ({e}), using pickle")
+            return self._store_bytes(pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL), '.pkl')
+
+    def _artifact_path(self, entry):
+        return os.path.join(self.artifact_dir, entry['file'])
+
+    def _artifact_ok(self, entry):
+        path = self._artifact_path(entry)
+        if not os.path.exists(path):
+            return False
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest() == entry['sha256']
+
+    def is_complete(self, stage):
+        entry = self.manifest.get(stage)
+        if not entry:
+            return False
+        artifacts = list(entry.get('frames', {}).values()) + list(entry.get('files', {}).values())
+        return all(self._artifact_ok(artifact) for artifact in artifacts)
+
+    def first_incomplete(self):
+        for stage in self.stages:
+            if not self.is_complete(stage):
+                return stage
+        return None
+
+    def invalidate_from(self, stage):
+        if stage not in self.stages:
+            raise ValueError(f"Unknown stage {stage}; choose one of {self.stages}")
+        for later_stage in self.stages[self.stages.index(stage):]:
+            self.manifest.pop(later_stage, None)
+        self._write_manifest()
+
+    def save(self, stage, frames=None, data=None, files=None):
+        """Record ``stage`` as complete and drop every later stage."""
+        entry = {
+            'completed_at': time.time(),
+            'frames': {name: self._store_frame(df) for name, df in (frames or {}).items()},
+            'files': {},
+            'data': data or {},
+        }
+        for name, path in (files or {}).items():
+            stored = self._store_file(path, os.path.splitext(path)[1])
+            entry['files'][name] = {**stored, 'name': os.path.basename(path)}
+
+        later_stages = self.stages[self.stages.index(stage) + 1:]
+        for later_stage in later_stages:
+            self.manifest.pop(later_stage, None)
+        self.manifest[stage] = entry
+        self._write_manifest()
+
+    def load_frames(self, stage):
+        return {name: self.load_frame(stage, name) for name in self.manifest[stage].get('frames', {})}
+
+    def load_frame(self, stage, name):
+        """One frame of ``stage``; ``None`` when the stage was saved without it."""
+        artifact = self.manifest[stage].get('frames', {}).get(name)
+        if artifact is None:
+            return None
+        path = self._artifact_path(artifact)
+        if path.endswith('.parquet'):
+            # pandas only when frames are read back: `send` never pays for the import
+            import pandas as pd
+
+            return pd.read_parquet(path)
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    def load_data(self, stage):
+        return self.manifest[stage].get('data', {})
+
+    def file_path(self, stage, name):
+        """Path of a stored file, to read in place instead of copying it back."""
+        return self._artifact_path(self.manifest[stage]['files'][name])
+
+    def restore_file(self, stage, name, directory='.'):
+        """Copy a stored file back under its original name and return the path."""
+        artifact = self.manifest[stage]['files'][name]
+        path = os.path.join(directory, artifact['name'])
+        shutil.copyfile(self._artifact_path(artifact), path)
+        return path
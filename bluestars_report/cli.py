@@ -0,0 +1,113 @@
+# ==================================================================================================
+#                                         COMMAND LINE
+# ==================================================================================================
+"""``python -m bluestars_report <subcommand>``: one subcommand per pipeline step, ``run`` for the whole week.
+
+    fetch-links   Gmail -> report links
+    download      links -> raw reports (reuses the cached Amazon session, Chrome only when it expired)
+    transform     raw -> cleaned reports (SKU, Campaign Form, Cost Type, FX)
+    export        combine + history + zip (or the missing-SKU list)
+    send          email the zip, or the missing-SKU alert
+    run           every step, resuming from the last checkpoint (--stream, --daemon, --record, --replay)
+
+A step reads the checkpoint of the step before it for the current report week
+(``runs/<week>/``), saves its own and drops the later ones, so steps can be run
+and re-run one at a time. No subcommand means ``run``, as the script always did.
+Only the light ``pipeline`` module is imported up front; each step imports its
+own libraries (Google API, requests + Selenium, pandas, pyarrow) when it runs.
+"""
+import argparse
+import os
+import sys
+
+from bluestars_report import pipeline
+from bluestars_report.instrumentation import PROFILERS
+
+# subcommand -> pipeline stages it runs, in order
+COMMANDS = {
+    'fetch-links': ['fetch_links'],
+    'download': ['download'],
+    'transform': ['transform'],
+    'export': ['combine', 'archive', 'export'],
+    'send': ['send'],
+}
+COMMAND_HELP = {
+    'fetch-links': "Gmail -> report links",
+    'download': "Links -> raw reports",
+    'transform': "Raw -> cleaned reports (SKU, Campaign Form, Cost Type, FX)",
+    'export': "Combine, write the history, build the zip (or the missing-SKU list)",
+    'send': "Email the zip, or the missing-SKU alert",
+}
+
+
+def build_parser():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--metrics', help="JSON-lines run report, one line per span (appended on every run; "
+                                          "default runs/<week>/metrics.jsonl)")
+    common.add_argument('--profile', metavar='SPAN',
+                        help="Profile this span, e.g. transform, process_dataframe, download_report, export_zip")
+    common.add_argument('--profiler', choices=PROFILERS, default='cprofile')
+
+    parser = argparse.ArgumentParser(prog='python -m bluestars_report', description="BlueStars weekly marketing data report")
+    subparsers = parser.add_subparsers(dest='command', metavar='COMMAND')
+    for command in COMMANDS:
+        subparsers.add_parser(command, parents=[common], help=COMMAND_HELP[command])
+
+    run = subparsers.add_parser('run', parents=[common], help="Run every step, resuming from the last checkpoint")
+    run.add_argument('--from-stage', choices=list(dict.fromkeys([*pipeline.PIPELINE_STAGES, *pipeline.STREAM_STAGES])),
+                     help="Force recomputation from this stage (later checkpoints are discarded)")
+    run.add_argument('--stream', action='store_true',
+                     help="Memory-bounded mode: spool reports to disk and process them block by block (STREAM_MEMORY_MB)")
+    run.add_argument('--daemon', action='store_true',
+                     help="Keep running: process each report when its email arrives, send the bundle when the week is complete")
+    fixture_group = run.add_mutually_exclusive_group()
+    fixture_group.add_argument('--record', metavar='BUNDLE', help="Run live and record Gmail, report downloads, catalogs and sent email into BUNDLE")
+    fixture_group.add_argument('--replay', metavar='BUNDLE', help="Run offline from a bundle written by --record")
+    return parser
+
+
+def run_step(command):
+    """The stages of one subcommand, after checking that the step before it has a checkpoint."""
+    stage_names = COMMANDS[command]
+    stage_order = list(pipeline.PIPELINE_STAGES)
+    checkpoints = pipeline.RunCheckpoints(pipeline.RUNS_DIR, pipeline.RUN_KEY, pipeline.PIPELINE_STAGES)
+
+    index = stage_order.index(stage_names[0])
+    if index and not checkpoints.is_complete(stage_order[index - 1]):
+        previous = next(name for name, stages in COMMANDS.items() if stage_order[index - 1] in stages)
+        raise SystemExit(f"❌ Tuần {pipeline.RUN_KEY} chưa có checkpoint {stage_order[index - 1]}: chạy `{previous}` trước")
+    for stage in stage_names:
+        with pipeline.recorder.span(stage):
+            pipeline.PIPELINE_STAGES[stage](checkpoints)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] not in [*COMMANDS, 'run', '-h', '--help']:
+        argv = ['run', *argv]
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        if args.daemon and (args.record or args.replay):
+            parser.error("--record/--replay cannot be combined with --daemon")
+        if args.record or args.replay:
+            pipeline.use_fixtures('record' if args.record else 'replay', args.record or args.replay)
+
+    args.metrics = args.metrics or os.path.join(pipeline.RUNS_DIR, pipeline.RUN_KEY, 'metrics.jsonl')
+    pipeline.recorder.configure(args.metrics, profile=args.profile, profiler=args.profiler)
+    try:
+        if args.command != 'run':
+            run_step(args.command)
+        elif args.daemon:
+            pipeline.run_daemon()
+        else:
+            with pipeline.recorder.span('run', run_key=pipeline.RUN_KEY, from_stage=args.from_stage, stream=args.stream):
+                pipeline.run_pipeline(args.from_stage, pipeline.STREAM_STAGES if args.stream else pipeline.PIPELINE_STAGES)
+    finally:
+        pipeline.mailer.close()
+        if pipeline.fixtures is not None:
+            pipeline.close_fixtures()
+        # RUN SUMMARY
+        pipeline.recorder.print_summary()
+        print(f"📊 Run report: {args.metrics}")
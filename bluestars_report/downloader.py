@@ -0,0 +1,188 @@
+# ==================================================================================================
+#                                         CONCURRENT REPORT DOWNLOADER
+# ==================================================================================================
+"""Download all report links concurrently over one pooled ``requests.Session``.
+
+- a bounded thread pool, so wall-clock time tracks the slowest report
+- an ``HTTPAdapter`` whose connection pool is sized to the worker count
+- per-host rate limiting (minimum spacing between request starts)
+- retries with full-jitter exponential backoff on timeouts, 429 and 5xx
+- a per-report outcome map, so a second round only retries what failed
+- an optional ``span`` hook (e.g. ``RunRecorder.span``) timing each download
+- an optional ``spool_dir``: the body is streamed to ``<spool_dir>/<name>.download``
+  and ``parse`` receives that path instead of the bytes (streaming mode)
+"""
+import contextlib
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+SPOOL_BLOCK_BYTES = 1 << 20
+
+
+@dataclass
+class DownloadOutcome:
+    name: str
+    link: str
+    df: object = None
+    error: str = None
+    attempts: int = 0
+    seconds: float = 0.0
+    bytes: int = 0
+
+    @property
+    def ok(self):
+        return self.df is not None
+
+
+class RetryableError(Exception):
+    pass
+
+
+def configure_session(session, pool_size):
+    """Mount an adapter whose pool can hold one connection per worker."""
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def backoff_delay(attempt, base=1.0, cap=30.0):
+    # Full jitter: spreads retries of concurrent workers apart
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class HostRateLimiter:
+    def __init__(self, min_interval):
+        self.min_interval = min_interval
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url):
+        if self.min_interval <= 0:
+            return
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def _untraced(name, **attrs):
+    return contextlib.nullcontext()
+
+
+class ReportDownloader:
+    def __init__(self, session, parse, max_workers=6, max_retries=3, timeout=(10, 120),
+                 backoff_base=1.0, backoff_cap=30.0, min_host_interval=0.2, span=None, spool_dir=None):
+        self.session = configure_session(session, max_workers)
+        self.parse = parse
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.rate_limiter = HostRateLimiter(min_host_interval)
+        self.span = span or _untraced
+        self.spool_dir = spool_dir
+
+    def _fetch_once(self, name, link):
+        self.rate_limiter.wait(link)
+        try:
+            response = self.session.get(link, timeout=self.timeout, stream=self.spool_dir is not None)
+        except (requests.Timeout, requests.ConnectionError) as e:
+            raise RetryableError(f"{type(e).__name__}: {e}") from e
+
+        with response:
+            if response.status_code in RETRYABLE_STATUS:
+                raise RetryableError(f"HTTP {response.status_code}")
+            if response.status_code != 200:
+                raise Exception(f"HTTP {response.status_code}: Không thể tải báo cáo!")
+
+            if self.spool_dir is None:
+                content = response.content
+                size = len(content)
+            else:
+                content = os.path.join(self.spool_dir, f"{name}.download")
+                try:
+                    with open(content, 'wb') as f:
+                        for block in response.iter_content(SPOOL_BLOCK_BYTES):
+                            f.write(block)
+                except (requests.RequestException, OSError) as e:
+                    raise RetryableError(f"{type(e).__name__}: {e}") from e
+                size = os.path.getsize(content)
+
+        try:
+            return self.parse(content, content_type=response.headers.get('Content-Type'), report_name=name), size
+        except Exception as e:
+            # The report may not be ready yet -> thử lại
+            raise RetryableError(f"Không đọc được file: {e}") from e
+
+    def download(self, name, link):
+        with self.span('download_report', report=name) as span:
+            outcome = self._download(name, link)
+            if span is not None:
+                # A spooled report has no row count until it is streamed
+                rows = len(outcome.df) if outcome.ok and hasattr(outcome.df, 'shape') else None
+                span.record(bytes=outcome.bytes, rows=rows, attempts=outcome.attempts, error=outcome.error)
+        return outcome
+
+    def _download(self, name, link):
+        outcome = DownloadOutcome(name=name, link=link)
+        start = time.perf_counter()
+
+        if not link:
+            outcome.error = "Không có link báo cáo"
+            print(f"❌ {name}: {outcome.error}")
+            return outcome
+
+        for attempt in range(self.max_retries):
+            outcome.attempts = attempt + 1
+            try:
+                outcome.df, outcome.bytes = self._fetch_once(name, link)
+                outcome.error = None
+                break
+            except RetryableError as e:
+                outcome.error = str(e)
+                if attempt < self.max_retries - 1:
+                    delay = backoff_delay(attempt, self.backoff_base, self.backoff_cap)
+                    print(f"🚨 {name}: {e} - lần thử {attempt + 1}/{self.max_retries}, thử lại sau {delay:.1f} giây...")
+                    time.sleep(delay)
+            except Exception as e:
+                outcome.error = str(e)
+                break
+
+        outcome.seconds = time.perf_counter() - start
+        if outcome.ok:
+            print(f"✅ {name}: {outcome.bytes / 1024:.0f} KB trong {outcome.seconds:.1f}s")
+        else:
+            print(f"❌ {name}: {outcome.error} (sau {outcome.attempts} lần thử)")
+        return outcome
+
+    def download_all(self, links):
+        """Download every ``{name: link}`` in parallel; returns ``{name: DownloadOutcome}``."""
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {name: pool.submit(self.download, name, link) for name, link in links.items()}
+            outcomes = {name: future.result() for name, future in futures.items()}
+        print(f"📥 Tải {sum(o.ok for o in outcomes.values())}/{len(outcomes)} báo cáo trong {time.perf_counter() - start:.1f}s")
+        return outcomes
+
+    def retry_failed(self, outcomes):
+        """Re-download only the reports that failed; successful outcomes are kept as-is."""
+        failed = {name: outcome.link for name, outcome in outcomes.items() if not outcome.ok and outcome.link}
+        if not failed:
+            return outcomes
+        print(f"🔄 Thử lại {len(failed)} báo cáo lỗi: {', '.join(failed)}")
+        return {**outcomes, **self.download_all(failed)}
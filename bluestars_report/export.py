@@ -0,0 +1,165 @@
+# ==================================================================================================
+#                                         REPORT EXPORT
+# ==================================================================================================
+"""Render the cleaned reports and stream them straight into the weekly zip.
+
+Workbooks are rendered in a process pool into in-memory buffers and written into
+the archive with ``ZipFile.open(..., 'w')``, so no ``.xlsx`` ever touches the
+working directory. Sheets are written row by row through xlsxwriter's
+``constant_memory`` mode. ``parquet`` and ``csv.gz`` are available for
+consumers that do not need Excel. In streaming mode an ``XlsxSheetWriter`` is
+fed chunk by chunk into a file on disk, which ``add_file_to_zip`` then copies
+into the archive. Small files rendered up front (the weekly summary sheet and
+rollup cube) go in with ``add_bytes_to_zip``.
+"""
+import datetime
+import io
+import math
+import shutil
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+
+EXPORT_FORMATS = {
+    # format: (file extension, compression inside the zip)
+    'xlsx': ('.xlsx', zipfile.ZIP_DEFLATED),
+    'parquet': ('.parquet', zipfile.ZIP_STORED),
+    'csv.gz': ('.csv.gz', zipfile.ZIP_STORED),
+}
+
+# Rows converted to Python objects at a time while writing a sheet
+WRITE_CHUNK_ROWS = 50_000
+
+
+class XlsxSheetWriter:
+    """One-sheet workbook written like ``df.to_excel(index=False)``, appended to chunk by chunk.
+
+    Cells match pandas' xlsxwriter output: datetimes get pandas' default number
+    formats, missing values stay empty and infinities are written as ``inf``/``-inf``.
+    """
+
+    def __init__(self, target, columns, sheet_name='Sheet1'):
+        import xlsxwriter
+
+        self.workbook = xlsxwriter.Workbook(target, {'constant_memory': True})
+        self.worksheet = self.workbook.add_worksheet(sheet_name)
+        # Same header look and date formats as pandas' to_excel
+        header_format = self.workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+        self.datetime_format = self.workbook.add_format({'num_format': 'YYYY-MM-DD HH:MM:SS'})
+        self.date_format = self.workbook.add_format({'num_format': 'YYYY-MM-DD'})
+        for col, name in enumerate(columns):
+            self.worksheet.write(0, col, str(name), header_format)
+        self.row = 1
+
+    def _write_datetime(self, row, col, value):
+        self.worksheet.write_datetime(row, col, value, self.datetime_format)
+
+    def _write_float(self, row, col, value):
+        if math.isinf(value):
+            # pandas' inf_rep
+            self.worksheet.write_string(row, col, 'inf' if value > 0 else '-inf')
+        else:
+            self.worksheet.write_number(row, col, value)
+
+    def _write_value(self, row, col, value):
+        if isinstance(value, datetime.datetime):
+            self._write_datetime(row, col, value)
+        elif isinstance(value, datetime.date):
+            self.worksheet.write_datetime(row, col, value, self.date_format)
+        elif isinstance(value, float):
+            self._write_float(row, col, value)
+        else:
+            self.worksheet.write(row, col, value)
+
+    def _cell_writers(self, df):
+        """One write function per column, picked from its dtype (object columns are checked cell by cell)."""
+        import pandas as pd
+
+        writers = []
+        for dtype in df.dtypes:
+            if pd.api.types.is_datetime64_any_dtype(dtype):
+                writers.append(self._write_datetime)
+            elif pd.api.types.is_float_dtype(dtype):
+                writers.append(self._write_float)
+            else:
+                writers.append(self._write_value)
+        return writers
+
+    def write(self, df):
+        writers = self._cell_writers(df)
+        for start in range(0, len(df), WRITE_CHUNK_ROWS):
+            chunk = df.iloc[start:start + WRITE_CHUNK_ROWS].astype(object)
+            chunk = chunk.where(chunk.notna(), None)
+            for values in chunk.itertuples(index=False, name=None):
+                for col, value in enumerate(values):
+                    # Missing values (NaN, NaT, None) stay empty cells, as pandas leaves them
+                    if value is not None:
+                        writers[col](self.row, col, value)
+                self.row += 1
+
+    def close(self):
+        self.workbook.close()
+
+
+def render_xlsx(df, sheet_name='Sheet1'):
+    """Write ``df`` like ``df.to_excel(index=False)`` but row-major, in constant memory."""
+    buffer = io.BytesIO()
+    writer = XlsxSheetWriter(buffer, df.columns, sheet_name)
+    writer.write(df)
+    writer.close()
+    return buffer.getvalue()
+
+
+def render_report(df, export_format='xlsx'):
+    if export_format == 'xlsx':
+        return render_xlsx(df)
+    buffer = io.BytesIO()
+    if export_format == 'parquet':
+        df.to_parquet(buffer, index=False)
+    elif export_format == 'csv.gz':
+        df.to_csv(buffer, index=False, compression={'method': 'gzip', 'mtime': 0})
+    else:
+        raise ValueError(f"Unknown export format {export_format}; choose one of {list(EXPORT_FORMATS)}")
+    return buffer.getvalue()
+
+
+def _render_entry(args):
+    file_stem, df, export_format = args
+    return file_stem, render_report(df, export_format)
+
+
+def _zip_info(name, compress_type):
+    info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+    info.compress_type = compress_type
+    return info
+
+
+def add_file_to_zip(zipf, path, file_stem, export_format='xlsx'):
+    """Copy a rendered file into the open archive ``zipf`` block by block."""
+    extension, compress_type = EXPORT_FORMATS[export_format]
+    with open(path, 'rb') as source, zipf.open(_zip_info(file_stem + extension, compress_type), 'w') as entry:
+        shutil.copyfileobj(source, entry, 1 << 20)
+
+
+def add_bytes_to_zip(zipf, payload, file_stem, export_format='xlsx'):
+    extension, compress_type = EXPORT_FORMATS[export_format]
+    with zipf.open(_zip_info(file_stem + extension, compress_type), 'w') as entry:
+        entry.write(payload)
+
+
+def write_report_zip(zip_path, reports, export_format='xlsx', workers=None, extras=()):
+    """Render ``reports`` ({file stem: DataFrame}) in parallel and stream them into ``zip_path``.
+
+    ``extras`` are already rendered ``(file stem, payload, format)`` entries, added after the reports.
+    """
+    jobs = [(file_stem, df, export_format) for file_stem, df in reports.items()]
+
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf, \
+            ProcessPoolExecutor(max_workers=workers) as pool:
+        # map() keeps the archive order stable while workers render ahead
+        for file_stem, payload in pool.map(_render_entry, jobs):
+            add_bytes_to_zip(zipf, payload, file_stem, export_format)
+        for file_stem, payload, extra_format in extras:
+            add_bytes_to_zip(zipf, payload, file_stem, extra_format)
+    return zip_path
@@ -0,0 +1,228 @@
+# ==================================================================================================
+#                                         GMAIL REPORT LINK RETRIEVAL
+# ==================================================================================================
+"""Find the Amazon report emails and pull their download links in few round trips.
+
+All subjects are searched with a single OR query, the matching messages are
+fetched through Gmail batch HTTP requests, and every response is trimmed with a
+``fields`` mask down to the Subject header and the HTML body that we actually use.
+``round_trips`` counts the HTTP requests made so the saving can be measured.
+
+Batching alone does not change which email is picked. Picking changed with the
+incremental sync (``gmail_sync``): when a subject has several emails, the newest
+``internalDate`` wins, ties broken by message id, where the original
+per-subject loop kept whichever message Gmail listed last. ``fetch_links`` uses
+the same rule, so both paths agree.
+"""
+import base64
+import time
+
+AMAZON_SENDERS = ('noreply@amazon.com', 'no-reply@amazon.com')
+
+# Gmail recommends at most 50 calls per batch request
+BATCH_SIZE = 50
+
+LIST_FIELDS = 'messages/id,nextPageToken'
+MESSAGE_FIELDS = 'id,internalDate,payload(headers(name,value),parts(mimeType,body/data))'
+# Headers only: enough to tell whether a new message is one of our reports
+METADATA_FIELDS = 'id,internalDate,payload/headers(name,value)'
+METADATA_HEADERS = ['Subject', 'From']
+HISTORY_FIELDS = 'history(messagesAdded/message/id),historyId,nextPageToken'
+
+# Per-request errors inside a batch that are worth re-sending (Gmail reports rate limits as 403 or 429)
+RETRYABLE_STATUS = {403, 429, 500, 502, 503, 504}
+BATCH_MAX_RETRIES = 3
+
+
+class HistoryExpiredError(RuntimeError):
+    """The stored historyId is too old for ``users.history.list`` (HTTP 404)."""
+
+
+class MessageFetchError(RuntimeError):
+    """Some messages of a batch still failed after the retries."""
+
+
+def http_status(error):
+    # googleapiclient's HttpError keeps the httplib2 response in ``resp``
+    return getattr(getattr(error, 'resp', None), 'status', None)
+
+
+def build_report_query(subjects, after, before):
+    senders = ' OR '.join(f'from:{sender}' for sender in AMAZON_SENDERS)
+    subject_terms = ' '.join(f'subject:"{subject}"' for subject in subjects)
+    # {...} is Gmail's OR group
+    return f'({senders}) {{{subject_terms}}} after:{after} before:{before}'
+
+
+def decode_body(data):
+    # Gmail API returns the body as base64url, which urlsafe_b64decode reads as-is (padding may be stripped)
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4)).decode('utf-8')
+
+
+def message_header(message, name):
+    for header in message.get('payload', {}).get('headers', []):
+        if header.get('name', '').lower() == name.lower():
+            return header.get('value', '')
+    return ''
+
+
+def message_subject(message):
+    return message_header(message, 'Subject')
+
+
+def is_amazon_sender(message):
+    sender = message_header(message, 'From').lower()
+    return any(address in sender for address in AMAZON_SENDERS)
+
+
+def newest_first(message):
+    # Ties on internalDate are broken by id, so the pick never depends on listing order
+    return -int(message.get('internalDate') or 0), message.get('id', '')
+
+
+def match_subject(message_subject_line, subjects):
+    """Map an email subject line back to the configured subject it answers."""
+    lowered = message_subject_line.lower()
+    candidates = [subject for subject in subjects if subject.lower() in lowered]
+    # Prefer the most specific subject when several overlap
+    return max(candidates, key=len) if candidates else None
+
+
+class GmailReportFetcher:
+    def __init__(self, service, extract_links, batch_size=BATCH_SIZE, max_retries=BATCH_MAX_RETRIES,
+                 backoff_base=1.0):
+        self.service = service
+        self.extract_links = extract_links
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.round_trips = 0
+
+    def list_message_ids(self, query, max_results):
+        message_ids = []
+        page_token = None
+        while len(message_ids) < max_results:
+            request = self.service.users().messages().list(
+                userId='me', q=query, maxResults=max_results - len(message_ids),
+                pageToken=page_token, fields=LIST_FIELDS)
+            results = request.execute()
+            self.round_trips += 1
+            message_ids.extend(msg['id'] for msg in results.get('messages', []))
+            page_token = results.get('nextPageToken')
+            if not page_token:
+                break
+        return message_ids
+
+    def current_history_id(self):
+        profile = self.service.users().getProfile(userId='me', fields='historyId').execute()
+        self.round_trips += 1
+        return profile['historyId']
+
+    def list_history(self, start_history_id):
+        """Return ``(ids of messages added since start_history_id, latest historyId)``."""
+        message_ids = []
+        history_id = start_history_id
+        page_token = None
+        while True:
+            try:
+                results = self.service.users().history().list(
+                    userId='me', startHistoryId=start_history_id, historyTypes=['messageAdded'],
+                    pageToken=page_token, fields=HISTORY_FIELDS).execute()
+            except Exception as e:
+                if http_status(e) == 404:
+                    raise HistoryExpiredError(f"historyId {start_history_id} is no longer available") from e
+                raise
+            self.round_trips += 1
+            for record in results.get('history', []):
+                for added in record.get('messagesAdded', []):
+                    if added['message']['id'] not in message_ids:
+                        message_ids.append(added['message']['id'])
+            history_id = results.get('historyId', history_id)
+            page_token = results.get('nextPageToken')
+            if not page_token:
+                return message_ids, history_id
+
+    def get_messages(self, message_ids, metadata_only=False):
+        """Fetch messages in batches; returns {id: message} for every id or raises ``MessageFetchError``.
+
+        A request that fails inside a batch with a rate limit or 5xx is re-sent in a new
+        batch after a backoff; any other error, or one left after ``max_retries``, raises.
+        """
+        messages = {}
+        pending = list(message_ids)
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                from bluestars_report.downloader import backoff_delay
+
+                time.sleep(backoff_delay(attempt - 1, self.backoff_base))
+            errors = self._execute_batches(pending, metadata_only, messages)
+            pending = [message_id for message_id, error in errors.items() if http_status(error) in RETRYABLE_STATUS]
+            if not pending or len(pending) < len(errors):
+                break
+        if errors:
+            failed = ', '.join(f"{message_id} ({error})" for message_id, error in errors.items())
+            raise MessageFetchError(f"Could not fetch {len(errors)} message(s): {failed}")
+        return messages
+
+    def _execute_batches(self, message_ids, metadata_only, messages):
+        """Fill ``messages`` in place; returns {id: exception} for the requests that failed."""
+        errors = {}
+
+        def on_response(request_id, response, exception):
+            if exception is not None:
+                errors[request_id] = exception
+                return
+            messages[request_id] = response
+
+        for start in range(0, len(message_ids), self.batch_size):
+            batch = self.service.new_batch_http_request(callback=on_response)
+            for message_id in message_ids[start:start + self.batch_size]:
+                if metadata_only:
+                    request = self.service.users().messages().get(
+                        userId='me', id=message_id, format='metadata', metadataHeaders=METADATA_HEADERS,
+                        fields=METADATA_FIELDS)
+                else:
+                    request = self.service.users().messages().get(
+                        userId='me', id=message_id, format='full', fields=MESSAGE_FIELDS)
+                batch.add(request, request_id=message_id)
+            batch.execute()
+            self.round_trips += 1
+        return errors
+
+    def first_link(self, message):
+        for part in message.get('payload', {}).get('parts', []):
+            if part.get('mimeType') == 'text/html' and part.get('body', {}).get('data'):
+                found_links = self.extract_links(decode_body(part['body']['data']))
+                if found_links:
+                    return found_links[0]
+        return None
+
+    def fetch_links(self, subjects, after, before, max_results_per_subject=10):
+        """Return {link_key: first link} for ``subjects`` = {email subject: link_key}."""
+        links = {key: None for key in subjects.values()}
+
+        query = build_report_query(subjects, after, before)
+        message_ids = self.list_message_ids(query, max_results_per_subject * len(subjects))
+        messages = self.get_messages(message_ids)
+
+        seen_subjects = set()
+        # Newest message first; a subject keeps the first message that has a link
+        for message in sorted(messages.values(), key=newest_first):
+            subject = match_subject(message_subject(message), subjects)
+            if subject is None:
+                continue
+            seen_subjects.add(subject)
+            if links[subjects[subject]]:
+                continue
+
+            link = self.first_link(message)
+            if link:
+                links[subjects[subject]] = link
+            else:
+                print(f"No valid download link found for subject: {subject}.")
+
+        for subject in subjects:
+            if subject not in seen_subjects:
+                print(f'No matching messages found for subject: {subject}')
+
+        return links
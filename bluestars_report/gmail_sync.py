@@ -0,0 +1,168 @@
+# ==================================================================================================
+#                                         INCREMENTAL GMAIL SYNC
+# ==================================================================================================
+"""Pull only the mailbox changes since the last run instead of re-searching a date window.
+
+The first run (or a run whose stored ``historyId`` has expired) does the normal
+OR-query search and remembers the mailbox ``historyId``. Later runs call
+``users.history.list`` from that id, fetch headers only for the new messages,
+and download full bodies only for Amazon report emails. Every message looked at
+is recorded in a SQLite table, so a rerun in the same week costs one history
+call. Links are picked from the table: newest ``internalDate`` per subject,
+ties broken by message id, within the same ``after``/``before`` window the
+search uses.
+"""
+import datetime
+import os
+import sqlite3
+import time
+
+from bluestars_report.gmail_reports import (HistoryExpiredError, build_report_query, is_amazon_sender,
+                                            match_subject, message_subject)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sync_state (
+    name TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS messages (
+    message_id TEXT PRIMARY KEY,
+    internal_date INTEGER,
+    subject TEXT,
+    link TEXT,
+    processed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messages_by_date ON messages (internal_date) WHERE link IS NOT NULL;
+"""
+
+
+def internal_date_bound(value):
+    """A search bound (epoch seconds, or a date = its local midnight) in ``internalDate`` milliseconds."""
+    if isinstance(value, datetime.datetime):
+        return int(value.timestamp() * 1000)
+    if isinstance(value, datetime.date):
+        return int(datetime.datetime.combine(value, datetime.time.min).timestamp() * 1000)
+    return int(value) * 1000
+
+
+class GmailSyncState:
+    def __init__(self, path):
+        self.path = path
+        if path != ':memory:' and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def history_id(self):
+        row = self._conn.execute("SELECT value FROM sync_state WHERE name = 'history_id'").fetchone()
+        return row[0] if row else None
+
+    def set_history_id(self, history_id):
+        with self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO sync_state VALUES ('history_id', ?)", (str(history_id),))
+
+    def unprocessed(self, message_ids):
+        known = set()
+        for start in range(0, len(message_ids), 500):
+            chunk = message_ids[start:start + 500]
+            rows = self._conn.execute(
+                f"SELECT message_id FROM messages WHERE message_id IN ({','.join('?' * len(chunk))})", chunk)
+            known.update(row[0] for row in rows)
+        return [message_id for message_id in message_ids if message_id not in known]
+
+    def record(self, rows):
+        """``rows`` = [(message_id, internal_date, subject, link)]; link is None for non-report mail."""
+        now = time.time()
+        with self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?, ?)",
+                                   [(*row, now) for row in rows])
+
+    def newest_links(self, subjects, after=None, before=None):
+        """``{link key: link}`` from the newest recorded report email of every subject in ``[after, before)``."""
+        links = {key: None for key in subjects.values()}
+        query = "SELECT subject, link FROM messages WHERE link IS NOT NULL"
+        params = []
+        if after is not None:
+            query += " AND internal_date >= ?"
+            params.append(internal_date_bound(after))
+        if before is not None:
+            # Like the search's before: -> mail received later (e.g. today) never wins
+            query += " AND internal_date < ?"
+            params.append(internal_date_bound(before))
+        for subject_line, link in self._conn.execute(query + " ORDER BY internal_date DESC, message_id DESC", params):
+            subject = match_subject(subject_line or '', subjects)
+            if subject is not None and links[subjects[subject]] is None:
+                links[subjects[subject]] = link
+        return links
+
+
+class IncrementalReportSync:
+    def __init__(self, fetcher, state):
+        self.fetcher = fetcher
+        self.state = state
+
+    def _record_messages(self, message_ids, subjects, from_search):
+        """Fetch and record ``message_ids``; returns False when some could not be fetched."""
+        message_ids = self.state.unprocessed(message_ids)
+        if not message_ids:
+            return True
+
+        rows = []
+        candidates = message_ids
+        if not from_search:
+            # New mail can be anything: look at the headers before pulling bodies
+            headers = self.fetcher.get_messages(message_ids, metadata_only=True)
+            candidates = []
+            for message_id, message in headers.items():
+                if is_amazon_sender(message) and match_subject(message_subject(message), subjects):
+                    candidates.append(message_id)
+                else:
+                    rows.append((message_id, int(message.get('internalDate') or 0), message_subject(message), None))
+            complete = len(headers) == len(message_ids)
+        else:
+            complete = True
+
+        messages = self.fetcher.get_messages(candidates)
+        for message_id, message in messages.items():
+            link = self.fetcher.first_link(message)
+            if link is None:
+                print(f"No valid download link found for subject: {message_subject(message)}.")
+            rows.append((message_id, int(message.get('internalDate') or 0), message_subject(message), link))
+        self.state.record(rows)
+        return complete and len(messages) == len(candidates)
+
+    def sync_links(self, subjects, after, before, max_results_per_subject=10):
+        """Same contract as ``GmailReportFetcher.fetch_links``: ``{link key: link}``."""
+        history_id = self.state.history_id()
+        latest_history_id = None
+
+        if history_id is not None:
+            try:
+                message_ids, latest_history_id = self.fetcher.list_history(history_id)
+                print(f"📨 Gmail sync: {len(message_ids)} message(s) mới từ historyId {history_id}")
+                if not self._record_messages(message_ids, subjects, from_search=False):
+                    # Keep the old historyId so the failed messages are listed again next run
+                    latest_history_id = None
+            except HistoryExpiredError as e:
+                print(f"⚠️ {e}, tìm lại theo khoảng ngày")
+                history_id = None
+
+        if history_id is None:
+            # Read the historyId before searching, so mail arriving meanwhile is picked up next run
+            latest_history_id = self.fetcher.current_history_id()
+            query = build_report_query(subjects, after, before)
+            message_ids = self.fetcher.list_message_ids(query, max_results_per_subject * len(subjects))
+            if not self._record_messages(message_ids, subjects, from_search=True):
+                latest_history_id = None
+
+        if latest_history_id is not None:
+            self.state.set_history_id(latest_history_id)
+
+        links = self.state.newest_links(subjects, after=after, before=before)
+        for subject, key in subjects.items():
+            if links[key] is None:
+                print(f'No matching messages found for subject: {subject}')
+        return links
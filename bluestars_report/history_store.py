@@ -0,0 +1,177 @@
+# ==================================================================================================
+#                                         WEEKLY HISTORY STORE
+# ==================================================================================================
+"""Append-only Parquet history of every week's ``df_combined``.
+
+Layout (hive partitioning)::
+
+    history/week=2025-01-05/brand=BlueStars/market=United%20States/part-0.parquet
+
+Writing a week replaces that week's partition as a whole, so re-running a week is
+idempotent. Queries go through ``pyarrow.dataset``: week/brand/market filters
+prune whole directories, and date/SKU/campaign-form filters are pushed down to
+the Parquet row-group statistics (files are sorted by SKU and date for that).
+"""
+import os
+import shutil
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+PARTITION_FIELDS = [('week', pa.string()), ('brand', pa.string()), ('market', pa.string())]
+PARTITION_SCHEMA = pa.schema(PARTITION_FIELDS)
+
+# One fixed schema for every week, so old and new partitions always unify
+STORE_SCHEMA = pa.schema([
+    ('Date', pa.string()),
+    ('Report Date', pa.date32()),
+    ('Campaign Type', pa.string()),
+    ('Campaign Name', pa.string()),
+    ('Bidding strategy', pa.string()),
+    ('Impressions', pa.float64()),
+    ('Clicks', pa.float64()),
+    ('Spend', pa.float64()),
+    ('Orders', pa.float64()),
+    ('Sales', pa.float64()),
+    ('Campaign Form', pa.string()),
+    ('Market', pa.string()),
+    ('Brand', pa.string()),
+    ('Cost Type', pa.string()),
+    ('SKU', pa.string()),
+] + PARTITION_FIELDS)
+
+METRICS = ['Impressions', 'Clicks', 'Spend', 'Orders', 'Sales']
+
+
+def _isin(field, values):
+    if isinstance(values, str):
+        values = [values]
+    return pc.field(field).isin(list(values))
+
+
+def _week_table(week, df_combined):
+    frame = df_combined.copy()
+    frame['Report Date'] = pd.to_datetime(frame['Date'], errors='coerce').dt.date
+    frame['week'] = week
+    frame['brand'] = frame['Brand']
+    frame['market'] = frame['Market']
+    for column in STORE_SCHEMA.names:
+        if column not in frame.columns:
+            frame[column] = None
+    # Sorted files give tight min/max row-group stats for SKU and date filters
+    frame = frame.sort_values(['SKU', 'Report Date'], na_position='last', kind='stable')
+
+    return pa.Table.from_pandas(frame[STORE_SCHEMA.names].astype({'Date': 'string'}),
+                                schema=STORE_SCHEMA, preserve_index=False, safe=False)
+
+
+class WeekWriter:
+    """Write one week chunk by chunk into a staging directory; swapped in on a clean exit.
+
+    Every chunk becomes its own sorted file per partition, so the week holds the
+    same rows as a single ``write_week`` call, in per-chunk rather than per-week order.
+    """
+
+    def __init__(self, store, week):
+        self.store = store
+        self.week = week
+        self.rows = 0
+        self.chunks = 0
+        self.staging_dir = None
+
+    def __enter__(self):
+        # Write next to the store, then swap in: a crash never leaves half a week behind
+        self.staging_dir = os.path.join(self.store.root, f".staging-{uuid.uuid4().hex}")
+        os.makedirs(os.path.join(self.staging_dir, f"week={self.week}"))
+        return self
+
+    def write(self, df_combined):
+        table = _week_table(self.week, df_combined)
+        ds.write_dataset(table, self.staging_dir, format='parquet',
+                         partitioning=ds.partitioning(PARTITION_SCHEMA, flavor='hive'),
+                         basename_template='part-{i}.parquet' if not self.chunks else f'part-{{i}}-{self.chunks}.parquet',
+                         existing_data_behavior='overwrite_or_ignore')
+        self.rows += len(table)
+        self.chunks += 1
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.store._swap_in(self.staging_dir, self.week)
+        finally:
+            shutil.rmtree(self.staging_dir, ignore_errors=True)
+        return False
+
+
+class HistoryStore:
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _week_dir(self, week):
+        return os.path.join(self.root, f"week={week}")
+
+    def weeks(self):
+        return sorted(name.split('=', 1)[1] for name in os.listdir(self.root) if name.startswith('week='))
+
+    def write_week(self, week, df_combined):
+        """Store (or replace) the combined data of ``week`` (ISO date of the report Sunday)."""
+        with self.week_writer(week) as writer:
+            writer.write(df_combined)
+        return writer.rows
+
+    def week_writer(self, week):
+        """Replace ``week`` with the chunks written to the returned writer (streaming mode)."""
+        return WeekWriter(self, week)
+
+    def _swap_in(self, staging_dir, week):
+        old_dir = None
+        if os.path.exists(self._week_dir(week)):
+            old_dir = os.path.join(self.root, f".replaced-{uuid.uuid4().hex}")
+            os.replace(self._week_dir(week), old_dir)
+        os.replace(os.path.join(staging_dir, f"week={week}"), self._week_dir(week))
+        if old_dir:
+            shutil.rmtree(old_dir)
+
+    def dataset(self):
+        return ds.dataset(self.root, format='parquet', schema=STORE_SCHEMA,
+                          partitioning=ds.partitioning(PARTITION_SCHEMA, flavor='hive'))
+
+    def _filter(self, weeks=None, start_date=None, end_date=None, brands=None, markets=None,
+                skus=None, campaign_forms=None):
+        conditions = []
+        if weeks is not None:
+            conditions.append(_isin('week', weeks))
+        if brands is not None:
+            conditions.append(_isin('brand', brands))
+        if markets is not None:
+            conditions.append(_isin('market', markets))
+        if start_date is not None:
+            conditions.append(pc.field('Report Date') >= pd.Timestamp(start_date).date())
+        if end_date is not None:
+            conditions.append(pc.field('Report Date') <= pd.Timestamp(end_date).date())
+        if skus is not None:
+            conditions.append(_isin('SKU', skus))
+        if campaign_forms is not None:
+            conditions.append(_isin('Campaign Form', campaign_forms))
+
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        return expression
+
+    def query(self, columns=None, **filters):
+        """Return matching rows as a DataFrame; see ``_filter`` for the available filters."""
+        table = self.dataset().to_table(columns=columns, filter=self._filter(**filters))
+        return table.to_pandas()
+
+    def rollup(self, by, metrics=METRICS, **filters):
+        """Sum ``metrics`` grouped by ``by`` (e.g. ['week', 'market']) without materializing rows in pandas."""
+        by = [by] if isinstance(by, str) else list(by)
+        table = self.dataset().to_table(columns=by + list(metrics), filter=self._filter(**filters))
+        grouped = table.group_by(by).aggregate([(metric, 'sum') for metric in metrics])
+        result = grouped.to_pandas().rename(columns={f"{metric}_sum": metric for metric in metrics})
+        return result.sort_values(by).reset_index(drop=True)
@@ -0,0 +1,212 @@
+# ==================================================================================================
+#                                         RUN INSTRUMENTATION
+# ==================================================================================================
+"""Lightweight spans around the slow parts of a run, written as a JSON-lines report.
+
+Every span records wall time, bytes transferred, rows, current RSS and the
+process' peak RSS when it finished (the high-water mark, so a jump shows up in
+the span that caused it). Spans nest per thread; spans opened in a worker thread
+(the download pool) hang under the span currently open on the main thread; spans of a worker
+process are measured there by its own recorder and written here with ``adopt``. One span name can be profiled with cProfile
+(``.prof`` file, top functions printed) or tracemalloc (peak and top allocation
+sites stored in the record)::
+
+    recorder = RunRecorder('runs/metrics.jsonl', profile='process_dataframe', profiler='tracemalloc')
+    with recorder.span('process_dataframe', report=df_name) as span:
+        df_cleaned = process_dataframe(df, df_name)
+        span.record(rows=len(df_cleaned))
+"""
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROFILERS = ('cprofile', 'tracemalloc')
+
+
+def current_rss_bytes():
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss_bytes():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _mb(value):
+    return None if value is None else round(value / 2**20, 1)
+
+
+class Span:
+    def __init__(self, name, parent, attrs):
+        self.name = name
+        self.parent = parent
+        self.attrs = dict(attrs)
+        self.bytes = None
+        self.rows = None
+
+    def record(self, bytes=None, rows=None, **attrs):
+        """Attach bytes transferred, row counts or any other JSON-able attribute."""
+        if bytes is not None:
+            self.bytes = (self.bytes or 0) + bytes
+        if rows is not None:
+            self.rows = (self.rows or 0) + rows
+        self.attrs.update(attrs)
+
+
+class RunRecorder:
+    def __init__(self, path=None, profile=None, profiler='cprofile', profile_dir=None):
+        self.run_id = time.strftime('%Y%m%d-%H%M%S') + '-' + uuid.uuid4().hex[:6]
+        self.records = []
+        self._stacks = {}
+        self._lock = threading.Lock()
+        self._profiling = threading.Lock()
+        self.configure(path, profile, profiler, profile_dir)
+
+    def configure(self, path=None, profile=None, profiler='cprofile', profile_dir=None):
+        """Set the output file and profiling target (the recorder can be created before they are known)."""
+        if profiler not in PROFILERS:
+            raise ValueError(f"Unknown profiler {profiler}; choose one of {list(PROFILERS)}")
+        self.path = path
+        self.profile = profile
+        self.profiler = profiler
+        self.profile_dir = profile_dir or os.path.join(os.path.dirname(path) if path else '.', 'profiles')
+
+    def _stack(self):
+        return self._stacks.setdefault(threading.get_ident(), [])
+
+    def _parent(self, stack):
+        if not stack:
+            stack = self._stacks.get(threading.main_thread().ident) or [None]
+        return stack[-1].name if stack[-1] else None
+
+    def _write(self, record):
+        with self._lock:
+            self.records.append(record)
+            if self.path:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                # One line per span as soon as it ends, so a crashed run still leaves its report
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+
+    @contextmanager
+    def _profiled(self, name, record):
+        # Only one profiler at a time: cProfile and tracemalloc are both process-wide
+        if name != self.profile or not self._profiling.acquire(blocking=False):
+            yield
+            return
+        try:
+            if self.profiler == 'cprofile':
+                profiler = cProfile.Profile()
+                profiler.enable()
+                try:
+                    yield
+                finally:
+                    profiler.disable()
+                    os.makedirs(self.profile_dir, exist_ok=True)
+                    path = os.path.join(self.profile_dir, f"{self.run_id}-{name}-{len(self.records)}.prof")
+                    profiler.dump_stats(path)
+                    top = io.StringIO()
+                    pstats.Stats(profiler, stream=top).sort_stats('cumulative').print_stats(15)
+                    print(f"🔬 cProfile {name} -> {path}\n{top.getvalue()}")
+                    record['profile'] = path
+            else:
+                tracemalloc.start()
+                try:
+                    yield
+                finally:
+                    snapshot = tracemalloc.take_snapshot()
+                    record['tracemalloc_peak_mb'] = _mb(tracemalloc.get_traced_memory()[1])
+                    tracemalloc.stop()
+                    record['top_allocations'] = [
+                        {'at': str(stat.traceback[0]), 'mb': _mb(stat.size), 'blocks': stat.count}
+                        for stat in snapshot.statistics('lineno')[:10]
+                    ]
+                    print(f"🔬 tracemalloc {name}: peak {record['tracemalloc_peak_mb']} MB")
+        finally:
+            self._profiling.release()
+
+    @contextmanager
+    def span(self, name, **attrs):
+        stack = self._stack()
+        span = Span(name, self._parent(stack), attrs)
+        record = {'run': self.run_id, 'span': name, 'parent': span.parent, 'started_at': time.time()}
+        stack.append(span)
+        start = time.perf_counter()
+        try:
+            with self._profiled(name, record):
+                yield span
+            record['status'] = 'ok'
+        except BaseException as e:
+            record['status'] = 'error'
+            record['error'] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            stack.pop()
+            record.update({
+                'seconds': round(time.perf_counter() - start, 4),
+                'bytes': span.bytes,
+                'rows': span.rows,
+                'rss_mb': _mb(current_rss_bytes()),
+                'peak_rss_mb': _mb(peak_rss_bytes()),
+                **span.attrs,
+            })
+            self._write(record)
+
+    def settings(self):
+        """Profiling settings, for the recorder of a worker process (``RunRecorder(None, *settings)``)."""
+        return self.profile, self.profiler, self.profile_dir
+
+    def adopt(self, record):
+        """Write a span measured by a worker process' recorder under the span open on this thread."""
+        self._write(dict(record, run=self.run_id, parent=self._parent(self._stack())))
+
+    def traced(self, name=None):
+        """Decorator form of ``span``; DataFrame results get their row count recorded."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name or func.__name__) as span:
+                    result = func(*args, **kwargs)
+                    if hasattr(result, 'shape'):
+                        span.record(rows=len(result))
+                    return result
+            return wrapper
+        return decorator
+
+    def print_summary(self, max_depth=1):
+        """Print the top-level spans (and their direct children) in start order."""
+        depth = {}
+        for record in sorted(self.records, key=lambda r: r['started_at']):
+            depth[record['span']] = depth.get(record['parent'], -1) + 1 if record['parent'] else 0
+            if depth[record['span']] > max_depth:
+                continue
+            details = [f"{record['seconds']:.1f}s"]
+            if record.get('rows') is not None:
+                details.append(f"{record['rows']:,} rows")
+            if record.get('bytes') is not None:
+                details.append(f"{record['bytes'] / 2**20:.1f} MB")
+            if record.get('peak_rss_mb') is not None:
+                details.append(f"peak RSS {record['peak_rss_mb']:.0f} MB")
+            status = '' if record['status'] == 'ok' else ' ❌'
+            print(f"⏱️ {'  ' * depth[record['span']]}{record['span']}: {' · '.join(details)}{status}")
@@ -0,0 +1,62 @@
+# ==================================================================================================
+#                                         REPORT LINK EXTRACTOR
+# ==================================================================================================
+"""Find the report download link in an Amazon notification email without building a DOM.
+
+``ReportLinkExtractor`` streams the HTML through ``html.parser.HTMLParser`` and
+stops at the first ``<a href>`` matching the report-URL pattern, so logo,
+help and unsubscribe links in the header and footer are skipped and the rest
+of the email is never parsed. When nothing matches, it falls back to the first
+link of the email (what the script always used), with a warning.
+"""
+import re
+from html.parser import HTMLParser
+
+# Report downloads live on an Amazon host and have "report" in their path (never an unsubscribe link)
+DEFAULT_REPORT_LINK_PATTERN = r'^https?://[^/]*amazon[^/]*/(?!\S*unsubscribe)\S*report'
+
+
+class _LinkFound(Exception):
+    pass
+
+
+class _AnchorScanner(HTMLParser):
+    def __init__(self, pattern):
+        super().__init__(convert_charrefs=True)
+        self.pattern = pattern
+        self.first_href = None
+        self.match = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag != 'a':
+            return
+        for name, value in attrs:
+            if name == 'href' and value:
+                href = value.strip()
+                if self.first_href is None:
+                    self.first_href = href
+                if self.pattern.search(href):
+                    self.match = href
+                    raise _LinkFound
+                return
+
+
+class ReportLinkExtractor:
+    def __init__(self, pattern=DEFAULT_REPORT_LINK_PATTERN):
+        self.pattern = re.compile(pattern, re.IGNORECASE)
+
+    def extract(self, html_content):
+        """Return ``[report link]`` (or ``[]``), the shape ``GmailReportFetcher`` expects."""
+        scanner = _AnchorScanner(self.pattern)
+        try:
+            scanner.feed(html_content)
+            scanner.close()
+        except _LinkFound:
+            return [scanner.match]
+
+        if scanner.first_href is not None:
+            print(f"⚠️ Không có link khớp mẫu báo cáo, dùng link đầu tiên: {scanner.first_href}")
+            return [scanner.first_href]
+        return []
+
+    __call__ = extract
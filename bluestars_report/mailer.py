@@ -0,0 +1,205 @@
+# ==================================================================================================
+#                                         STREAMING SMTP MAILER
+# ==================================================================================================
+"""Send the run's emails over one authenticated SMTP connection, attachments streamed from disk.
+
+- the MIME skeleton (headers, text body, boundaries) is built by ``email``; the
+  attachment is base64-encoded block by block from the file straight into the
+  SMTP ``DATA`` command, so RAM holds one block instead of 3-4 copies of the zip
+- the connection is opened and logged in on the first message and reused for
+  the next ones; a server that dropped an idle connection is reconnected once
+- an attachment over ``max_attachment_bytes`` is sent as numbered parts
+  (``name.zip.001``, ``.002``, ...; one email each, subject ``(1/3)``) that
+  7-Zip opens directly or ``cat`` joins back together
+- ``connect`` may return any object with ``login`` / ``sendmail`` / ``quit``
+  (e.g. the replay stand-in); only a real ``smtplib.SMTP`` gets the streamed
+  ``DATA``, the others receive the assembled message
+"""
+import base64
+import itertools
+import math
+import os
+import re
+import smtplib
+import uuid
+from email import policy
+from email.mime.base import MIMEBase
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+# 57 raw bytes = one 76-character base64 line
+ENCODE_BLOCK_BYTES = 57 * 16384
+
+# The MIME classes are compat32 messages: RFC 2047 headers (Vietnamese subjects), CRLF for the wire
+SMTP_POLICY = policy.compat32.clone(linesep='\r\n')
+
+_LEADING_PERIOD = re.compile(rb'(?m)^\.')
+
+
+def split_ranges(size, max_bytes):
+    """``[(start, end), ...]`` byte ranges of at most ``max_bytes`` (one range when it fits or no limit)."""
+    if not max_bytes or size <= max_bytes:
+        return [(0, size)]
+    parts = math.ceil(size / max_bytes)
+    step = math.ceil(size / parts)
+    return [(start, min(start + step, size)) for start in range(0, size, step)]
+
+
+def encode_file_range(path, start=0, end=None, block_bytes=ENCODE_BLOCK_BYTES):
+    """Base64 lines (CRLF) of ``path[start:end]``, one block at a time."""
+    end = os.path.getsize(path) if end is None else end
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            block = f.read(min(block_bytes, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield base64.encodebytes(block).replace(b'\n', b'\r\n')
+
+
+def message_chunks(sender, recipients, subject, body, attachment_path=None, byte_range=None, filename=None):
+    """The message as CRLF byte chunks; the attachment part is encoded lazily from disk."""
+    msg = MIMEMultipart()
+    msg['From'] = sender
+    msg['To'] = ", ".join(recipients)
+    msg['Subject'] = subject
+    msg.attach(MIMEText(body, 'plain'))
+    if attachment_path is None:
+        yield msg.as_bytes(policy=SMTP_POLICY)
+        return
+
+    # The payload is a marker: the skeleton is rendered once and split around it
+    marker = f"ATTACHMENT-{uuid.uuid4().hex}"
+    part = MIMEBase('application', 'octet-stream')
+    part['Content-Transfer-Encoding'] = 'base64'
+    part.add_header('Content-Disposition', 'attachment', filename=filename or os.path.basename(attachment_path))
+    part.set_payload(marker)
+    msg.attach(part)
+    head, tail = msg.as_bytes(policy=SMTP_POLICY).split(marker.encode('ascii'))
+    yield head
+    start, end = byte_range or (0, None)
+    encoded = False
+    for lines in encode_file_range(attachment_path, start, end):
+        encoded = True
+        yield lines
+    # The last base64 line already ends with the CRLF that precedes the closing boundary
+    yield tail[2:] if encoded and tail.startswith(b'\r\n') else tail
+
+
+class Mailer:
+    def __init__(self, connect, sender, password, max_attachment_bytes=None):
+        self.connect = connect
+        self.sender = sender
+        self.password = password
+        self.max_attachment_bytes = max_attachment_bytes
+        self.server = None
+        self.connections = 0
+        self.messages = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def _server(self):
+        if self.server is None:
+            server = self.connect()
+            self.connections += 1
+            server.login(self.sender, self.password)
+            self.server = server
+        return self.server
+
+    def close(self):
+        server, self.server = self.server, None
+        if server is None:
+            return
+        try:
+            server.quit()
+        except (smtplib.SMTPServerDisconnected, OSError):
+            pass
+
+    def _abort(self):
+        # Mid-DATA the server would read QUIT as message text: drop the connection instead
+        server, self.server = self.server, None
+        if hasattr(server, 'close'):
+            server.close()
+
+    def send_message(self, recipients, subject, body, attachment_path=None, byte_range=None, filename=None):
+        """Send one email; returns its size in bytes."""
+        for attempt in range(2):
+            chunks = message_chunks(self.sender, recipients, subject, body, attachment_path, byte_range, filename)
+            try:
+                size = self._transmit(self._server(), recipients, chunks)
+            except smtplib.SMTPServerDisconnected:
+                # Idle connection closed by the server (daemon between weeks): one fresh connection
+                self._abort()
+                if attempt:
+                    raise
+                continue
+            except Exception:
+                self._abort()
+                raise
+            self.messages += 1
+            return size
+
+    def send(self, recipients, subject, body, attachment_path=None):
+        """Send the email, split into numbered parts when the attachment is too big; returns the size of each email."""
+        if attachment_path is None:
+            return [self.send_message(recipients, subject, body)]
+        ranges = split_ranges(os.path.getsize(attachment_path), self.max_attachment_bytes)
+        if len(ranges) == 1:
+            return [self.send_message(recipients, subject, body, attachment_path)]
+
+        name = os.path.basename(attachment_path)
+        sizes = []
+        for number, byte_range in enumerate(ranges, start=1):
+            part_body = (f"{body}\n\nPhần {number}/{len(ranges)} của {name}. Mở {name}.001 bằng 7-Zip, "
+                         f"hoặc ghép lại: cat \"{name}\".0* > \"{name}\"")
+            sizes.append(self.send_message(recipients, f"{subject} ({number}/{len(ranges)})", part_body,
+                                           attachment_path, byte_range, f"{name}.{number:03d}"))
+        return sizes
+
+    def _transmit(self, server, recipients, chunks):
+        # Headers are rendered before MAIL FROM: an error there never leaves the server inside DATA
+        chunks = iter(chunks)
+        head = next(chunks)
+        if not isinstance(server, smtplib.SMTP):
+            message = head + b''.join(chunks)
+            server.sendmail(self.sender, recipients, message)
+            return len(message)
+
+        # smtplib.sendmail needs the whole message in memory: the same dialogue, DATA streamed
+        server.ehlo_or_helo_if_needed()
+        code, reply = server.mail(self.sender)
+        if code != 250:
+            raise smtplib.SMTPSenderRefused(code, reply, self.sender)
+        refused = {}
+        for recipient in recipients:
+            code, reply = server.rcpt(recipient)
+            if code not in (250, 251):
+                refused[recipient] = (code, reply)
+        if len(refused) == len(recipients):
+            server.rset()
+            raise smtplib.SMTPRecipientsRefused(refused)
+        code, reply = server.docmd('data')
+        if code != 354:
+            raise smtplib.SMTPDataError(code, reply)
+
+        size = 0
+        ends_with_crlf = True
+        for chunk in itertools.chain([head], chunks):
+            if not chunk:
+                continue
+            # Dot-stuffing: chunks always end on a line break, so ^ only sees line starts
+            server.send(_LEADING_PERIOD.sub(b'..', chunk))
+            size += len(chunk)
+            ends_with_crlf = chunk.endswith(b'\r\n')
+        server.send(b'.\r\n' if ends_with_crlf else b'\r\n.\r\n')
+        code, reply = server.getreply()
+        if code != 250:
+            raise smtplib.SMTPDataError(code, reply)
+        return size
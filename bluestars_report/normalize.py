@@ -0,0 +1,77 @@
+# ==================================================================================================
+#                                         DF_COMBINED NORMALIZATION
+# ==================================================================================================
+"""Single-pass normalization of ``df_combined`` into compact dtypes.
+
+Text columns with few distinct values become ``category``: stripping whitespace
+and filling defaults then touch only the categories instead of every row, and
+each row costs a small integer code instead of a Python string. Count columns
+are downcast to the smallest integer type that holds them losslessly. Missing
+values stay real nulls.
+"""
+import numpy as np
+import pandas as pd
+
+TEXT_COLUMNS = ['Campaign Type', 'Campaign Name', 'Bidding strategy', 'Campaign Form',
+                'Market', 'Brand', 'Cost Type', 'SKU']
+COUNT_COLUMNS = ['Impressions', 'Clicks', 'Orders']
+
+# Above this distinct/rows ratio a category saves nothing -> keep plain strings
+MAX_CATEGORY_RATIO = 0.5
+
+
+def frame_memory_mb(df):
+    return df.memory_usage(deep=True).sum() / 2**20
+
+
+def _strip(value):
+    # Same result as .str.strip(): non-strings become null
+    return value.strip() if isinstance(value, str) else np.nan
+
+
+def strip_categorical(series):
+    """Strip the categories of ``series``; categories that collide after stripping are merged."""
+    stripped = [_strip(category) for category in series.cat.categories]
+    inverse, uniques = pd.factorize(pd.Index(stripped, dtype=object))
+    uniques = np.asarray(uniques, dtype=object)
+
+    # Sorted categories, so sorting by the column stays lexical
+    order = np.argsort(uniques)
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    remap = np.append(np.where(inverse >= 0, rank[inverse], -1), -1)
+
+    codes = remap[series.cat.codes.to_numpy()]  # code -1 (null) hits the appended -1
+    categories = pd.Index(uniques[order], dtype=series.cat.categories.dtype)
+    return pd.Series(pd.Categorical.from_codes(codes, categories=categories), index=series.index, name=series.name)
+
+
+def normalize_text(series, fill_value=None, max_category_ratio=MAX_CATEGORY_RATIO):
+    if len(series) and series.nunique(dropna=True) <= max_category_ratio * len(series):
+        series = series.astype('category')
+        if fill_value is not None:
+            if fill_value not in series.cat.categories:
+                series = series.cat.add_categories([fill_value])
+            series = series.fillna(fill_value)
+        return strip_categorical(series)
+
+    if fill_value is not None:
+        series = series.fillna(fill_value)
+    return series.str.strip()
+
+
+def normalize_combined(df, fills=None, text_columns=TEXT_COLUMNS, count_columns=COUNT_COLUMNS):
+    """Return ``(normalized df, {'memory_before_mb': ..., 'memory_after_mb': ...})``."""
+    fills = fills or {}
+    memory_before = frame_memory_mb(df)
+
+    normalized = {}
+    for column in text_columns:
+        if column in df.columns:
+            normalized[column] = normalize_text(df[column], fills.get(column))
+    for column in count_columns:
+        if column in df.columns:
+            normalized[column] = pd.to_numeric(df[column], downcast='integer')
+    df = df.assign(**normalized)
+
+    return df, {'memory_before_mb': round(memory_before, 2), 'memory_after_mb': round(frame_memory_mb(df), 2)}
@@ -0,0 +1,863 @@
+"""The weekly report pipeline: configuration, Gmail / download / transform / export / send stages, daemon and replay.
+
+Run it through ``python -m bluestars_report <subcommand>`` (``bluestars_report/cli.py``).
+Importing this module is cheap: pandas, pyarrow, Selenium, the Google API
+client and requests are imported inside the functions that use them, so a
+subcommand only loads the libraries of its own stages.
+"""
+# OS, File Handling, and System Utilities
+import os
+import signal
+import tempfile
+import zipfile
+import pickle
+import urllib.request
+from dotenv import load_dotenv
+
+# Date, Time
+from datetime import datetime, timedelta
+
+# Email Handling
+import smtplib
+
+# Report Building Blocks (nhẹ: không kéo theo pandas / Selenium / Google API)
+from bluestars_report.report_registry import load_registry
+from bluestars_report.gmail_reports import GmailReportFetcher
+from bluestars_report.link_extractor import DEFAULT_REPORT_LINK_PATTERN, ReportLinkExtractor
+from bluestars_report.gmail_sync import GmailSyncState, IncrementalReportSync
+from bluestars_report.checkpoints import RunCheckpoints
+from bluestars_report.instrumentation import RunRecorder
+from bluestars_report.mailer import Mailer
+
+# Thư viện nặng (pandas, pyarrow, Selenium, Google API, requests) được import trong hàm dùng chúng
+
+# ==================================================================================================
+#                                         DATA DATE CONFIGURATION
+# ==================================================================================================
+# Spans (thời gian, bytes, số dòng, RSS) cho từng bước -> JSON-lines run report, cấu hình trong main
+recorder = RunRecorder()
+
+def set_report_week(now):
+    """Tuần báo cáo = tuần trước của ``now`` (daemon gọi lại mỗi vòng poll để sang tuần mới)."""
+    global today, report_date, start_of_week, start_of_last_week, end_of_last_week, start_date_str, end_date_str, RUN_KEY
+    today = now.date()
+
+    #Period Get Data
+    report_date = int((now - timedelta(days=5)).timestamp())
+
+    #Period Data Report
+    start_of_week = today - timedelta(days=(today.weekday() + 1) % 7)
+    start_of_last_week = start_of_week - timedelta(days=7)
+    end_of_last_week = start_of_last_week + timedelta(days=6)
+
+    start_date_str = start_of_last_week.strftime('%d.%m')
+    end_date_str = end_of_last_week.strftime('%d.%m')
+
+    # Mỗi tuần báo cáo có một thư mục run riêng (checkpoints, metrics, inbox của daemon)
+    RUN_KEY = f"{start_of_last_week.year} {start_date_str} - {end_date_str}"
+
+set_report_week(datetime.now())
+
+# ==================================================================================================
+#                                         REPORT REGISTRY
+# ==================================================================================================
+# Accounts x markets x ad types -> thêm brand/thị trường mới trong file TOML, không cần sửa code
+REPORT_REGISTRY_PATH = os.getenv("REPORT_REGISTRY_PATH")  # None -> bluestars_report/report_registry.toml
+
+report_registry = load_registry(REPORT_REGISTRY_PATH)
+
+# ==================================================================================================
+#                                         SETUP GMAIL API AUTHENTICATION
+# ==================================================================================================
+# Define the scope
+SCOPES = ['https://www.googleapis.com/auth/gmail.readonly']
+
+# Update paths
+JSON_FILE_PATH = '/.../gmail_api.json'
+TOKEN_FILE_PATH = '/.../token.pickle'
+
+@recorder.traced()
+def authenticate_gmail():
+    if fixtures is not None and fixtures.replaying:
+        return fixtures.gmail_service()
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    from googleapiclient.discovery import build
+
+    creds = None
+    if os.path.exists(TOKEN_FILE_PATH):
+        try:
+            with open(TOKEN_FILE_PATH, 'rb') as token:
+                creds = pickle.load(token)
+        except Exception as e:
+            print(f"Error loading credentials: {e}")
+            creds = None
+
+    if not creds or not creds.valid:
+        if creds and creds.expired and creds.refresh_token:
+            try:
+                from google.auth.transport.requests import Request
+
+                creds.refresh(Request())
+            except Exception as e:
+                print(f"Error refreshing credentials: {e}")
+                creds = None
+        if not creds:
+            try:
+                flow = InstalledAppFlow.from_client_secrets_file(JSON_FILE_PATH, SCOPES)
+                creds = flow.run_local_server(port=0)
+            except Exception as e:
+                print(f"Error during authentication: {e}")
+                return None
+        try:
+            with open(TOKEN_FILE_PATH, 'wb') as token:
+                pickle.dump(creds, token)
+        except Exception as e:
+            print(f"Error saving credentials: {e}")
+
+    service = build('gmail', 'v1', credentials=creds)
+    return fixtures.gmail_service(service) if fixtures is not None else service
+
+# ==================================================================================================
+#                                         SETUP EMAIL EXTRACTION FUNCTION
+# ==================================================================================================
+# Link tải report: dừng ở thẻ <a> đầu tiên khớp mẫu, không dựng cả cây HTML (đổi mẫu qua env nếu Amazon đổi URL)
+REPORT_LINK_PATTERN = os.getenv("REPORT_LINK_PATTERN", DEFAULT_REPORT_LINK_PATTERN)
+report_link_extractor = ReportLinkExtractor(REPORT_LINK_PATTERN)
+
+def extract_hyperlinks_from_html(html_content):
+    return report_link_extractor.extract(html_content)
+
+# Incremental sync: lưu historyId + các message đã xử lý -> chạy lại trong tuần gần như không tốn gì
+GMAIL_INCREMENTAL = os.getenv("GMAIL_INCREMENTAL", "1") == "1"
+GMAIL_SYNC_PATH = os.getenv("GMAIL_SYNC_PATH", ".cache/gmail_sync.sqlite")
+
+@recorder.traced()
+def get_filtered_emails(service, max_results=10):
+    subjects = report_registry.subjects()
+
+    # One OR-query listing + batched, field-masked message fetches; email mới nhất của mỗi subject thắng
+    fetcher = GmailReportFetcher(service, extract_hyperlinks_from_html)
+    if GMAIL_INCREMENTAL:
+        sync_state = GmailSyncState(GMAIL_SYNC_PATH)
+        try:
+            links = IncrementalReportSync(fetcher, sync_state).sync_links(subjects, report_date, today,
+                                                                          max_results_per_subject=max_results)
+        finally:
+            sync_state.close()
+    else:
+        links = fetcher.fetch_links(subjects, report_date, today, max_results_per_subject=max_results)
+    print(f"📨 Gmail: {fetcher.round_trips} round trips")
+
+    return links
+
+# ==================================================================================================
+#                                         SETUP DOWNLOAD FUNCTION
+# ==================================================================================================
+# Download concurrency & retry settings
+DOWNLOAD_WORKERS = 6
+DOWNLOAD_MAX_RETRIES = 3
+DOWNLOAD_TIMEOUT = (10, 120)  # (connect, read) seconds
+DOWNLOAD_HOST_INTERVAL = 0.2  # seconds between two requests to the same host
+
+def report_ad_type(report_name):
+    report = report_registry.reports.get(report_name)
+    return report.ad_type if report else None
+
+def parse_report_content(content, content_type=None, report_name=''):
+    """Chuyển nội dung file báo cáo thành DataFrame (nhận dạng CSV/XLSX theo magic bytes, ép kiểu số ngay khi đọc)."""
+    from bluestars_report.report_parser import parse_report
+
+    df, stats = parse_report(content, content_type, report_ad_type(report_name or ''))
+    print(f"📄 {report_name}: {stats}")
+    return df
+
+# ==================================================================================================
+#                                         GMAIL CREDENTIALS AUTHENTICATION
+# ==================================================================================================
+load_dotenv('/.../credentials.env')
+
+EMAIL = os.getenv("EMAIL")
+PASSWORD = os.getenv("PASSWORD")
+TOTP_SECRET = os.getenv("TOTP_SECRET")
+
+# ==================================================================================================
+#                                         ACCESS LINKS AND DOWNLOAD FILES
+# ==================================================================================================
+def web_driver():
+    from selenium import webdriver
+
+    options = webdriver.ChromeOptions()
+    options.add_argument("--verbose")
+    options.add_argument('--no-sandbox')
+    options.add_argument('--headless')
+    options.add_argument('--disable-gpu')
+    options.add_argument("--window-size=1920, 1200")
+    options.add_argument('--disable-dev-shm-usage')
+    driver = webdriver.Chrome(options=options)
+    return driver
+
+# Encrypted cookie jar reused between runs -> chỉ mở Chrome khi session hết hạn
+SESSION_CACHE_PATH = os.getenv("SESSION_CACHE_PATH", ".cache/amazon_session.json")
+SESSION_CACHE_PASSPHRASE = os.getenv("SESSION_CACHE_KEY") or TOTP_SECRET
+
+session_cache = None
+
+def get_session_cache():
+    global session_cache
+    if session_cache is None:
+        from bluestars_report.session_cache import SessionCache
+
+        session_cache = SessionCache(SESSION_CACHE_PATH, SESSION_CACHE_PASSPHRASE)
+    return session_cache
+
+@recorder.traced()
+def selenium_login(first_report_link):
+    """Đăng nhập bằng Chrome headless và trả về requests.Session mang cookies."""
+    import pyotp
+    import requests
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.common.keys import Keys
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    driver = web_driver()
+    try:
+        wait = WebDriverWait(driver, 30)
+
+        # MỞ TRANG ĐĂNG NHẬP
+        driver.get(first_report_link)
+
+        # NHẬP EMAIL
+        email_input = wait.until(EC.element_to_be_clickable((By.ID, "ap_email")))
+        email_input.send_keys(EMAIL)
+        email_input.send_keys(Keys.RETURN)
+
+        # NHẬP MẬT KHẨU
+        password_input = wait.until(EC.element_to_be_clickable((By.ID, "ap_password")))
+        password_input.send_keys(PASSWORD)
+        password_input.send_keys(Keys.RETURN)
+
+        # NHẬP OTP
+        totp = pyotp.TOTP(TOTP_SECRET)
+        otp_code = totp.now()
+
+        otp_input = wait.until(EC.element_to_be_clickable((By.ID, "auth-mfa-otpcode")))
+        otp_input.send_keys(otp_code)
+        otp_input.send_keys(Keys.RETURN)
+
+        # CHỜ RỜI KHỎI LUỒNG ĐĂNG NHẬP
+        wait.until(EC.staleness_of(otp_input))
+        wait.until(lambda d: "/ap/" not in d.current_url)
+
+        # LẤY COOKIES ĐỂ SỬ DỤNG VỚI REQUESTS
+        session = requests.Session()
+        for cookie in driver.get_cookies():
+            session.cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain"), path=cookie.get("path", "/"))
+        return session
+    finally:
+        driver.quit()
+
+def open_report_session(links):
+    """Dùng lại session đã lưu nếu còn hợp lệ, nếu không thì đăng nhập bằng Chrome."""
+    if fixtures is not None and fixtures.replaying:
+        return fixtures.http_session()
+    first_report_link = next((link for link in links.values() if link), None)
+
+    session_cache = get_session_cache()
+    with recorder.span('open_report_session') as span:
+        session = session_cache.load()
+        if session is not None and session_cache.probe(session, first_report_link):
+            print("🍪 Dùng lại session đã lưu, bỏ qua đăng nhập Chrome")
+            span.record(cached=True)
+        else:
+            session = selenium_login(first_report_link)
+            session_cache.save(session)
+            span.record(cached=False)
+    return fixtures.http_session(session) if fixtures is not None else session
+
+def download_reports(links, session):
+    from bluestars_report.downloader import ReportDownloader
+
+    # TẢI SONG SONG CÁC BÁO CÁO (retry riêng các báo cáo bị lỗi)
+    downloader = ReportDownloader(session, parse_report_content, max_workers=DOWNLOAD_WORKERS,
+                                  max_retries=DOWNLOAD_MAX_RETRIES, timeout=DOWNLOAD_TIMEOUT,
+                                  min_host_interval=DOWNLOAD_HOST_INTERVAL, span=recorder.span)
+    download_outcomes = downloader.retry_failed(downloader.download_all(links))
+
+    dataframes = {}
+    for report_name, outcome in download_outcomes.items():
+        if outcome.ok:
+            dataframes[report_name] = outcome.df
+        else:
+            print(f"❌ Không thể đọc báo cáo {report_name}: {outcome.error}")
+    return dataframes
+
+# ==================================================================================================
+#                                         SKU CATALOG CACHE
+# ==================================================================================================
+SKU_CATALOG_URLS = report_registry.catalog_urls()
+
+# Snapshot revalidated once per run (ETag/Last-Modified -> 304); TTL = how long the daemon keeps a sheet in memory
+CATALOG_CACHE_DIR = os.getenv("CATALOG_CACHE_DIR", ".cache/sku_catalog")
+CATALOG_TTL_SECONDS = int(os.getenv("CATALOG_TTL_SECONDS", 6 * 3600))
+CATALOG_OFFLINE = os.getenv("CATALOG_OFFLINE") == "1"
+
+catalog_cache = None
+
+def get_catalog_cache():
+    global catalog_cache
+    if catalog_cache is None:
+        from bluestars_report.catalog_cache import CatalogCache
+
+        catalog_cache = CatalogCache(SKU_CATALOG_URLS, CATALOG_CACHE_DIR, ttl=CATALOG_TTL_SECONDS, offline=CATALOG_OFFLINE)
+    return catalog_cache
+
+# ==================================================================================================
+#                                         CAMPAIGN CLASSIFICATION RULES
+# ==================================================================================================
+# Ordered rule table per ad type -> Thêm Campaign Form mới trong file JSON/YAML, không cần sửa code
+CAMPAIGN_RULES_PATH = os.getenv("CAMPAIGN_RULES_PATH")  # None -> bluestars_report/campaign_rules.json
+
+campaign_classifier = None
+
+def get_campaign_classifier():
+    global campaign_classifier
+    if campaign_classifier is None:
+        from bluestars_report.campaign_rules import CampaignClassifier, load_rule_table
+
+        campaign_classifier = CampaignClassifier(load_rule_table(CAMPAIGN_RULES_PATH))
+    return campaign_classifier
+
+# SQLite memo theo (brand, ad type, campaign name): chỉ tên mới, hoặc khi catalog/rule table đổi, mới phải tra lại
+CAMPAIGN_MEMO_PATH = os.getenv("CAMPAIGN_MEMO_PATH", ".cache/campaign_memo.sqlite")
+
+campaign_resolver = None
+
+def get_campaign_resolver():
+    global campaign_resolver
+    if campaign_resolver is None:
+        from bluestars_report.campaign_memo import CampaignMemo, CampaignResolver
+
+        campaign_resolver = CampaignResolver(CampaignMemo(CAMPAIGN_MEMO_PATH), get_campaign_classifier())
+    return campaign_resolver
+
+# ==================================================================================================
+#                                         SETUP PROCESS DATAFRAME FUNCTION
+# ==================================================================================================
+def resolve_campaigns(campaign_names, df_name):
+    """SKU, Campaign Form và Cost Type cho từng campaign name khác nhau của báo cáo (qua memo)."""
+    report = report_registry[df_name]
+
+    # Shared per-run catalog (fetched at most once per brand)
+    product_id = get_catalog_cache().get(report.brand)
+    return get_campaign_resolver().resolve(report.brand, report.ad_type, campaign_names, product_id, run_key=RUN_KEY)
+
+def process_dataframe(df, df_name):
+    from bluestars_report.transform import process_report
+
+    return process_report(df, report_registry[df_name], resolve_campaigns(df['Campaign Name'], df_name))
+
+# Campaigns được phép không có SKU -> ignore_campaigns trong registry
+ignore_cases = report_registry.ignored_campaigns()
+
+# Transform song song: một process cho mỗi báo cáo (1 -> chạy tuần tự, tiện cho --profile)
+TRANSFORM_WORKERS = int(os.getenv("TRANSFORM_WORKERS", 0)) or None  # None -> one per CPU
+
+def transform_reports(dataframes):
+    """process_dataframe cho từng báo cáo; trả về các DataFrame đã làm sạch và campaigns chưa có SKU."""
+    from bluestars_report.transform import process_reports
+
+    campaign_resolver = get_campaign_resolver()
+    cleaned = {}
+
+    # Tra memo ở process chính (chỉ tên mới mới chạy SkuMatcher + rule table), worker chỉ trải kết quả ra từng dòng
+    with recorder.span('resolve_campaigns') as span:
+        hits, misses = campaign_resolver.hits, campaign_resolver.misses
+        jobs = [(df_name, df, report_registry[df_name], resolve_campaigns(df['Campaign Name'], df_name))
+                for df_name, df in dataframes.items()]
+        span.record(memo_hits=campaign_resolver.hits - hits, memo_misses=campaign_resolver.misses - misses)
+    print(f"🧠 Campaign memo: {campaign_resolver.hits - hits} tên có sẵn, {campaign_resolver.misses - misses} tên mới")
+
+    with recorder.span('process_reports', reports=len(jobs)) as fan_out:
+        # Một span process_dataframe cho mỗi báo cáo, đo (và --profile) ngay trong process chạy nó
+        for df_name, df_cleaned in process_reports(jobs, TRANSFORM_WORKERS, recorder):
+            fan_out.record(rows=len(df_cleaned))
+            cleaned[df_name] = df_cleaned
+
+    missing_reports = set(report_registry.reports) - set(cleaned)
+    if missing_reports:
+        raise RuntimeError(f"Thiếu báo cáo: {', '.join(sorted(missing_reports))}")
+
+    # Same order as the registry (and the export files)
+    cleaned = {df_name: cleaned[df_name] for df_name in report_registry.reports}
+    return cleaned, campaigns_without_sku()
+
+def campaigns_without_sku():
+    # Campaigns chưa có SKU = tên chưa resolve được trong memo mà tuần này có xuất hiện
+    campaigns_no_sku = {brand: set() for brand in report_registry.brands}
+    for brand, campaigns in get_campaign_resolver().memo.unresolved(RUN_KEY).items():
+        campaigns_no_sku.setdefault(brand, set()).update(campaigns)
+    return campaigns_no_sku
+
+def finish_combined(df_combined):
+    from bluestars_report.normalize import normalize_combined
+
+    df_combined[['Impressions', 'Clicks', 'Spend', 'Orders', 'Sales']] = df_combined[['Impressions', 'Clicks', 'Spend', 'Orders', 'Sales']].fillna(0)
+    df_combined = df_combined.drop(columns=['Product Number'])
+
+    # Cột text ít giá trị -> category: strip/fillna chỉ chạy trên các category, SKU trống vẫn là null
+    return normalize_combined(df_combined, fills={'Bidding strategy': "Dynamic bids - down only"})
+
+def combine_reports(cleaned):
+    import pandas as pd
+
+    df_combined = pd.concat(list(cleaned.values()))
+
+    with recorder.span('normalize_combined') as span:
+        df_combined, memory = finish_combined(df_combined)
+        span.record(rows=len(df_combined), **memory)
+    print(f"🧮 df_combined: {memory['memory_before_mb']:.1f} MB -> {memory['memory_after_mb']:.1f} MB")
+    return df_combined
+
+# ==================================================================================================
+#                                         SETUP EMAIL SENDING FUNCTION
+# ==================================================================================================
+sender_email = "khangnp.bluestars@gmail.com"
+receiver_emails = ["khangnguyenforwork@gmail.com", "duongnt.bluestars@gmail.com", "duybachduybach@gmail.com"]
+app_password = "ouia rgwy cuay baoi"
+
+# Máy chủ gửi mail; SMTP_HOST=127.0.0.1 SMTP_PORT=2525 SMTP_SSL=0 để gửi vào benchmarks/smtp_stub.py
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", 465))
+SMTP_SSL = os.getenv("SMTP_SSL", "1") != "0"
+# File zip lớn hơn giới hạn này được chia thành nhiều email (.zip.001, .002, ...); Gmail nhận tối đa 25 MB sau base64
+EMAIL_MAX_ATTACHMENT_MB = float(os.getenv("EMAIL_MAX_ATTACHMENT_MB", 18))
+
+def open_smtp():
+    if fixtures is not None and fixtures.replaying:
+        # --replay: không kết nối, email được ghi vào outbox
+        return fixtures.smtp()
+    server = (smtplib.SMTP_SSL if SMTP_SSL else smtplib.SMTP)(SMTP_HOST, SMTP_PORT)
+    return fixtures.smtp(server) if fixtures is not None else server
+
+# Một kết nối SMTP (TLS + login) cho mọi email của run, file đính kèm được encode dần từ đĩa
+mailer = Mailer(open_smtp, sender_email, app_password, max_attachment_bytes=int(EMAIL_MAX_ATTACHMENT_MB * 2**20))
+
+def send_email_with_attachment(subject, body, attachment_path=None):
+    # Thêm file đính kèm nếu có
+    if attachment_path and not os.path.exists(attachment_path):
+        print(f"File đính kèm không tồn tại: {attachment_path}")
+        attachment_path = None
+
+    try:
+        with recorder.span('send_email_with_attachment') as span:
+            sizes = mailer.send(receiver_emails, subject, body, attachment_path)
+            span.record(bytes=sum(sizes), parts=len(sizes), recipients=len(receiver_emails), connections=mailer.connections)
+        print("Email đã được gửi thành công!" if len(sizes) == 1 else f"Email đã được gửi thành công ({len(sizes)} phần)!")
+        return True
+    except Exception as e:
+        print(f"Lỗi khi gửi email: {e}")
+        return False
+
+# ==================================================================================================
+#                                         SEND EMAIL WITH ATTACHMENT OR ZIP
+# ==================================================================================================
+def build_missing_sku_details(campaigns_no_sku):
+    missing_sku_details = []
+
+    for brand, campaigns in campaigns_no_sku.items():
+        filtered_campaigns = set(campaigns) - ignore_cases.get(brand, set())
+
+        if filtered_campaigns:
+            detail = f"Brand {brand} có các campaigns sau chưa có SKU cập nhật:\n"
+            for campaign in sorted(filtered_campaigns):
+                detail += f"- {campaign}\n"
+            missing_sku_details.append(detail)
+
+    return missing_sku_details
+
+# Định dạng file trong zip: xlsx (mặc định), parquet hoặc csv.gz
+EXPORT_FORMAT = os.getenv("EXPORT_FORMAT", "xlsx")
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", 0)) or None  # None -> one per CPU
+
+def export_frame(df):
+    # SKU trống vẫn hiện chữ 'None' trong file Excel như trước
+    return df.assign(SKU=df['SKU'].astype(object).where(df['SKU'].notna(), 'None'))
+
+def rollup_files(rollup):
+    from bluestars_report.export import render_report, render_xlsx
+    from bluestars_report.rollup import ROLLUP_DIMENSIONS
+
+    # Bảng tổng hợp Brand > Market > Campaign Type > Campaign Form > SKU: sheet Summary + cube Parquet, nằm cạnh các báo cáo trong zip
+    file_stem = f"Weekly Summary {start_date_str} - {end_date_str}"
+    # Cube đọc lại từ checkpoint có dtype str -> đưa về object như cube của streaming, để file Parquet giống hệt
+    rollup = rollup.astype(dict.fromkeys(ROLLUP_DIMENSIONS, object))
+    return [(file_stem, render_xlsx(export_frame(rollup), sheet_name='Summary'), 'xlsx'),
+            (file_stem, render_report(rollup, 'parquet'), 'parquet')]
+
+def export_zip(cleaned, zip_file_name, rollup=None):
+    from bluestars_report.export import write_report_zip
+
+    # Render song song và ghi thẳng vào zip, không tạo file tạm
+    reports = {report_registry[df_key].file_name(start_date_str, end_date_str): export_frame(df)
+               for df_key, df in cleaned.items()}
+    extras = rollup_files(rollup) if rollup is not None else ()
+    return write_report_zip(zip_file_name, reports, export_format=EXPORT_FORMAT, workers=EXPORT_WORKERS, extras=extras)
+
+# ==================================================================================================
+#                                         PIPELINE STAGES & CHECKPOINTS
+# ==================================================================================================
+# Mỗi tuần báo cáo (RUN_KEY) có một thư mục run riêng; chạy lại sẽ tiếp tục từ stage chưa hoàn thành
+RUNS_DIR = os.getenv("RUNS_DIR", "runs")
+
+# Lịch sử df_combined theo tuần (Parquet, partition week/brand/market) cho phân tích xu hướng
+HISTORY_DIR = os.getenv("HISTORY_DIR", "history")
+
+def stage_fetch_links(checkpoints):
+    service = authenticate_gmail()
+    links = get_filtered_emails(service)
+
+    # Email chưa tới (hoặc lấy lỗi) -> không lưu checkpoint, lần chạy sau đọc lại hộp thư
+    missing_links = sorted(key for key, link in links.items() if not link)
+    if missing_links:
+        raise RuntimeError(f"Chưa có link báo cáo: {', '.join(missing_links)}")
+    checkpoints.save('fetch_links', data={'links': links})
+
+def stage_download(checkpoints):
+    links = checkpoints.load_data('fetch_links')['links']
+    session = open_report_session(links)
+    dataframes = download_reports(links, session)
+
+    failed_reports = set(links) - set(dataframes)
+    if failed_reports:
+        raise RuntimeError(f"Không tải được báo cáo: {', '.join(sorted(failed_reports))}")
+    checkpoints.save('download', frames=dataframes)
+
+def stage_transform(checkpoints):
+    cleaned, campaigns_no_sku = transform_reports(checkpoints.load_frames('download'))
+    checkpoints.save('transform', frames=cleaned,
+                     data={'campaigns_no_sku': {brand: sorted(campaigns) for brand, campaigns in campaigns_no_sku.items()}})
+
+def stage_combine(checkpoints):
+    from bluestars_report.rollup import build_rollup
+
+    df_combined = combine_reports(checkpoints.load_frames('transform'))
+    # Rollup lưu cùng checkpoint của tuần -> --from-stage export không phải tính lại
+    with recorder.span('build_rollup') as span:
+        rollup = build_rollup(df_combined)
+        span.record(rows=len(rollup))
+    checkpoints.save('combine', frames={'df_combined': df_combined, 'rollup': rollup})
+
+def stage_archive(checkpoints):
+    from bluestars_report.history_store import HistoryStore
+
+    df_combined = checkpoints.load_frames('combine')['df_combined']
+    # Ghi đè cả tuần -> chạy lại cùng tuần không bị nhân đôi dữ liệu
+    rows = HistoryStore(HISTORY_DIR).write_week(start_of_last_week.isoformat(), df_combined)
+    print(f"🗄️ Lưu {rows} dòng vào lịch sử tuần {start_of_last_week.isoformat()}")
+    checkpoints.save('archive', data={'week': start_of_last_week.isoformat(), 'rows': rows})
+
+def stage_export(checkpoints):
+    missing_sku_details = build_missing_sku_details(checkpoints.load_data('transform')['campaigns_no_sku'])
+    if missing_sku_details:
+        checkpoints.save('export', data={'missing_sku_details': missing_sku_details})
+        return
+
+    cleaned = checkpoints.load_frames('transform')
+    rollup = checkpoints.load_frame('combine', 'rollup')
+    if rollup is None:
+        from bluestars_report.rollup import build_rollup
+
+        # Checkpoint combine cũ, chưa có rollup
+        rollup = build_rollup(checkpoints.load_frame('combine', 'df_combined'))
+    with recorder.span('export_zip', format=EXPORT_FORMAT) as span:
+        zip_file_name = export_zip(cleaned, f"Weekly Marketing Data {start_date_str} - {end_date_str}.zip", rollup)
+        span.record(bytes=os.path.getsize(zip_file_name), rows=sum(len(df) for df in cleaned.values()))
+    checkpoints.save('export', data={'missing_sku_details': []}, files={'zip': zip_file_name})
+    os.remove(zip_file_name)
+
+def stage_send(checkpoints):
+    missing_sku_details = checkpoints.load_data('export')['missing_sku_details']
+
+    if missing_sku_details:
+        subject = "MISSING SKU FOR MULTIPLE BRANDS"
+        body = "Các brands sau có campaigns chưa được cập nhật SKU:\n\n" + "\n\n".join(missing_sku_details)
+        sent = send_email_with_attachment(subject, body, None)
+    else:
+        zip_file_name = checkpoints.restore_file('export', 'zip')
+        subject = f"Marketing Weekly Data Report {start_date_str} - {end_date_str}"
+        body = f"Marketing Weekly Data Report {start_date_str} - {end_date_str}"
+        try:
+            sent = send_email_with_attachment(subject, body, zip_file_name)
+        finally:
+            os.remove(zip_file_name)
+
+    if not sent:
+        raise RuntimeError("Gửi email thất bại, chạy lại để tiếp tục từ stage send")
+    checkpoints.save('send', data={'missing_sku': bool(missing_sku_details)})
+
+PIPELINE_STAGES = {
+    'fetch_links': stage_fetch_links,
+    'download': stage_download,
+    'transform': stage_transform,
+    'combine': stage_combine,
+    'archive': stage_archive,
+    'export': stage_export,
+    'send': stage_send,
+}
+
+# ==================================================================================================
+#                                         STREAMING MODE
+# ==================================================================================================
+# --stream: báo cáo được tải thẳng xuống đĩa rồi đọc lại từng block -> transform -> ghi ngay vào Excel + lịch sử,
+# RAM chỉ giữ một block của một báo cáo (không có df_combined trong bộ nhớ)
+STREAM_MEMORY_MB = int(os.getenv("STREAM_MEMORY_MB", 256))
+
+def spool_report_file(path, content_type=None, report_name=''):
+    """Kiểm tra file đã tải đọc được (block đầu tiên), chưa đọc cả báo cáo."""
+    from bluestars_report.report_parser import probe_report_file
+
+    report_file = probe_report_file(path, content_type, report_ad_type(report_name or ''))
+    print(f"📄 {report_name}: {report_file.format.upper()} {report_file.bytes / 2**20:.1f} MB (spool)")
+    return report_file
+
+def stage_spool(checkpoints):
+    from bluestars_report.downloader import ReportDownloader
+
+    links = checkpoints.load_data('fetch_links')['links']
+    session = open_report_session(links)
+    with tempfile.TemporaryDirectory() as spool_dir:
+        downloader = ReportDownloader(session, spool_report_file, max_workers=DOWNLOAD_WORKERS,
+                                      max_retries=DOWNLOAD_MAX_RETRIES, timeout=DOWNLOAD_TIMEOUT,
+                                      min_host_interval=DOWNLOAD_HOST_INTERVAL, span=recorder.span, spool_dir=spool_dir)
+        outcomes = downloader.retry_failed(downloader.download_all(links))
+
+        failed_reports = [name for name, outcome in outcomes.items() if not outcome.ok]
+        if failed_reports:
+            raise RuntimeError(f"Không tải được báo cáo: {', '.join(sorted(failed_reports))}")
+        checkpoints.save('spool', files={name: outcome.df.path for name, outcome in outcomes.items()},
+                         data={'content_types': {name: outcome.df.content_type for name, outcome in outcomes.items()}})
+
+def stage_stream(checkpoints):
+    """transform + archive + export theo từng block, xong mới biết có thiếu SKU hay không."""
+    from bluestars_report.export import XlsxSheetWriter, add_bytes_to_zip, add_file_to_zip
+    from bluestars_report.history_store import HistoryStore
+    from bluestars_report.rollup import RollupAccumulator
+    from bluestars_report.streaming import block_bytes_for_budget, stream_report
+    from bluestars_report.transform import OUTPUT_COLUMNS
+
+    if EXPORT_FORMAT != 'xlsx':
+        raise ValueError("Streaming mode chỉ hỗ trợ EXPORT_FORMAT=xlsx")
+    content_types = checkpoints.load_data('spool')['content_types']
+    block_bytes = block_bytes_for_budget(STREAM_MEMORY_MB)
+    zip_file_name = f"Weekly Marketing Data {start_date_str} - {end_date_str}.zip"
+    rollup = RollupAccumulator()
+
+    def archive_block(df):
+        df_finished = finish_combined(df)[0]
+        archive.write(df_finished)
+        rollup.add(df_finished)
+
+    with tempfile.TemporaryDirectory() as work_dir, \
+            HistoryStore(HISTORY_DIR).week_writer(start_of_last_week.isoformat()) as archive, \
+            zipfile.ZipFile(zip_file_name, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        for report in report_registry:
+            sheet_path = os.path.join(work_dir, report.key + '.xlsx')
+            sheet = XlsxSheetWriter(sheet_path, OUTPUT_COLUMNS)
+            with recorder.span('stream_report', report=report.key, block_bytes=block_bytes) as span:
+                # Sheet trước, lịch sử sau: finish_combined sửa trực tiếp block
+                rows = stream_report(checkpoints.file_path('spool', report.key), report,
+                                     lambda names: resolve_campaigns(names, report.key),
+                                     sinks=[lambda df: sheet.write(export_frame(df)), archive_block],
+                                     content_type=content_types.get(report.key), block_bytes=block_bytes)
+                sheet.close()
+                add_file_to_zip(zipf, sheet_path, report.file_name(start_date_str, end_date_str))
+                os.remove(sheet_path)
+                span.record(rows=rows)
+        for file_stem, payload, file_format in rollup_files(rollup.cube()):
+            add_bytes_to_zip(zipf, payload, file_stem, file_format)
+    print(f"🗄️ Lưu {archive.rows} dòng vào lịch sử tuần {start_of_last_week.isoformat()}")
+
+    missing_sku_details = build_missing_sku_details(campaigns_without_sku())
+    if missing_sku_details:
+        os.remove(zip_file_name)
+        checkpoints.save('export', data={'missing_sku_details': missing_sku_details})
+        return
+    checkpoints.save('export', data={'missing_sku_details': []}, files={'zip': zip_file_name})
+    os.remove(zip_file_name)
+
+STREAM_STAGES = {
+    'fetch_links': stage_fetch_links,
+    'spool': stage_spool,
+    'export': stage_stream,
+    'send': stage_send,
+}
+
+def run_pipeline(from_stage=None, stages=PIPELINE_STAGES):
+    checkpoints = RunCheckpoints(RUNS_DIR, RUN_KEY, stages, from_stage=from_stage)
+    if from_stage is None and checkpoints.is_complete('send') and checkpoints.load_data('send').get('missing_sku'):
+        # Lần trước chỉ gửi email thiếu SKU -> sheet có thể đã được sửa: giữ link + báo cáo đã tải, xử lý lại từ transform
+        redo_stage = 'transform' if 'transform' in stages else 'export'
+        print(f"🔁 Run {RUN_KEY} đã gửi email thiếu SKU, chạy lại từ stage {redo_stage}")
+        checkpoints.invalidate_from(redo_stage)
+    resume_stage = checkpoints.first_incomplete()
+    if resume_stage is None:
+        print(f"✅ Run {RUN_KEY} đã hoàn thành, dùng --from-stage để chạy lại")
+        return
+
+    stage_names = list(stages)
+    print(f"▶️ Run {RUN_KEY}: bắt đầu từ stage {resume_stage}")
+    for stage in stage_names[stage_names.index(resume_stage):]:
+        with recorder.span(stage):
+            stages[stage](checkpoints)
+
+# ==================================================================================================
+#                                         DAEMON MODE
+# ==================================================================================================
+# Xử lý từng báo cáo ngay khi email về; bước zip/email cuối tuần chỉ ghép các kết quả đã xử lý sẵn
+DAEMON_POLL_SECONDS = int(os.getenv("DAEMON_POLL_SECONDS", 300))
+DAEMON_MAILBOX = os.getenv("DAEMON_MAILBOX", "gmail")  # "gmail" hoặc "dir:<thư mục>" (mailbox giả, mỗi email là một file JSON)
+
+daemon_session = None
+
+def daemon_week():
+    set_report_week(datetime.now())
+    # Email báo cáo của tuần trước về từ đầu tuần này trở đi
+    return RUN_KEY, int(datetime.combine(start_of_week, datetime.min.time()).timestamp())
+
+def download_arrival(report_key, link):
+    """Tải một báo cáo bằng session giữ sẵn; session hết hạn thì đăng nhập lại một lần."""
+    global daemon_session
+    if link.startswith('file://'):
+        # Link của mailbox giả -> đọc thẳng từ đĩa
+        with open(urllib.request.url2pathname(link[len('file://'):]), 'rb') as f:
+            return parse_report_content(f.read(), report_name=report_key)
+
+    if daemon_session is None:
+        daemon_session = open_report_session({report_key: link})
+    dataframes = download_reports({report_key: link}, daemon_session)
+    if report_key not in dataframes and not get_session_cache().probe(daemon_session, link):
+        get_session_cache().clear()
+        daemon_session = open_report_session({report_key: link})
+        dataframes = download_reports({report_key: link}, daemon_session)
+    if report_key not in dataframes:
+        raise RuntimeError("Không tải được báo cáo")
+    return dataframes[report_key]
+
+def process_arrival(report_key, link):
+    raw = download_arrival(report_key, link)
+    with recorder.span('process_dataframe', report=report_key) as span:
+        cleaned = process_dataframe(raw.copy(), report_key)
+        span.record(rows=len(cleaned))
+
+    # Báo sớm campaigns thiếu SKU -> còn thời gian cập nhật catalog trước khi gửi báo cáo tuần
+    brand = report_registry[report_key].brand
+    missing_sku = campaigns_without_sku().get(brand, set()) - ignore_cases.get(brand, set())
+    if missing_sku:
+        print(f"⚠️ {brand}: {len(missing_sku)} campaigns chưa có SKU: {', '.join(sorted(missing_sku))}")
+    return raw, cleaned
+
+def assemble_week(inbox):
+    """Ghi checkpoint fetch_links/download/transform từ inbox rồi chạy tiếp pipeline (combine -> send).
+
+    True khi zip đã được gửi; False khi tuần chỉ mới có email thiếu SKU (daemon thử lại ở lần poll sau).
+    """
+    checkpoints = RunCheckpoints(RUNS_DIR, RUN_KEY, PIPELINE_STAGES)
+    alerted = None
+    if checkpoints.is_complete('send'):
+        if not checkpoints.load_data('send').get('missing_sku'):
+            print(f"✅ Run {RUN_KEY} đã được gửi trước đó")
+            return True
+        alerted = checkpoints.load_data('export')['missing_sku_details']
+
+    report_keys = list(report_registry.reports)
+
+    # Catalog có thể đã được cập nhật sau khi báo cáo về -> xử lý lại báo cáo của brand còn thiếu SKU
+    campaigns_no_sku = campaigns_without_sku()
+    stale_keys = [report_key for report_key in report_keys
+                  if campaigns_no_sku.get(report_registry[report_key].brand, set())
+                  - ignore_cases.get(report_registry[report_key].brand, set())]
+    reprocessed = {report_key: process_dataframe(df.copy(), report_key)
+                   for report_key, df in inbox.frames('raw', stale_keys).items()}
+    if alerted is not None and build_missing_sku_details(campaigns_without_sku()) == alerted:
+        # Vẫn thiếu đúng các SKU đã báo -> không gửi lại email, chờ sheet được sửa
+        return False
+
+    raw = inbox.frames('raw', report_keys)
+    cleaned = {**inbox.frames('cleaned', report_keys), **reprocessed}
+    checkpoints.save('fetch_links', data={'links': inbox.links()})
+    checkpoints.save('download', frames=raw)
+    checkpoints.save('transform', frames=cleaned,
+                     data={'campaigns_no_sku': {brand: sorted(campaigns) for brand, campaigns in campaigns_without_sku().items()}})
+    try:
+        with recorder.span('assemble_week', run_key=RUN_KEY):
+            run_pipeline()
+    finally:
+        # Tuần sau mới gửi tiếp: không giữ kết nối SMTP rảnh
+        mailer.close()
+    return not RunCheckpoints(RUNS_DIR, RUN_KEY, PIPELINE_STAGES).load_data('send')['missing_sku']
+
+def make_mailbox_watcher():
+    from bluestars_report.report_daemon import DirectoryMailbox, GmailWatcher
+
+    if DAEMON_MAILBOX.startswith('dir:'):
+        return DirectoryMailbox(DAEMON_MAILBOX[len('dir:'):])
+    fetcher = GmailReportFetcher(authenticate_gmail(), extract_hyperlinks_from_html)
+    return GmailWatcher(fetcher, GmailSyncState(GMAIL_SYNC_PATH))
+
+def run_daemon():
+    from bluestars_report.report_daemon import ReportDaemon
+
+    daemon = ReportDaemon(make_mailbox_watcher(), report_registry.subjects(), daemon_week,
+                          inbox_dir=lambda run_key: os.path.join(RUNS_DIR, run_key, 'inbox'),
+                          process=process_arrival, assemble=assemble_week,
+                          keep_warm=lambda: get_catalog_cache().warm({report.brand for report in report_registry}),
+                          poll_interval=DAEMON_POLL_SECONDS)
+    signal.signal(signal.SIGTERM, lambda signum, frame: daemon.stop())
+    print(f"👀 Daemon: theo dõi {DAEMON_MAILBOX}, poll mỗi {DAEMON_POLL_SECONDS}s")
+    try:
+        daemon.run_forever()
+    except KeyboardInterrupt:
+        print("🛑 Daemon dừng")
+
+# ==================================================================================================
+#                                         RECORD / REPLAY
+# ==================================================================================================
+# --record: chạy thật và ghi lại Gmail API, file báo cáo, catalog và email gửi đi vào một fixture bundle
+# --replay: chạy lại bundle đó hoàn toàn offline (không OAuth, không Chrome, không SMTP) -> nhanh, lặp lại được
+fixtures = None
+
+def use_fixtures(mode, bundle_path):
+    """Chuyển Gmail / session tải báo cáo / catalog / SMTP sang bundle; trạng thái run ghi vào thư mục tạm."""
+    global fixtures, catalog_cache, campaign_resolver, RUNS_DIR, HISTORY_DIR, GMAIL_SYNC_PATH, DOWNLOAD_HOST_INTERVAL
+    import requests
+    from bluestars_report.campaign_memo import CampaignMemo, CampaignResolver
+    from bluestars_report.catalog_cache import CatalogCache
+    from bluestars_report.replay import FixtureBundle
+
+    work_dir = tempfile.mkdtemp(prefix=f"bluestars-{mode}-")
+    fixtures = FixtureBundle(bundle_path, mode, outbox_dir=os.path.join(work_dir, 'outbox'))
+
+    # Cùng đồng hồ với lúc ghi -> cùng tuần báo cáo và cùng Gmail query
+    set_report_week(fixtures.now)
+    # Không đụng checkpoints, lịch sử, sync state, memo và catalog snapshot của các run thật
+    RUNS_DIR = os.path.join(work_dir, 'runs')
+    HISTORY_DIR = os.path.join(work_dir, 'history')
+    GMAIL_SYNC_PATH = ':memory:'
+    if fixtures.replaying:
+        # Host giả không cần giãn cách request
+        DOWNLOAD_HOST_INTERVAL = 0
+    campaign_resolver = CampaignResolver(CampaignMemo(':memory:'), get_campaign_classifier())
+    catalog_cache = CatalogCache(SKU_CATALOG_URLS, os.path.join(work_dir, 'sku_catalog'), ttl=CATALOG_TTL_SECONDS,
+                                 session=fixtures.http_session(None if fixtures.replaying else requests.Session()))
+    print(f"🎞️ {mode}: bundle {bundle_path}, tuần {RUN_KEY}, thư mục run {work_dir}")
+
+def close_fixtures():
+    fixtures.save()
+    if fixtures.replaying:
+        differences = fixtures.outbox_differences()
+        if differences:
+            print("⚠️ Email gửi đi khác bản ghi:\n" + "\n".join(differences))
+        print(f"📤 Replay: {len(fixtures.sent)} email trong {fixtures.outbox_dir}")
+    else:
+        print(f"🎞️ Đã ghi bundle {fixtures.path}")
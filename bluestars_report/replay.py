@@ -0,0 +1,331 @@
+# ==================================================================================================
+#                                         RECORD / REPLAY FIXTURES
+# ==================================================================================================
+"""Record a live run's traffic into a fixture bundle and replay it offline.
+
+A bundle is a directory: ``manifest.json`` (format version, the recording
+clock, Gmail API responses keyed by method + parameters, HTTP responses keyed
+by ``GET url``, the outgoing emails) and ``bodies/<sha256>`` holding HTTP
+bodies and MIME messages. Responses are kept in call order per key and
+replayed in the same order, the last one repeating (retries, probes). Cookies
+and auth headers of HTTP responses are never written to the bundle.
+
+``FixtureBundle.gmail_service`` / ``http_session`` / ``smtp`` wrap the live
+objects when recording and return local stand-ins when replaying: a
+discovery-client look-alike (``users().messages().list(...)``, batch
+requests), a ``requests.Session`` look-alike returning real
+``requests.Response`` objects, and an SMTP server that writes the messages
+to an outbox instead of sending them.
+"""
+import email.parser
+import hashlib
+import json
+import os
+import threading
+import time
+import types
+from datetime import datetime
+
+import requests
+from requests.cookies import RequestsCookieJar
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+FIXTURE_VERSION = 1
+FIXTURE_MODES = ('record', 'replay')
+
+# Response headers that carry session credentials; replay needs none of them
+SECRET_HEADERS = frozenset({'set-cookie', 'set-cookie2', 'authorization', 'proxy-authorization', 'www-authenticate',
+                            'x-amz-security-token'})
+
+# The part of the Gmail discovery client the pipeline calls
+GMAIL_RESOURCES = ('users', 'messages', 'history')
+GMAIL_METHODS = ('list', 'get', 'getProfile')
+
+
+class FixtureMissError(KeyError):
+    """A replayed run made a request that is not in the bundle (the pipeline changed its calls)."""
+
+
+class ReplayHttpError(Exception):
+    """Recorded Gmail API error; ``resp.status`` like ``googleapiclient.errors.HttpError``."""
+
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.resp = types.SimpleNamespace(status=status)
+
+
+def _request_key(method, params):
+    return json.dumps([method, params], sort_keys=True, default=str)
+
+
+class FixtureBundle:
+    def __init__(self, path, mode, outbox_dir=None):
+        if mode not in FIXTURE_MODES:
+            raise ValueError(f"Unknown fixture mode {mode}; choose one of {FIXTURE_MODES}")
+        self.path = path
+        self.mode = mode
+        self.outbox_dir = outbox_dir
+        self.manifest_path = os.path.join(path, 'manifest.json')
+        self.body_dir = os.path.join(path, 'bodies')
+        self.sent = []
+        self._cursors = {}
+        self._lock = threading.Lock()
+
+        if mode == 'record':
+            os.makedirs(self.body_dir, exist_ok=True)
+            self.manifest = {'version': FIXTURE_VERSION, 'recorded_at': time.time(),
+                             'now': datetime.now().isoformat(), 'gmail': {}, 'http': {}, 'smtp': []}
+        else:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                self.manifest = json.load(f)
+            if self.manifest.get('version') != FIXTURE_VERSION:
+                raise ValueError(f"Fixture bundle {path} has version {self.manifest.get('version')}, "
+                                 f"expected {FIXTURE_VERSION}; record it again")
+
+    @property
+    def replaying(self):
+        return self.mode == 'replay'
+
+    @property
+    def now(self):
+        """Clock of the recorded run: replay uses it so the report week (and the Gmail queries) match."""
+        return datetime.fromisoformat(self.manifest['now'])
+
+    def save(self):
+        if self.replaying:
+            return
+        with self._lock:
+            with open(self.manifest_path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(self.manifest, f, ensure_ascii=False, indent=1)
+            os.replace(self.manifest_path + '.tmp', self.manifest_path)
+
+    def _store_body(self, payload):
+        digest = hashlib.sha256(payload).hexdigest()
+        path = os.path.join(self.body_dir, digest)
+        if not os.path.exists(path):
+            with open(path + '.tmp', 'wb') as f:
+                f.write(payload)
+            os.replace(path + '.tmp', path)
+        return digest
+
+    def _read_body(self, digest):
+        with open(os.path.join(self.body_dir, digest), 'rb') as f:
+            return f.read()
+
+    def _record(self, kind, key, entry):
+        with self._lock:
+            self.manifest[kind].setdefault(key, []).append(entry)
+
+    def _next(self, kind, key):
+        with self._lock:
+            entries = self.manifest[kind].get(key)
+            if not entries:
+                raise FixtureMissError(f"Not in fixture bundle {self.path}: {kind} {key}")
+            index = self._cursors.get((kind, key), 0)
+            self._cursors[(kind, key)] = index + 1
+            return entries[min(index, len(entries) - 1)]
+
+    def record_gmail(self, key, response=None, error=None):
+        if error is not None:
+            status = getattr(getattr(error, 'resp', None), 'status', None)
+            self._record('gmail', key, {'error': str(error), 'status': status})
+        else:
+            self._record('gmail', key, {'response': response})
+
+    def gmail_response(self, key):
+        entry = self._next('gmail', key)
+        if 'error' in entry:
+            raise ReplayHttpError(entry['error'], entry['status'])
+        return entry['response']
+
+    def gmail_service(self, service=None):
+        """Recording wrapper around ``service``, or the replay stand-in when replaying."""
+        return _GmailResource(self, (), None if self.replaying else service)
+
+    def record_http(self, url, response):
+        headers = {name: value for name, value in response.headers.items() if name.lower() not in SECRET_HEADERS}
+        entry = {'status': response.status_code, 'url': response.url, 'headers': headers,
+                 'body': self._store_body(response.content)}
+        self._record('http', f"GET {url}", entry)
+
+    def http_response(self, url):
+        entry = self._next('http', f"GET {url}")
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.url = entry['url']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.encoding = get_encoding_from_headers(response.headers) or 'utf-8'
+        response.reason = 'Replayed'
+        # Body already "consumed": iter_content() slices it, close() has no connection to release
+        response._content = self._read_body(entry['body'])
+        response._content_consumed = True
+        return response
+
+    def http_session(self, session=None):
+        return _HttpSession(self, None if self.replaying else session)
+
+    def record_sent(self, from_addr, to_addrs, message):
+        payload = message.encode('utf-8') if isinstance(message, str) else bytes(message)
+        entry = {'from': from_addr, 'to': list(to_addrs) if not isinstance(to_addrs, str) else [to_addrs],
+                 'subject': _subject(payload), 'bytes': len(payload)}
+        if self.replaying:
+            # Replay never writes into the bundle: messages go to the outbox
+            self.sent.append(entry)
+            if self.outbox_dir:
+                os.makedirs(self.outbox_dir, exist_ok=True)
+                with open(os.path.join(self.outbox_dir, f"{len(self.sent):03d}.eml"), 'wb') as f:
+                    f.write(payload)
+        else:
+            entry['body'] = self._store_body(payload)
+            with self._lock:
+                self.manifest['smtp'].append(entry)
+
+    def smtp(self, server=None):
+        return _SmtpServer(self, None if self.replaying else server)
+
+    def outbox_differences(self):
+        """Subjects sent during replay vs the recorded ones; empty when they match."""
+        recorded = [entry['subject'] for entry in self.manifest['smtp']]
+        replayed = [entry['subject'] for entry in self.sent]
+        if recorded == replayed:
+            return []
+        return [f"recorded {recorded}", f"replayed {replayed}"]
+
+
+def _subject(payload):
+    return email.parser.BytesHeaderParser().parsebytes(payload).get('Subject', '')
+
+
+class _GmailResource:
+    """``users()``, ``messages()``, ``history()`` return resources; ``list/get/getProfile(...)`` build requests."""
+
+    def __init__(self, bundle, path, resource):
+        self._bundle = bundle
+        self._path = path
+        self._resource = resource
+
+    def __getattr__(self, name):
+        if name not in GMAIL_RESOURCES + GMAIL_METHODS:
+            raise AttributeError(name)
+        live = getattr(self._resource, name) if self._resource is not None else None
+        if name in GMAIL_RESOURCES:
+            return lambda: _GmailResource(self._bundle, self._path + (name,), live() if live else None)
+
+        def method(**params):
+            key = _request_key('.'.join(self._path + (name,)), params)
+            return _GmailRequest(self._bundle, key, live(**params) if live else None)
+        return method
+
+    def new_batch_http_request(self, callback=None):
+        return _GmailBatch(self._bundle, self._resource, callback)
+
+
+class _GmailRequest:
+    def __init__(self, bundle, key, request):
+        self.bundle = bundle
+        self.key = key
+        self.request = request
+
+    def execute(self):
+        if self.request is None:
+            return self.bundle.gmail_response(self.key)
+        try:
+            response = self.request.execute()
+        except Exception as e:
+            self.bundle.record_gmail(self.key, error=e)
+            raise
+        self.bundle.record_gmail(self.key, response)
+        return response
+
+
+class _GmailBatch:
+    def __init__(self, bundle, service, callback):
+        self.bundle = bundle
+        self.callback = callback
+        self.requests = {}
+        self.batch = service.new_batch_http_request(callback=self._on_response) if service is not None else None
+
+    def add(self, request, request_id=None):
+        request_id = request_id or str(len(self.requests) + 1)
+        self.requests[request_id] = request
+        if self.batch is not None:
+            self.batch.add(request.request, request_id=request_id)
+
+    def _on_response(self, request_id, response, exception):
+        key = self.requests[request_id].key
+        if exception is not None:
+            self.bundle.record_gmail(key, error=exception)
+        else:
+            self.bundle.record_gmail(key, response)
+        if self.callback is not None:
+            self.callback(request_id, response, exception)
+
+    def execute(self):
+        if self.batch is not None:
+            return self.batch.execute()
+        for request_id, request in self.requests.items():
+            try:
+                response, exception = self.bundle.gmail_response(request.key), None
+            except ReplayHttpError as e:
+                response, exception = None, e
+            if self.callback is not None:
+                self.callback(request_id, response, exception)
+
+
+class _HttpSession:
+    """The ``requests.Session`` surface the downloader, session probe and catalog cache use."""
+
+    def __init__(self, bundle, session):
+        self.bundle = bundle
+        self.session = session
+        self.cookies = session.cookies if session is not None else RequestsCookieJar()
+        self.headers = session.headers if session is not None else CaseInsensitiveDict()
+
+    def mount(self, prefix, adapter):
+        if self.session is not None:
+            self.session.mount(prefix, adapter)
+
+    def get(self, url, **kwargs):
+        if self.session is None:
+            return self.bundle.http_response(url)
+        response = self.session.get(url, **kwargs)
+        # Read in full (even stream=True): the caller then iterates over the cached body
+        with response:
+            self.bundle.record_http(url, response)
+        return response
+
+    def close(self):
+        if self.session is not None:
+            self.session.close()
+
+
+class _SmtpServer:
+    def __init__(self, bundle, server):
+        self.bundle = bundle
+        self.server = server
+
+    def __enter__(self):
+        if self.server is not None:
+            self.server.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.server is not None:
+            return self.server.__exit__(*exc_info)
+        return False
+
+    def login(self, user, password):
+        if self.server is not None:
+            return self.server.login(user, password)
+        return 235, b'Replayed'
+
+    def sendmail(self, from_addr, to_addrs, msg, *args, **kwargs):
+        self.bundle.record_sent(from_addr, to_addrs, msg)
+        if self.server is not None:
+            return self.server.sendmail(from_addr, to_addrs, msg, *args, **kwargs)
+        return {}
+
+    def quit(self):
+        if self.server is not None:
+            return self.server.quit()
@@ -0,0 +1,236 @@
+# ==================================================================================================
+#                                         REPORT DAEMON
+# ==================================================================================================
+"""Process each report as soon as its email arrives instead of once a week.
+
+``ReportDaemon`` asks a mailbox watcher for the newest report link of every
+subject, downloads and cleans the reports whose link it has not seen yet, and
+parks the raw and cleaned frames in a per-week ``ReportInbox`` (under the run
+directory, so a restarted daemon picks up where it stopped). Once every report
+of the week is in, the ``assemble`` callback builds the bundle from the inbox.
+
+A watcher only has to implement ``poll(subjects, after)`` -> ``{report key:
+link}`` and ``wait(timeout)``. ``GmailWatcher`` polls through the incremental
+Gmail sync (one history call when nothing changed); ``DirectoryMailbox`` is a
+local mailbox made of JSON files, used to run the daemon without Gmail.
+"""
+import abc
+import glob
+import json
+import os
+import pickle
+import threading
+import time
+import uuid
+from io import BytesIO
+
+import pandas as pd
+
+from bluestars_report.gmail_reports import match_subject
+from bluestars_report.gmail_sync import IncrementalReportSync
+
+FRAME_KINDS = ('raw', 'cleaned')
+
+
+class MailboxWatcher(abc.ABC):
+    """Base watcher: ``wait`` sleeps for the poll interval unless ``wake`` is called."""
+
+    def __init__(self):
+        self._wake = threading.Event()
+
+    @abc.abstractmethod
+    def poll(self, subjects, after):
+        """``{report key: newest link}`` among the report emails received since ``after`` (epoch seconds)."""
+
+    def wait(self, timeout):
+        self._wake.wait(timeout)
+        self._wake.clear()
+
+    def wake(self):
+        self._wake.set()
+
+
+class GmailWatcher(MailboxWatcher):
+    def __init__(self, fetcher, state):
+        super().__init__()
+        self.sync = IncrementalReportSync(fetcher, state)
+
+    def poll(self, subjects, after):
+        # before = ngày mai: daemon chạy liên tục nên email hôm nay cũng phải được tìm thấy
+        before = (pd.Timestamp.now().normalize() + pd.Timedelta(days=1)).date()
+        return self.sync.sync_links(subjects, after, before)
+
+
+class DirectoryMailbox(MailboxWatcher):
+    """Local mailbox: every ``*.json`` file in ``path`` is one email ``{subject, link, received_at}``."""
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def deliver(self, subject, link, received_at=None):
+        message = {'subject': subject, 'link': link, 'received_at': received_at or time.time()}
+        file_name = os.path.join(self.path, f"{time.time_ns()}-{uuid.uuid4().hex[:8]}.json")
+        with open(file_name + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(message, f)
+        os.replace(file_name + '.tmp', file_name)
+        self.wake()
+
+    def poll(self, subjects, after):
+        newest = {}
+        for file_name in glob.glob(os.path.join(self.path, '*.json')):
+            try:
+                with open(file_name, 'r', encoding='utf-8') as f:
+                    message = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Bỏ qua email lỗi {file_name}: {e}")
+                continue
+            subject = match_subject(message.get('subject', ''), subjects)
+            received_at = message.get('received_at') or os.path.getmtime(file_name)
+            if subject is None or not message.get('link') or (after is not None and received_at < after):
+                continue
+            key = subjects[subject]
+            if key not in newest or (received_at, file_name) > newest[key][:2]:
+                newest[key] = (received_at, file_name, message['link'])
+        return {key: link for key, (_, _, link) in newest.items()}
+
+
+class ReportInbox:
+    """Reports of one week that are already downloaded and cleaned, kept on disk."""
+
+    def __init__(self, path):
+        self.path = path
+        self.manifest_path = os.path.join(path, 'inbox.json')
+        os.makedirs(path, exist_ok=True)
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        except (OSError, ValueError):
+            self.manifest = {'reports': {}, 'assembled_at': None}
+
+    def _write_manifest(self):
+        with open(self.manifest_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+        os.replace(self.manifest_path + '.tmp', self.manifest_path)
+
+    def _write_frame(self, name, df):
+        buffer = BytesIO()
+        try:
+            df.to_parquet(buffer, index=False)
+            file_name = name + '.parquet'
+        except (ImportError, ValueError, TypeError):
+            # Mixed-type object columns (e.g. from XLSX) cannot always go to Parquet
+            buffer = BytesIO(pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL))
+            file_name = name + '.pkl'
+        with open(os.path.join(self.path, file_name + '.tmp'), 'wb') as f:
+            f.write(buffer.getvalue())
+        os.replace(os.path.join(self.path, file_name + '.tmp'), os.path.join(self.path, file_name))
+        return file_name
+
+    def _read_frame(self, file_name):
+        path = os.path.join(self.path, file_name)
+        if file_name.endswith('.parquet'):
+            return pd.read_parquet(path)
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    def link(self, key):
+        entry = self.manifest['reports'].get(key)
+        return entry['link'] if entry else None
+
+    def links(self):
+        return {key: entry['link'] for key, entry in self.manifest['reports'].items()}
+
+    def put(self, key, link, raw, cleaned):
+        entry = {'link': link, 'processed_at': time.time(), 'rows': len(cleaned)}
+        for kind, df in zip(FRAME_KINDS, (raw, cleaned)):
+            entry[kind] = self._write_frame(f"{key}.{kind}", df)
+        self.manifest['reports'][key] = entry
+        self._write_manifest()
+
+    def frames(self, kind, keys=None):
+        keys = list(self.manifest['reports']) if keys is None else keys
+        return {key: self._read_frame(self.manifest['reports'][key][kind]) for key in keys}
+
+    def missing(self, keys):
+        return [key for key in keys if key not in self.manifest['reports']]
+
+    @property
+    def assembled(self):
+        return self.manifest['assembled_at'] is not None
+
+    def mark_assembled(self):
+        self.manifest['assembled_at'] = time.time()
+        self._write_manifest()
+
+
+class ReportDaemon:
+    """Watch the mailbox and process reports one by one as their emails arrive.
+
+    ``week()`` -> ``(run key, after)`` names the report week and the earliest
+    email time that belongs to it; ``process(key, link)`` -> ``(raw df, cleaned
+    df)``; ``assemble(inbox)`` builds and sends the weekly bundle and returns
+    whether it was sent (False after a missing-SKU alert: it runs again on the
+    next poll, once the catalog may have been fixed);
+    ``keep_warm()`` runs on every cycle (catalog refresh and the like).
+    """
+
+    def __init__(self, watcher, subjects, week, inbox_dir, process, assemble, keep_warm=None, poll_interval=300):
+        self.watcher = watcher
+        self.subjects = subjects
+        self.week = week
+        self.inbox_dir = inbox_dir
+        self.process = process
+        self.assemble = assemble
+        self.keep_warm = keep_warm
+        self.poll_interval = poll_interval
+        self.stop_event = threading.Event()
+        self.inbox = None
+
+    def stop(self):
+        self.stop_event.set()
+        self.watcher.wake()
+
+    def run_once(self):
+        """One poll: process new report emails, assemble when the week is complete. Returns processed keys."""
+        run_key, after = self.week()
+        if self.inbox is None or self.inbox.path != self.inbox_dir(run_key):
+            self.inbox = ReportInbox(self.inbox_dir(run_key))
+            print(f"📬 Daemon: tuần {run_key}, đã có {len(self.inbox.links())}/{len(self.subjects)} báo cáo")
+
+        if self.keep_warm is not None:
+            self.keep_warm()
+
+        processed = []
+        for key, link in self.watcher.poll(self.subjects, after).items():
+            if not link or self.inbox.link(key) == link:
+                continue
+            if self.inbox.assembled:
+                print(f"⚠️ {key}: email mới sau khi tuần {run_key} đã gửi, bỏ qua (dùng --from-stage để chạy lại)")
+                continue
+            try:
+                raw, cleaned = self.process(key, link)
+            except Exception as e:
+                # Link giữ nguyên -> lần poll sau sẽ thử lại
+                print(f"❌ {key}: {e}")
+                continue
+            self.inbox.put(key, link, raw, cleaned)
+            processed.append(key)
+            print(f"📥 {key}: {len(cleaned)} dòng đã xử lý")
+
+        missing = self.inbox.missing(self.subjects.values())
+        if not missing and not self.inbox.assembled:
+            if self.assemble(self.inbox):
+                self.inbox.mark_assembled()
+        elif processed and missing:
+            print(f"⏳ Còn chờ {len(missing)} báo cáo: {', '.join(missing)}")
+        return processed
+
+    def run_forever(self):
+        while not self.stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"❌ Daemon: {type(e).__name__}: {e}")
+            self.watcher.wait(self.poll_interval)
@@ -0,0 +1,299 @@
+# ==================================================================================================
+#                                         REPORT PARSER
+# ==================================================================================================
+"""Parse downloaded Amazon Ads reports straight from the response bytes.
+
+The format is sniffed from magic bytes (falling back to the Content-Type header)
+instead of trying CSV and catching the failure. CSV is read by the pyarrow CSV
+reader over a zero-copy buffer with explicit column types: the numeric columns
+each ad type needs are typed inside Arrow (currency symbols and thousands
+separators stripped there) and every other column is kept as text, so
+``process_dataframe`` receives floats/ints rather than strings to clean.
+Without pyarrow the pandas C parser is used with the same typing rules.
+Rows with too many fields are skipped either way (``on_bad_lines='skip'``), and
+counted; a short row is kept with NaN in the missing cells, which only pandas
+can do, so a CSV that has one is read by pandas.
+
+``iter_report_chunks`` reads a report spooled to disk in blocks of a given
+size instead (streaming mode), typing every block exactly like ``parse_report``.
+"""
+import csv
+import os
+import time
+import warnings
+from dataclasses import dataclass
+from io import BytesIO
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+except ImportError:  # pragma: no cover - pyarrow is optional
+    pa = None
+
+# Enough of the file to sniff the format and read the CSV header
+HEAD_BYTES = 1 << 16
+# Excel sheets cannot be read in blocks: parsed whole, then handed out in slices of this many rows
+EXCEL_CHUNK_ROWS = 50_000
+# Rows per chunk when a streamed CSV has to be finished by pandas (short rows)
+PANDAS_CHUNK_ROWS = 50_000
+
+XLSX_MAGIC = b'PK\x03\x04'
+XLS_MAGIC = b'\xd0\xcf\x11\xe0'
+
+# Same characters the old string cleaning removed: [CA|US|\$|,]
+MONEY_NOISE = r'[CAUS$,|]'
+
+_COMMON_COLUMN_TYPES = {
+    'Impressions': 'count',
+    'Clicks': 'count',
+    'Budget': 'money',
+    'Spend': 'money',
+    'Cost Per Click (CPC)': 'money',
+}
+
+# Raw Amazon column headers -> how they are typed at parse time
+REPORT_COLUMN_TYPES = {
+    'SP': {**_COMMON_COLUMN_TYPES, '7 Day Total Orders (#)': 'count', '7 Day Total Sales': 'money'},
+    'SB': {**_COMMON_COLUMN_TYPES, '14 Day Total Orders (#)': 'count', '14 Day Total Sales': 'money'},
+    'SD': {**_COMMON_COLUMN_TYPES, '14 Day Total Orders (#)': 'count', '14 Day Total Sales': 'money'},
+}
+
+
+@dataclass
+class ParseStats:
+    format: str
+    rows: int
+    seconds: float
+    input_bytes: int
+    peak_bytes: int
+    skipped_rows: int = 0
+
+    def __str__(self):
+        skipped = f", bỏ qua {self.skipped_rows} dòng thừa cột" if self.skipped_rows else ""
+        return (f"{self.format.upper()} {self.rows} dòng, {self.seconds:.2f}s, "
+                f"input {self.input_bytes / 2**20:.1f} MB, peak ~{self.peak_bytes / 2**20:.1f} MB{skipped}")
+
+
+class InvalidRows:
+    """``invalid_row_handler`` for the Arrow CSV reader: skips the row and counts why."""
+
+    def __init__(self):
+        self.skipped = 0  # too many fields: pandas skips them too
+        self.short = 0    # too few fields: pandas keeps them, Arrow cannot
+
+    def __call__(self, row):
+        if row.actual_columns < row.expected_columns:
+            self.short += 1
+        else:
+            self.skipped += 1
+        return 'skip'
+
+
+def sniff_format(content, content_type=None):
+    head = bytes(content[:8])
+    if head.startswith(XLSX_MAGIC):
+        return 'xlsx'
+    if head.startswith(XLS_MAGIC):
+        return 'xls'
+    content_type = (content_type or '').lower()
+    if 'spreadsheetml' in content_type:
+        return 'xlsx'
+    if 'ms-excel' in content_type:
+        return 'xls'
+    return 'csv'
+
+
+def _type_arrow_column(column, kind):
+    if pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+        pattern = MONEY_NOISE if kind == 'money' else ','
+        column = pc.replace_substring_regex(column, pattern=pattern, replacement='')
+        column = pc.if_else(pc.equal(column, ''), pa.scalar(None, column.type), column)
+    target = pa.float64() if kind == 'money' else pa.int64()
+    try:
+        return pc.cast(column, target)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        return pc.cast(column, pa.float64())
+
+
+def _csv_header(content):
+    first_line = bytes(content[:content.find(b'\n') if b'\n' in content else len(content)])
+    return next(csv.reader([first_line.decode('utf-8-sig').rstrip('\r')]), [])
+
+
+def _read_csv_arrow(content, column_types):
+    """Return ``(df, arrow bytes, InvalidRows)``; ``df`` is None when a short row was dropped."""
+    # Everything outside the typed columns stays text, as pandas left it (no date inference)
+    arrow_types = {name: pa.string() for name in _csv_header(content) if name.strip() not in column_types}
+    invalid = InvalidRows()
+    table = pa_csv.read_csv(
+        pa.BufferReader(pa.py_buffer(content)),
+        parse_options=pa_csv.ParseOptions(delimiter=',', invalid_row_handler=invalid),
+        convert_options=pa_csv.ConvertOptions(column_types=arrow_types, strings_can_be_null=True),
+    )
+    if invalid.short:
+        return None, table.nbytes, invalid
+    for index, name in enumerate(table.column_names):
+        kind = column_types.get(name.strip())
+        if kind:
+            table = table.set_column(index, name, _type_arrow_column(table.column(index), kind))
+    arrow_bytes = table.nbytes
+    df = table.to_pandas(split_blocks=True, self_destruct=True)
+    return df, arrow_bytes, invalid
+
+
+def _read_csv_pandas(content, column_types):
+    """Return ``(df, rows skipped for having too many fields)`` read by the pandas C parser."""
+    # 'warn' skips like 'skip' but reports every line it drops, so they can be counted
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always', pd.errors.ParserWarning)
+        df = pd.read_csv(BytesIO(content), on_bad_lines='warn', delimiter=',', encoding='utf-8')
+    skipped = sum(str(warning.message).count('Skipping line') for warning in caught)
+    return _type_pandas_frame(df, column_types), skipped
+
+
+def _type_pandas_frame(df, column_types):
+    for name in df.columns:
+        kind = column_types.get(str(name).strip())
+        if not kind:
+            continue
+        column = df[name]
+        if not pd.api.types.is_numeric_dtype(column):
+            pattern = MONEY_NOISE if kind == 'money' else ','
+            column = column.astype(str).str.replace(pattern, '', regex=True)
+        column = pd.to_numeric(column, errors='coerce')
+        if kind == 'count' and column.notna().all() and (column % 1 == 0).all():
+            column = column.astype('int64')
+        df[name] = column
+    return df
+
+
+def parse_report(content, content_type=None, ad_type=None):
+    """Return ``(DataFrame, ParseStats)`` for a downloaded report."""
+    start = time.perf_counter()
+    column_types = REPORT_COLUMN_TYPES.get(ad_type, {})
+    report_format = sniff_format(content, content_type)
+    staging_bytes = 0
+    skipped_rows = 0
+
+    if report_format == 'csv' and pa is not None:
+        df, staging_bytes, invalid = _read_csv_arrow(content, column_types)
+        skipped_rows = invalid.skipped
+        if df is None:
+            # Short rows: only pandas keeps them (NaN in the missing cells)
+            df, skipped_rows = _read_csv_pandas(content, column_types)
+    elif report_format == 'csv':
+        df, skipped_rows = _read_csv_pandas(content, column_types)
+    else:
+        df = _type_pandas_frame(pd.read_excel(BytesIO(content), engine='openpyxl' if report_format == 'xlsx' else None), column_types)
+
+    stats = ParseStats(
+        format=report_format,
+        rows=len(df),
+        seconds=time.perf_counter() - start,
+        input_bytes=len(content),
+        # Payload + Arrow staging table + final frame are alive together at the peak
+        peak_bytes=len(content) + staging_bytes + int(df.memory_usage(deep=True).sum()),
+        skipped_rows=skipped_rows,
+    )
+    return df, stats
+
+
+@dataclass
+class ReportFile:
+    """A downloaded report spooled to disk, for the streaming mode."""
+    path: str
+    format: str
+    content_type: str = None
+
+    @property
+    def bytes(self):
+        return os.path.getsize(self.path)
+
+
+def iter_report_chunks(path, content_type=None, ad_type=None, block_bytes=16 << 20):
+    """Yield the report at ``path`` as DataFrames of about ``block_bytes`` of CSV each.
+
+    Every chunk is typed like ``parse_report`` types the whole file, so the
+    chunks hold the same values as the in-memory frame, row for row. From the
+    first block with a short row on, the rest of the file is read by pandas.
+    """
+    column_types = REPORT_COLUMN_TYPES.get(ad_type, {})
+    with open(path, 'rb') as f:
+        head = f.read(HEAD_BYTES)
+
+    report_format = sniff_format(head, content_type)
+    if report_format != 'csv':
+        with open(path, 'rb') as f:
+            df, _ = parse_report(f.read(), content_type, ad_type)
+        for start in range(0, len(df), EXCEL_CHUNK_ROWS):
+            yield df.iloc[start:start + EXCEL_CHUNK_ROWS]
+        return
+
+    if pa is None:
+        raise RuntimeError("Streaming mode needs pyarrow to read CSV reports in blocks")
+
+    # Every column read as text and typed per block: Arrow only infers types from the first block.
+    # No reader threads, so no blocks are read ahead of the one being processed
+    invalid = InvalidRows()
+    rows_yielded = 0
+    with pa_csv.open_csv(
+        path,
+        read_options=pa_csv.ReadOptions(block_size=block_bytes, use_threads=False),
+        parse_options=pa_csv.ParseOptions(delimiter=',', invalid_row_handler=invalid),
+        convert_options=pa_csv.ConvertOptions(column_types={name: pa.string() for name in _csv_header(head)},
+                                              strings_can_be_null=True),
+    ) as reader:
+        for batch in reader:
+            if invalid.short:
+                # This block lost a short row: pandas, which keeps it, reads from the block on
+                break
+            if not batch.num_rows:
+                continue
+            table = pa.Table.from_batches([batch])
+            for index, name in enumerate(table.column_names):
+                kind = column_types.get(name.strip())
+                if kind:
+                    table = table.set_column(index, name, _type_arrow_column(table.column(index), kind))
+            rows_yielded += batch.num_rows
+            yield table.to_pandas(split_blocks=True, self_destruct=True)
+
+    if invalid.short:
+        yield from _iter_csv_pandas(path, column_types, rows_yielded)
+    elif invalid.skipped:
+        print(f"⚠️ {os.path.basename(path)}: bỏ qua {invalid.skipped} dòng thừa cột")
+
+
+def _iter_csv_pandas(path, column_types, skip_rows, chunk_rows=PANDAS_CHUNK_ROWS):
+    """Blocks of the CSV at ``path`` read by pandas, after the first ``skip_rows`` rows already yielded."""
+    skipped = 0
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always', pd.errors.ParserWarning)
+        with pd.read_csv(path, dtype=str, on_bad_lines='warn', delimiter=',', encoding='utf-8',
+                         chunksize=chunk_rows) as reader:
+            for chunk in reader:
+                skipped += sum(str(warning.message).count('Skipping line') for warning in caught)
+                caught.clear()
+                if skip_rows >= len(chunk):
+                    skip_rows -= len(chunk)
+                    continue
+                chunk = chunk.iloc[skip_rows:].reset_index(drop=True)
+                skip_rows = 0
+                yield _type_pandas_frame(chunk, column_types)
+    if skipped:
+        print(f"⚠️ {os.path.basename(path)}: bỏ qua {skipped} dòng thừa cột")
+
+
+def probe_report_file(path, content_type=None, ad_type=None, block_bytes=1 << 20):
+    """Check that the spooled download at ``path`` parses; returns a ``ReportFile``."""
+    with open(path, 'rb') as f:
+        report_format = sniff_format(f.read(HEAD_BYTES), content_type)
+    if report_format == 'csv':
+        chunks = iter_report_chunks(path, content_type, ad_type, block_bytes)
+        try:
+            next(chunks, None)
+        finally:
+            chunks.close()
+    return ReportFile(path=path, format=report_format, content_type=content_type)
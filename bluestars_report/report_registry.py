@@ -0,0 +1,121 @@
+# ==================================================================================================
+#                                         REPORT REGISTRY
+# ==================================================================================================
+"""Declarative list of the weekly reports: accounts x markets x ad types.
+
+The registry replaces the hard-coded subject map, the export file names and the
+substring checks on report names (``'CA' in df_name``): every report is a
+``ReportSpec`` keyed ``<code>_<market>_<ad type>`` (e.g. ``BS_US_SP``) that
+carries its brand, market, ad type, Gmail subject and FX factor. The default
+table lives in ``report_registry.toml`` next to this module; YAML and JSON
+files are accepted too.
+"""
+import json
+import os
+from dataclasses import dataclass
+
+DEFAULT_REGISTRY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'report_registry.toml')
+
+
+@dataclass(frozen=True)
+class ReportSpec:
+    key: str
+    brand: str
+    code: str
+    market: str
+    market_name: str
+    ad_type: str
+    ad_type_name: str
+    campaign_type: str
+    fx_to_usd: float
+    subject: str
+    file_name_template: str
+
+    def file_name(self, start, end):
+        return self.file_name_template.format(**self._fields(), start=start, end=end)
+
+    def _fields(self):
+        return {'brand': self.brand, 'code': self.code, 'market': self.market, 'market_name': self.market_name,
+                'ad_type': self.ad_type, 'ad_type_name': self.ad_type_name}
+
+
+def _read_table(path):
+    if path.endswith('.toml'):
+        try:
+            import tomllib
+        except ImportError:  # Python < 3.11
+            import tomli as tomllib
+        with open(path, 'rb') as f:
+            return tomllib.load(f)
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith(('.yaml', '.yml')):
+            import yaml
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+class ReportRegistry:
+    def __init__(self, table):
+        self.ad_types = table['ad_types']
+        self.markets = table['markets']
+        self.accounts = {account['brand']: account for account in table['accounts']}
+        templates = table.get('templates', {})
+
+        self.reports = {}
+        for account in table['accounts']:
+            for market in account.get('markets', []):
+                for ad_type in account.get('ad_types', list(self.ad_types)):
+                    if market not in self.markets:
+                        raise ValueError(f"Account {account['brand']}: unknown market {market}")
+                    if ad_type not in self.ad_types:
+                        raise ValueError(f"Account {account['brand']}: unknown ad type {ad_type}")
+                    key = f"{account['code']}_{market}_{ad_type}"
+                    if key in self.reports:
+                        raise ValueError(f"Duplicate report {key}")
+
+                    fields = {'brand': account['brand'], 'code': account['code'], 'market': market,
+                              'market_name': self.markets[market]['name'],
+                              'ad_type': ad_type, 'ad_type_name': self.ad_types[ad_type]['name']}
+                    self.reports[key] = ReportSpec(
+                        key=key,
+                        campaign_type=self.ad_types[ad_type]['campaign_type'],
+                        fx_to_usd=float(self.markets[market].get('fx_to_usd', 1.0)),
+                        subject=account.get('subject', templates['subject']).format(**fields),
+                        file_name_template=account.get('file_name', templates['file_name']),
+                        **fields,
+                    )
+
+        subjects = [report.subject for report in self.reports.values()]
+        if len(set(subjects)) != len(subjects):
+            raise ValueError("Two reports share the same email subject")
+
+    def __getitem__(self, key):
+        try:
+            return self.reports[key]
+        except KeyError:
+            raise KeyError(f"Report {key} is not in the registry") from None
+
+    def __iter__(self):
+        return iter(self.reports.values())
+
+    def __len__(self):
+        return len(self.reports)
+
+    @property
+    def brands(self):
+        return list(self.accounts)
+
+    def subjects(self):
+        """``{email subject: report key}`` for the Gmail search."""
+        return {report.subject: report.key for report in self.reports.values()}
+
+    def catalog_urls(self):
+        return {brand: account['catalog_url'] for brand, account in self.accounts.items() if account.get('catalog_url')}
+
+    def ignored_campaigns(self):
+        return {brand: set(account.get('ignore_campaigns', [])) for brand, account in self.accounts.items()}
+
+
+def load_registry(path=None):
+    """Load the registry from TOML (default), YAML (.yaml/.yml) or JSON."""
+    return ReportRegistry(_read_table(path or DEFAULT_REGISTRY_PATH))
@@ -0,0 +1,94 @@
+# ==================================================================================================
+#                                         ROLLUP CUBE
+# ==================================================================================================
+"""Weekly totals by Brand > Market > Campaign Type > Campaign Form > SKU, with every subtotal.
+
+``RollupAccumulator`` sums the measures of each frame it is given in one
+grouped pass at the finest grain (the whole ``df_combined`` in batch mode, one
+block at a time in streaming mode; partial sums are tiny and re-summed at the
+end). ``cube()`` then derives the subtotal levels from that small table, like
+SQL ``ROLLUP``: a rolled-up dimension holds ``ALL``, a missing SKU stays null.
+ACOS / ROAS / CTR / CPC are computed from the summed measures, not averaged
+from the per-row Amazon values. Money is summed in integer micro-units, so the
+cube does not depend on how the rows were split into blocks.
+"""
+import numpy as np
+import pandas as pd
+
+ROLLUP_DIMENSIONS = ['Brand', 'Market', 'Campaign Type', 'Campaign Form', 'SKU']
+ROLLUP_MEASURES = ['Spend', 'Sales', 'Orders', 'Clicks', 'Impressions']
+
+# ratio: (numerator, denominator, decimals); 0 when the denominator is 0, as in the Amazon reports
+ROLLUP_RATIOS = {
+    'ACOS': ('Spend', 'Sales', 4),
+    'ROAS': ('Sales', 'Spend', 2),
+    'CTR': ('Clicks', 'Impressions', 4),
+    'CPC': ('Spend', 'Clicks', 2),
+}
+ROLLUP_COLUMNS = ROLLUP_DIMENSIONS + ROLLUP_MEASURES + list(ROLLUP_RATIOS)
+
+ALL = '(All)'
+MONEY_COLUMNS = ['Spend', 'Sales']
+MONEY_DECIMALS = 2
+MONEY_UNITS = 10**6
+
+# Partial aggregates kept before they are folded into one
+MAX_PARTS = 16
+
+
+def _sum_by(df, dimensions):
+    return df.groupby(dimensions, observed=True, dropna=False, sort=False)[ROLLUP_MEASURES].sum()
+
+
+class RollupAccumulator:
+    def __init__(self):
+        self.parts = []
+
+    def add(self, df):
+        """Fold the measures of ``df`` (``df_combined`` or one block of it) into the totals."""
+        money = np.rint(df[MONEY_COLUMNS].fillna(0).to_numpy(dtype='float64') * MONEY_UNITS).astype('int64')
+        part = _sum_by(df.assign(**dict(zip(MONEY_COLUMNS, money.T))), ROLLUP_DIMENSIONS).reset_index()
+        # Dimensions as plain objects: categories of different blocks do not concat
+        part[ROLLUP_DIMENSIONS] = part[ROLLUP_DIMENSIONS].astype(object)
+        self.parts.append(part)
+        if len(self.parts) > MAX_PARTS:
+            self.parts = [self._finest()]
+
+    def _finest(self):
+        if not self.parts:
+            return pd.DataFrame({column: pd.Series(dtype=object if column in ROLLUP_DIMENSIONS else 'int64')
+                                 for column in ROLLUP_DIMENSIONS + ROLLUP_MEASURES})
+        return _sum_by(pd.concat(self.parts, ignore_index=True), ROLLUP_DIMENSIONS).reset_index()
+
+    def cube(self):
+        """Every rollup level in one frame (``ROLLUP_COLUMNS``), grand total first, then each subtree in order."""
+        finest = self._finest()
+        levels = [finest]
+        for depth in range(len(ROLLUP_DIMENSIONS) - 1, -1, -1):
+            keys = ROLLUP_DIMENSIONS[:depth]
+            level = _sum_by(finest, keys).reset_index() if keys else finest[ROLLUP_MEASURES].sum().to_frame().T
+            for dimension in ROLLUP_DIMENSIONS[depth:]:
+                level[dimension] = ALL
+            levels.append(level)
+        cube = pd.concat(levels, ignore_index=True)
+        cube[MONEY_COLUMNS] = cube[MONEY_COLUMNS].astype('int64') / MONEY_UNITS
+
+        for ratio, (numerator, denominator, decimals) in ROLLUP_RATIOS.items():
+            num, den = cube[numerator].to_numpy(dtype='float64'), cube[denominator].to_numpy(dtype='float64')
+            with np.errstate(divide='ignore', invalid='ignore'):
+                cube[ratio] = np.round(np.where(den > 0, num / den, 0.0), decimals)
+
+        cube[MONEY_COLUMNS] = cube[MONEY_COLUMNS].round(MONEY_DECIMALS)
+        cube[['Orders', 'Clicks', 'Impressions']] = cube[['Orders', 'Clicks', 'Impressions']].astype('int64')
+        cube[ROLLUP_DIMENSIONS] = cube[ROLLUP_DIMENSIONS].astype(object)
+
+        # ALL sorts before the values of its level, missing SKUs after them
+        cube = cube.sort_values(ROLLUP_DIMENSIONS, key=lambda column: column.where(column != ALL, ''),
+                                na_position='last', kind='stable')
+        return cube[ROLLUP_COLUMNS].reset_index(drop=True)
+
+
+def build_rollup(df):
+    accumulator = RollupAccumulator()
+    accumulator.add(df)
+    return accumulator.cube()
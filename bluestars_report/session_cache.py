@@ -0,0 +1,109 @@
+# ==================================================================================================
+#                                         AUTHENTICATED SESSION CACHE
+# ==================================================================================================
+"""Keep the Amazon Advertising cookie jar between runs so Chrome is rarely needed.
+
+Cookies are encrypted with Fernet under a key derived (PBKDF2) from a passphrase,
+by default the account's TOTP secret, and written to a single file. Before
+reusing them, ``probe`` asks the first report link for its headers only: a 200,
+or a redirect anywhere but the sign-in flow (e.g. to a signed download URL),
+means the session is still good. Without a passphrase the cache is disabled.
+"""
+import base64
+import json
+import os
+import time
+
+import requests
+from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+SIGN_IN_MARKERS = ('/ap/signin', '/ap/mfa', '/ap/cvf')
+
+
+def _derive_key(passphrase, salt):
+    kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=salt, iterations=390000)
+    return base64.urlsafe_b64encode(kdf.derive(passphrase.encode('utf-8')))
+
+
+def looks_signed_out(response):
+    location = response.headers.get('Location', '') + response.url
+    return any(marker in location for marker in SIGN_IN_MARKERS)
+
+
+class SessionCache:
+    def __init__(self, path, passphrase, max_age=7 * 24 * 3600, probe_timeout=(5, 15)):
+        self.path = path
+        self.passphrase = passphrase
+        self.max_age = max_age
+        self.probe_timeout = probe_timeout
+        if not passphrase:
+            print("⚠️ Session cache disabled: no passphrase (set SESSION_CACHE_KEY or TOTP_SECRET)")
+
+    def save(self, session):
+        if not self.passphrase:
+            return
+        cookies = [{
+            'name': cookie.name,
+            'value': cookie.value,
+            'domain': cookie.domain,
+            'path': cookie.path,
+            'expires': cookie.expires,
+            'secure': cookie.secure,
+        } for cookie in session.cookies]
+        salt = os.urandom(16)
+        token = Fernet(_derive_key(self.passphrase, salt)).encrypt(
+            json.dumps({'saved_at': time.time(), 'cookies': cookies}).encode('utf-8'))
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        # Owner-only permissions: the file holds live session cookies
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'salt': base64.b64encode(salt).decode('ascii'), 'token': token.decode('ascii')}, f)
+        os.replace(tmp_path, self.path)
+
+    def load(self):
+        """Return a ``requests.Session`` with the cached cookies, or None."""
+        if not self.passphrase:
+            return None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+            key = _derive_key(self.passphrase, base64.b64decode(stored['salt']))
+            payload = json.loads(Fernet(key).decrypt(stored['token'].encode('ascii')))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, InvalidToken) as e:
+            print(f"⚠️ Session cache unreadable ({type(e).__name__}), ignoring it")
+            return None
+
+        if time.time() - payload.get('saved_at', 0) > self.max_age:
+            return None
+
+        session = requests.Session()
+        for cookie in payload['cookies']:
+            session.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain'),
+                                path=cookie.get('path') or '/', expires=cookie.get('expires'),
+                                secure=cookie.get('secure', False))
+        return session
+
+    def probe(self, session, link):
+        """Cheap check that ``session`` can still open ``link`` (headers only, body never read)."""
+        if not link:
+            return False
+        try:
+            with session.get(link, stream=True, allow_redirects=False, timeout=self.probe_timeout) as response:
+                # The link may answer with a redirect to a signed download URL: fine unless it goes to sign-in
+                reachable = response.status_code == 200 or (response.is_redirect and 'Location' in response.headers)
+                return reachable and not looks_signed_out(response)
+        except requests.RequestException as e:
+            print(f"⚠️ Session probe failed: {e}")
+            return False
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
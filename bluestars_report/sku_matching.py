@@ -0,0 +1,87 @@
+# ==================================================================================================
+#                                         SKU MATCHING ENGINE
+# ==================================================================================================
+"""Match catalog SKUs inside campaign names.
+
+The report script used to loop over every catalog SKU for every campaign name.
+``SkuMatcher`` builds an Aho-Corasick automaton once per catalog and scans each
+distinct campaign name a single time, while keeping the original rule: the SKU
+that appears first in catalog order wins, wherever it sits in the name.
+"""
+import numpy as np
+import pandas as pd
+
+
+class SkuMatcher:
+    def __init__(self, skus):
+        # Keep the first catalog position of every distinct SKU
+        self.skus = []
+        seen = set()
+        for sku in skus:
+            sku = str(sku)
+            if sku not in seen:
+                seen.add(sku)
+                self.skus.append(sku)
+
+        self._goto = [{}]
+        self._fail = [0]
+        self._best = [len(self.skus)]
+
+        for index, sku in enumerate(self.skus):
+            state = 0
+            for ch in sku:
+                next_state = self._goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][ch] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._best.append(len(self.skus))
+                state = next_state
+            self._best[state] = min(self._best[state], index)
+
+        self._build_failure_links()
+
+    def _build_failure_links(self):
+        # Breadth-first so that every failure target is final before its children use it
+        queue = list(self._goto[0].values())
+        for state in queue:
+            self._best[state] = min(self._best[state], self._best[0])
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for ch, child in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(ch, 0)
+                # A state also "sees" every SKU ending at its failure chain
+                self._best[child] = min(self._best[child], self._best[self._fail[child]])
+                queue.append(child)
+
+    def match(self, campaign_name):
+        """Return the earliest catalog SKU contained in ``campaign_name`` or None."""
+        if not isinstance(campaign_name, str):
+            return None
+
+        goto, fail, best_by_state = self._goto, self._fail, self._best
+        best = best_by_state[0]
+        state = 0
+        for ch in campaign_name:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if best_by_state[state] < best:
+                best = best_by_state[state]
+                if best == 0:
+                    break
+
+        return self.skus[best] if best < len(self.skus) else None
+
+    def match_series(self, campaign_names):
+        """Label a whole column, scanning each distinct campaign name only once."""
+        codes, uniques = pd.factorize(campaign_names, use_na_sentinel=True)
+        resolved = np.array([self.match(name) for name in uniques] + [None], dtype=object)
+        # Missing names get code -1, which picks the trailing None
+        return pd.Series(resolved[codes], index=campaign_names.index, dtype=object)
@@ -0,0 +1,66 @@
+# ==================================================================================================
+#                                         STREAMING REPORT PATH
+# ==================================================================================================
+"""Memory-bounded processing: one block of one report at a time, from disk to the outputs.
+
+The in-memory path holds every report several times over (payload, parsed
+frame, cleaned frame, ``df_combined``), so peak RSS grows with the total input.
+In streaming mode the reports are spooled to disk by the downloader, read back
+in blocks sized from a memory budget (``iter_report_chunks``), cleaned per
+block with ``process_report`` and handed to the output writers (Excel sheet,
+history store) before the next block is read. Campaign names are resolved
+through the memo as they first appear, so the missing-SKU alert is the same
+query as in the in-memory path.
+"""
+import pandas as pd
+
+from bluestars_report.report_parser import iter_report_chunks
+from bluestars_report.transform import process_report
+
+# Copies of one block alive at the same time: CSV block, Arrow batch, pandas frame,
+# the transform's column copies and the object rows handed to the sheet writer
+CHUNK_COPIES = 8
+MIN_BLOCK_BYTES = 1 << 20
+
+
+def block_bytes_for_budget(memory_mb):
+    """CSV bytes to read per block so that one block stays within ``memory_mb``."""
+    return max(MIN_BLOCK_BYTES, int(memory_mb * 2**20 / CHUNK_COPIES))
+
+
+class ChunkResolutions:
+    """Resolution table of one report, grown as new campaign names show up in later blocks.
+
+    ``resolve(names)`` returns ``CampaignResolver.resolve`` output for ``names``.
+    """
+
+    def __init__(self, resolve):
+        self.resolve = resolve
+        self.table = None
+
+    def update(self, campaign_names):
+        names = pd.Index(pd.unique(campaign_names.dropna()), dtype=object)
+        if self.table is not None:
+            # Last row of the table is the "no campaign name" row
+            names = names.difference(self.table.index[:-1], sort=False)
+            if not len(names):
+                return self.table
+
+        fresh = self.resolve(pd.Series(names, dtype=object))
+        self.table = fresh if self.table is None else pd.concat([self.table.iloc[:-1], fresh])
+        return self.table
+
+
+def stream_report(path, report, resolve, sinks, content_type=None, block_bytes=16 << 20):
+    """Clean the report spooled at ``path`` block by block and pass each cleaned block to every sink.
+
+    Sinks are called in order with the same frame; returns the number of rows.
+    """
+    resolutions = ChunkResolutions(resolve)
+    rows = 0
+    for chunk in iter_report_chunks(path, content_type, report.ad_type, block_bytes):
+        cleaned = process_report(chunk, report, resolutions.update(chunk['Campaign Name']))
+        for sink in sinks:
+            sink(cleaned)
+        rows += len(cleaned)
+    return rows
@@ -0,0 +1,203 @@
+# ==================================================================================================
+#                                         REPORT TRANSFORMATION
+# ==================================================================================================
+"""Clean one downloaded report into the weekly layout, and fan many out over processes.
+
+``process_report`` is the body of the script's ``process_dataframe``; brand,
+market, ad type, campaign type and FX factor now come from the report's
+``ReportSpec`` instead of substring checks on its name, and SKU, Campaign Form
+and Cost Type come per distinct name from ``CampaignResolver`` (the memo), so a
+worker only spreads them over the rows. ``process_reports``
+runs one job per report in a process pool (inline when there is a single job
+or a single worker), so the transform time stays flat as accounts are added.
+
+On Linux the pool is forked after the jobs are published in ``_FORK_JOBS``:
+workers read the raw frames and resolution tables copy-on-write and receive
+only a job index. Cleaned frames come back as Arrow IPC buffers instead of
+pickled DataFrames (pickle remains the fallback for frames Arrow cannot hold,
+and for everything when pyarrow is not installed).
+"""
+import functools
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - pyarrow is optional
+    pa = None
+
+from bluestars_report.campaign_memo import label_campaigns
+from bluestars_report.instrumentation import RunRecorder
+
+# Define the order of columns -> Thêm cột mới tại đây
+OUTPUT_COLUMNS = ['Date', 'Campaign Type', 'Campaign Name', 'Bidding strategy',
+                  'Impressions', 'Clicks', 'Spend', 'Orders', 'Sales',
+                  'Product Number', 'Campaign Form', 'Market', 'Brand',
+                  'Cost Type', 'SKU']
+
+
+def process_report(df, report, resolutions):
+    """Clean ``df`` (one raw report) using its ``ReportSpec`` and the resolved campaign names."""
+    ad_type = report.ad_type
+
+    # SKU / Campaign Form / Cost Type của từng campaign name (memo) -> trải ra từng dòng
+    labels = label_campaigns(df['Campaign Name'], resolutions)
+
+    # Apply the SKU extraction to df
+    df['SKU'] = labels['SKU'].to_numpy()
+
+    # Trim column names
+    trim_column_names = lambda x: x.strip()
+    df.rename(columns=trim_column_names, inplace=True)
+
+    # Rename columns based on ad_type -> Đổi tên cột
+    if ad_type == 'SP':
+        df.rename(columns={
+            'Click-Thru Rate (CTR)': 'CTR',
+            'Cost Per Click (CPC)': 'CPC',
+            '7 Day Total Orders (#)': 'Orders',
+            'Total Advertising Cost of Sales (ACOS)': 'ACOS',
+            'Total Return on Advertising Spend (ROAS)': 'ROAS',
+            '7 Day Total Sales': 'Sales'
+        }, inplace=True)
+    elif ad_type == 'SB':
+        df.rename(columns={
+            'Click-Thru Rate (CTR)': 'CTR',
+            'Cost Per Click (CPC)': 'CPC',
+            '14 Day Total Orders (#)': 'Orders',
+            'Total Advertising Cost of Sales (ACOS)': 'ACOS',
+            'Total Return on Advertising Spend (ROAS)': 'ROAS',
+            '14 Day Total Sales': 'Sales'
+        }, inplace=True)
+    elif ad_type == 'SD':
+        df.rename(columns={
+            'Click-Thru Rate (CTR)': 'CTR',
+            'Cost Per Click (CPC)': 'CPC',
+            '14 Day Total Orders (#)': 'Orders',
+            'Total Advertising Cost of Sales (ACOS)': 'ACOS',
+            'Total Return on Advertising Spend (ROAS)': 'ROAS',
+            '14 Day Total Sales': 'Sales'
+        }, inplace=True)
+
+    # Clean and convert numerical columns
+    for column in ['Budget', 'Spend', 'CPC', 'Sales']:
+        if column in df.columns and df[column].dtype == 'object':
+            df[column] = df[column].astype(str)
+            df[column] = df[column].str.replace(r'[CA|US|\$|,]', '', regex=True)
+            df[column] = df[column].astype(float)
+
+    # Additional processing for df
+    df['Product Number'] = np.nan
+
+    # Campaign name classification -> Campaign Form & Cost Type
+    df['Campaign Form'] = labels['Campaign Form'].to_numpy()
+    df['Cost Type'] = labels['Cost Type'].to_numpy()
+
+    # Currency adjustment per market (e.g. Canada 0.76)
+    if report.fx_to_usd != 1.0:
+        df['Spend'] *= report.fx_to_usd
+        df['Sales'] *= report.fx_to_usd
+
+    df['Market'] = report.market_name
+    df['Brand'] = report.brand
+
+    # Additional columns based on ad_type
+    df['Campaign Type'] = report.campaign_type
+    if ad_type == 'SB':
+        df['Status'] = np.nan
+        df['Budget'] = np.nan
+        df['Targeting Type'] = np.nan
+        df['Bidding strategy'] = np.nan
+    elif ad_type == 'SD':
+        df['Targeting Type'] = np.nan
+        df['Bidding strategy'] = np.nan
+
+    df['Start Date'] = np.nan
+    df['End Date'] = np.nan
+
+    return df[OUTPUT_COLUMNS]
+
+
+# Jobs of the running process_reports call, inherited by forked workers
+_FORK_JOBS = None
+
+
+def frame_to_arrow(df):
+    """Arrow IPC stream of ``df``; the frame itself (pickled by the pool) without pyarrow or for mixed types."""
+    if pa is None:
+        return df
+    try:
+        table = pa.Table.from_pandas(df)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError, ValueError):
+        return df
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def arrow_to_frame(payload):
+    if pa is not None and isinstance(payload, pa.Buffer):
+        return pa.ipc.open_stream(payload).read_all().to_pandas()
+    return payload
+
+
+def _process_job(job, recorder):
+    key, df, report, resolutions = job
+    with recorder.span('process_dataframe', report=key) as span:
+        df_cleaned = process_report(df, report, resolutions)
+        span.record(rows=len(df_cleaned), pid=os.getpid())
+    return key, df_cleaned
+
+
+def _process_job_arrow(job, settings):
+    # Timed (and profiled, with --profile process_dataframe) in the worker; the span goes back with the result
+    recorder = RunRecorder(None, *settings)
+    key, df_cleaned = _process_job(job, recorder)
+    return key, frame_to_arrow(df_cleaned), recorder.records[-1]
+
+
+def _process_forked_job(settings, index):
+    return _process_job_arrow(_FORK_JOBS[index], settings)
+
+
+def _fork_context():
+    # fork is only safe and cheap on Linux (macOS defaults to spawn for a reason)
+    if sys.platform.startswith('linux'):
+        return multiprocessing.get_context('fork')
+    return None
+
+
+def process_reports(jobs, workers=None, recorder=None):
+    """Run ``process_report`` for every ``(key, df, report, resolutions)`` job.
+
+    Yields ``(key, cleaned df)`` in job order. Each job is a ``process_dataframe``
+    span of ``recorder``, measured where the job runs.
+    """
+    global _FORK_JOBS
+    jobs = list(jobs)
+    recorder = recorder or RunRecorder()
+    workers = min(len(jobs), workers or os.cpu_count() or 1)
+    if workers <= 1:
+        for job in jobs:
+            yield _process_job(job, recorder)
+        return
+
+    context = _fork_context()
+    if context is not None:
+        # Published before the pool forks its workers (all at the first submit), never pickled
+        _FORK_JOBS = jobs
+        work, tasks = functools.partial(_process_forked_job, recorder.settings()), range(len(jobs))
+    else:
+        work, tasks = functools.partial(_process_job_arrow, settings=recorder.settings()), jobs
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            for key, payload, record in pool.map(work, tasks):
+                recorder.adopt(record)
+                yield key, arrow_to_frame(payload)
+    finally:
+        _FORK_JOBS = None